@@ -1,14 +1,14 @@
-# coding: utf-8
-# Copyright (c) pytmge Development Team.
-
-"""
-Pytmge (Python Toolkit for Materials Genome Engineering)
-is an open-source Python library for materials informatics studies.
-This is the root package.
-
-"""
-
-__author__ = "pytmge Development Team"
-__maintainer__ = "Yang LIU"
-__maintainer_email__ = "l_young@live.cn"
-__version__ = "2022/3/18"
+# coding: utf-8
+# Copyright (c) pytmge Development Team.
+
+"""
+Pytmge (Python Toolkit for Materials Genome Engineering)
+is an open-source Python library for materials informatics studies.
+This is the root package.
+
+"""
+
+__author__ = "pytmge Development Team"
+__maintainer__ = "Yang LIU"
+__maintainer_email__ = "l_young@live.cn"
+__version__ = "2022/3/18"
@@ -1,17 +1,31 @@
-# coding: utf-8
-# Copyright (c) pytmge Development Team.
-
-"""
-This package contains modules and classes
-for machine learning to predict crystals.
-
-"""
-
-
-from pytmge.core.crystal.data_preparation import data_set
-
-from pytmge.core.crystal.feature_design import feature_design
-
-from pytmge.core.crystal.feature_engineering import feature_engineering
-
-from pytmge.core.crystal.plot_figures import plot_target_vs_features
+# coding: utf-8
+# Copyright (c) pytmge Development Team.
+
+"""
+This package contains modules and classes
+for machine learning to predict crystals.
+
+Copies along the pipeline (composition -> features -> usable features -> selected features):
+    the DataFrames given to a function are never modified;
+    a new matrix (features, correlation matrix) is computed once, into a new array,
+    and returned as a DataFrame wrapping that array (no second copy);
+    a selection of columns (usable or selected features) is one copy of those columns;
+    the arrays of DataFrame.to_numpy() may be views of the DataFrame,
+    read-only under pandas copy-on-write, they are copied before being modified.
+
+"""
+
+
+from pytmge.core.crystal.data_preparation import data_set
+
+from pytmge.core.crystal.feature_design import feature_design, feature_scaler
+
+from pytmge.core.crystal.feature_engineering import feature_engineering
+
+from pytmge.core.crystal.plot_figures import plot_target_vs_features
+
+from pytmge.core.crystal.pipeline import pipeline, crystal_pipeline
+
+from pytmge.core.crystal.similarity import similarity_index
+
+from pytmge.core.crystal.screening import composition_space, screen
@@ -0,0 +1,247 @@
+# coding: utf-8
+# Copyright (c) pytmge Development Team.
+
+"""
+Shard-and-merge batch featurization, for several machines sharing a filesystem.
+    shard_of
+    run_shard
+    merge_shards
+
+Each invocation of run_shard handles the chemical formulas of one shard
+(chosen by a stable hash of the formula, so every process agrees without coordination),
+and merge_shards joins the shard outputs into the result of a single-node run:
+    data_set -> composition -> get_features (-> delete_unusable_features)
+
+Command line, e.g. 4 shards on one box:
+    python -m pytmge.core.crystal.batch shard example.csv ./_shards --shard 0 --n-shards 4 --usable
+    ... (--shard 1, 2, 3, in parallel)
+    python -m pytmge.core.crystal.batch merge ./_shards df_usable_features.npy --n-shards 4 --usable
+
+"""
+
+
+import os
+import json
+import zlib
+import argparse
+import numpy as np
+import pandas as pd
+
+from pytmge.core import save_matrix, load_matrix, instrument, _print
+from pytmge.core import verbose_option, is_verbose
+from pytmge.core.crystal.data_preparation import data_set
+from pytmge.core.crystal.feature_design import feature_design
+
+
+__author__ = 'Yang LIU'
+__maintainer__ = 'Yang LIU'
+__email__ = 'l_young@live.cn'
+__version__ = '1.0'
+__date__ = '2022/3/18'
+
+
+def shard_of(formulas, n_shards):
+    '''
+    Shard number of each chemical formula, by CRC32 of the formula string.
+    Stable across processes, machines and Python versions (unlike hash()).
+
+    Returns
+    -------
+    shards : ndarray
+        One shard number in [0, n_shards) per chemical formula.
+
+    '''
+
+    return np.array([zlib.crc32(str(cf).encode('utf-8')) % n_shards for cf in formulas], dtype='int64')
+
+
+def _read_table(input_path):
+    if os.path.splitext(input_path)[1].lower() in ('.parquet', '.pq'):
+        return pd.read_parquet(input_path)
+    return pd.read_csv(input_path, index_col=0)
+
+
+def _shard_name(output_path, shard, n_shards):
+    return os.path.join(output_path, 'shard-' + str(shard) + '-of-' + str(n_shards))
+
+
+@verbose_option
+@instrument.stage('batch.run_shard')
+def run_shard(input_path, output_path, shard, n_shards, usable=False):
+    '''
+    Parsing and featurizing the chemical formulas of one shard.
+
+    Writes to output_path:
+        'shard-<i>-of-<n>.npy' (and its manifest) : the features of the shard (see save_matrix),
+        'shard-<i>-of-<n>.json' : the column statistics and the positions of the rows in the input,
+            written last, so it marks the shard as finished.
+
+    An interrupted shard resumes from its checkpoint (see feature_design.get_features).
+
+    Parameters
+    ----------
+    input_path : str
+        A dataset file (.csv, chemical formulas in the first column, or .parquet).
+    output_path : str
+        A directory shared by all shards.
+    shard : int
+        Number of the shard, in [0, n_shards).
+    n_shards : int
+        Number of shards.
+    usable : bool, optional
+        Drop the features having empty value(s) in this shard,
+        they are unusable in the merged dataset anyway. The default is False.
+
+    Returns
+    -------
+    df_features : DataFrame
+        features of the shard.
+
+    '''
+
+    print('\n  shard', shard, 'of', n_shards, '...') if is_verbose(_print) else 0
+
+    os.makedirs(output_path, exist_ok=True)
+    name = _shard_name(output_path, shard, n_shards)
+
+    df_dataset = _read_table(input_path)
+
+    # position of the first entry of each chemical formula in the input, to restore the order when merging.
+    first = pd.Series(np.arange(df_dataset.shape[0]), index=df_dataset.index)
+    first = first[~first.index.duplicated()]
+
+    df_dataset = df_dataset.loc[shard_of(df_dataset.index, n_shards) == shard, :]
+
+    df_composition = data_set(df_dataset).chemical_formulas.composition.df
+    df_features = feature_design.get_features(df_composition, checkpoint_path=name + '.checkpoint')
+
+    values = df_features.to_numpy()
+    nan = np.isnan(values).sum(axis=0)
+    stats = {
+        'rows': int(values.shape[0]),
+        'columns': [str(c) for c in df_features.columns],
+        'usable': bool(usable),
+        'nan': nan.tolist(),
+        'min': np.nanmin(values, axis=0, initial=np.inf).tolist(),
+        'max': np.nanmax(values, axis=0, initial=-np.inf).tolist(),
+        'positions': first.loc[df_features.index].tolist(),
+    }
+
+    if usable:
+        df_features = df_features.loc[:, nan == 0]
+
+    save_matrix(df_features, name + '.npy')
+    with open(name + '.json.tmp', 'w') as _f:
+        json.dump(stats, _f)
+    os.replace(name + '.json.tmp', name + '.json')
+
+    print(' ', df_features.shape[0], 'entries', df_features.shape[1], 'features.') if is_verbose(_print) else 0
+    print('  Done.') if is_verbose(_print) else 0
+
+    return df_features
+
+
+@verbose_option
+@instrument.stage('batch.merge_shards')
+def merge_shards(output_path, n_shards, usable=False, path=None):
+    '''
+    Merging the shards into one dataset, in the order of the input.
+
+    With usable=True, the features having empty value(s) in any shard are not loaded,
+    and the variance criterion of delete_unusable_features is only evaluated
+    on the features the column statistics show to be constant,
+    so the result is that of a single-node run.
+
+    Parameters
+    ----------
+    output_path : str
+        The directory of the shards.
+    n_shards : int
+        Number of shards.
+    usable : bool, optional
+        Keep the usable features only. The default is False.
+    path : str, optional
+        Where the merged features are saved (see save_matrix). The default is None (not saved).
+
+    Returns
+    -------
+    df_features : DataFrame
+        features.
+
+    '''
+
+    print('\n  merging', n_shards, 'shards ...') if is_verbose(_print) else 0
+
+    stats = []
+    for shard in range(n_shards):
+        _file = _shard_name(output_path, shard, n_shards) + '.json'
+        if not os.path.isfile(_file):
+            raise FileNotFoundError('shard ' + str(shard) + ' of ' + str(n_shards) + ' is not finished: ' + _file)
+        with open(_file, 'rt') as _f:
+            stats.append(json.load(_f))
+
+    columns = stats[0]['columns']
+    constant = []
+    if usable:
+        nan = np.sum([s['nan'] for s in stats], axis=0)
+        lowest = np.min([s['min'] for s in stats], axis=0)
+        highest = np.max([s['max'] for s in stats], axis=0)
+        constant = [c for c, n, lo, hi in zip(columns, nan, lowest, highest) if n == 0 and lo == hi]
+        columns = [c for c, n in zip(columns, nan) if n == 0]
+    elif any(s['usable'] for s in stats):
+        raise ValueError('shards run with usable=True can only be merged with usable=True.')
+
+    blocks, positions = [], []
+    for shard, s in enumerate(stats):
+        if s['rows']:
+            blocks.append(load_matrix(_shard_name(output_path, shard, n_shards) + '.npy', columns=columns))
+            positions += s['positions']
+
+    if blocks:
+        df_features = pd.concat(blocks).iloc[np.argsort(positions, kind='stable'), :]
+    else:
+        # every shard is empty
+        df_features = pd.DataFrame(np.empty((0, len(columns))), columns=columns)
+
+    if constant:
+        # the criterion of delete_unusable_features, evaluated on the constant candidates only
+        features_variance = np.var(df_features.loc[:, constant], axis=0)
+        dropped = set(features_variance.index[features_variance == 0])
+        df_features = df_features.loc[:, [c for c in columns if c not in dropped]]
+
+    if path is not None:
+        save_matrix(df_features, path)
+
+    print(' ', df_features.shape[0], 'entries', df_features.shape[1], 'features.') if is_verbose(_print) else 0
+    print('  Done.') if is_verbose(_print) else 0
+
+    return df_features
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m pytmge.core.crystal.batch', description=__doc__.split('\n')[1])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    p = commands.add_parser('shard', help='featurize one shard')
+    p.add_argument('input_path')
+    p.add_argument('output_path')
+    p.add_argument('--shard', type=int, required=True)
+    p.add_argument('--n-shards', type=int, required=True)
+    p.add_argument('--usable', action='store_true')
+
+    p = commands.add_parser('merge', help='merge the shards')
+    p.add_argument('output_path')
+    p.add_argument('path', help='file of the merged features (.npy, .arrow or .parquet)')
+    p.add_argument('--n-shards', type=int, required=True)
+    p.add_argument('--usable', action='store_true')
+
+    args = parser.parse_args(argv)
+    if args.command == 'shard':
+        run_shard(args.input_path, args.output_path, args.shard, args.n_shards, usable=args.usable)
+    else:
+        merge_shards(args.output_path, args.n_shards, usable=args.usable, path=args.path)
+    return
+
+
+if __name__ == '__main__':
+    main()
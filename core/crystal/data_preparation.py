@@ -1,313 +1,1203 @@
-# coding: utf-8
-# Copyright (c) pytmge Development Team.
-
-'''
-Classes for data preparation.
-    Dataset
-    chemical_formulas
-    composition
-
-'''
-
-import re
-import numpy as np
-import pandas as pd
-
-from pytmge.core import element_list, progressbar, _print
-
-
-__author__ = 'Yang LIU'
-__maintainer__ = 'Yang LIU'
-__email__ = 'l_young@live.cn'
-__version__ = '1.0'
-__date__ = '2022/3/18'
-
-
-class data_set:
-
-    def __init__(self, df_dataset):
-        '''
-        df_dataset : DataFrame
-            Dataset of chemical formula and target variable.
-            (chemical formulas as index,
-            target variable and labels as columns,
-            target variable at the first column)
-
-        '''
-
-        self.data = df_dataset
-        self.chemical_formulas = chemical_formulas(df_dataset)
-        self.target_variable = df_dataset.iloc[:, 0]
-
-    def delete_duplicates(self):
-        '''
-        Delete duplicate entries in dataset.
-
-        If two or more entries have the same chemical formula
-        but different property values, keep the entry having greater value (of the first column).
-
-        Returns
-        -------
-        df_deduped_dataset : DataFrame
-            deduped subset.
-
-        '''
-
-        print('\n  deleting duplicate entries in dataset ...') if _print else 0
-
-        # sort the dataset by the values of columns (first column at the end).
-        for col_name in list(self.data)[::-1]:
-            self.data.sort_values(by=col_name, inplace=True)
-
-        deduped_dataset = {}
-        for i, cf in enumerate(list(self.data.index)):
-            deduped_dataset[cf] = self.data.loc[cf]
-            progressbar(i + 1, self.data.shape[0]) if _print else 0
-
-        print('  original:', i + 1, '| deduped:', len(deduped_dataset)) if _print else 0
-
-        df_deduped_dataset = pd.DataFrame.from_dict(deduped_dataset, orient='index')
-        # df_deduped_dataset.sort_index(ascending=True, inplace=True)
-        df_deduped_dataset.sort_values(
-            by=list(df_deduped_dataset)[0],
-            ascending=False,
-            inplace=True
-        )
-
-        print('  Done.') if _print else 0
-
-        return df_deduped_dataset
-
-    def categorization_by_composition(self):
-        '''
-        Categorizing the chemical formulas, according to (n-e-c).
-            n : 'number_of_elements',
-            e : 'element',
-            c : 'elemental_contents'
-
-        Returns
-        -------
-        dict_category : dict
-            Dict of category.
-
-        '''
-
-        print('\n  categorizing chemical formulas ...') if _print else 0
-
-        df_composition = self.chemical_formulas.composition.data['DataFrame']
-        cfs = list(df_composition.index)
-        _elements = list(df_composition.columns)
-
-        # elemental contents
-        contents = df_composition.fillna(0).applymap(lambda x: np.int(x + 0.5))
-
-        # number of elements in each chemical formula, ignore the element(s) that content < 0.5
-        number_of_elements = (df_composition.applymap(lambda x: x >= 0.5) * 1).sum(axis=1)
-
-        # print('  labeling ...') if _print else 0
-
-        category_labels = {}
-        for cf in cfs:
-            category_labels[cf] = {}
-            i = 0
-            for e in _elements:
-                if contents.loc[cf, e] >= 0.5:
-                    # assign a category lable 'n-e-c' to each chemical formula
-                    n = str(round(number_of_elements[cf]))
-                    c = str(int(contents.loc[cf, e] + 0.5))
-                    category_labels[cf][i] = n + '-' + e + '-' + c
-                    i += 1
-
-        # print('  collecting ...') if _print else 0
-
-        dict_category = {}
-        for cf in cfs:
-            for label in category_labels[cf].values():
-                # dict_category[label] = {}
-                dict_category[label] = []
-        for cf in cfs:
-            for label in category_labels[cf].values():
-                # dict_category[label][cf] = self.data.loc[cf, :].to_dict()
-                dict_category[label] += (cf, )
-
-        print('  Done.') if _print else 0
-
-        return dict_category
-
-    def subset(self):
-        '''
-        Extracting subset.
-        For each category, pick one entry having the highest value of material property.
-
-        Returns
-        -------
-        df_subset : DataFrame
-            df_subset.
-
-        '''
-
-        dict_category = self.categorization_by_composition()
-
-        print('\n  extracting subset ...') if _print else 0
-
-        ds_dataset = self.data.iloc[:, 0]
-
-        highest_entries = {}
-        for category_label, cfs in dict_category.items():
-            highest_value = ds_dataset[cfs].nlargest(1).values[0]
-            highest_entries[category_label] = ds_dataset[cfs][ds_dataset >= highest_value * 1.0].to_dict()
-            # top_3 = ds_dataset[cfs].nlargest(3).index
-            # highest_entries[category_label] = ds_dataset[cfs][top_3].to_dict()
-
-        list_highest = []
-        for k, v in highest_entries.items():
-            list_highest += list(v)  # sometimes there are multiple highest ones
-            # list_highest += (list(v)[0], )  # only take one
-
-        df_subset = self.data.loc[list(set(list_highest)), :]
-
-        df_subset.sort_values(by=list(df_subset)[0], ascending=False, inplace=True)
-
-        print('  Done.') if _print else 0
-
-        return df_subset
-
-
-class chemical_formulas:
-
-    def __init__(self, dataset: object):
-        self.data = list(dataset.index)
-        self.in_proper_format = self.check_format()
-        self.composition = composition(self.in_proper_format)
-
-    def check_format(self):
-        '''
-        Checking the format of the chemical formulas.
-
-        The format is supposed to be like 'H2O1' or 'C60',
-        whereas 'H2O' or 'C' or 'La2Cu1O4-x' is NOT ok.
-
-        Do NOT use brakets.
-
-        Returns
-        -------
-        chemical_formulas_in_proper_format : list
-            Chemical formulas in proper format.
-
-        '''
-
-        print('\n  checking format of chemical formulas ...') if _print else 0
-
-        chemical_formulas_in_proper_format = []
-        is_proper_format = {}
-
-        for i, cf in enumerate(self.data):
-
-            is_proper_format[cf] = True
-
-            if pd.isnull(cf):
-                is_proper_format[cf] = False
-                print('  chemical formula No.', i + 1, 'is null ...')
-            else:
-                try:
-                    elements_in_cf = re.split(r'[(0-9]*[\.]?[0-9]+', cf)
-                    if elements_in_cf[-1] == '':
-                        elements_in_cf = elements_in_cf[:-1]
-                    else:
-                        is_proper_format[cf] = False
-                    if elements_in_cf == '':
-                        is_proper_format[cf] = False
-                    for e in elements_in_cf:
-                        if e not in element_list:
-                            is_proper_format[cf] = False
-                            break
-                except Exception:
-                    is_proper_format[cf] = False
-
-            if is_proper_format[cf]:
-                chemical_formulas_in_proper_format += (cf, )
-            else:
-                print('\n  chemical formula seems not right :', cf) if _print else 0
-
-        print('  ' + str(len(self.data) - len(chemical_formulas_in_proper_format)),
-              'chemical formulas seem not right.') if _print else 0
-
-        print('  Done.') if _print else 0
-
-        return chemical_formulas_in_proper_format
-
-
-class composition:
-
-    def __init__(self, chemical_formulas: list):
-        self._chemical_formulas = chemical_formulas
-        self.data = self.composition()
-        self.df = self.data['DataFrame']
-        self.dict = self.data['dict']
-        self.alloys = self.data['alloys']  # the contents of which were divided by 100.
-
-    def composition(self):
-        '''
-        Extracting composition from chemical formulas.
-
-        If the cf is an alloy, the sum of contents is close to 100, then normalize to 1.
-
-        Parameters
-        ----------
-        chemical_formulas : list
-            List of chemical formulas.
-
-        Returns
-        -------
-        dict_composition : dict
-            Chemical formulas as keys, {element: content} as values.
-
-        df_composition : DataFrame
-            Chemical formulas as index, elements as columns.
-
-        alloys : list
-            A list of alloys, the contents of which were divided by 100.
-        '''
-
-        print('\n  extracting composition of chemical formulas ...') if _print else 0
-
-        dict_composition = {}
-        alloys = []
-
-        for i, cf in enumerate(self._chemical_formulas):
-
-            elements_in_cf = re.split(r'[(0-9]*[\.]?[0-9]+', cf)
-            contents_in_cf = list(map(float, re.findall(r'[0-9]*[\.]?[0-9]+', cf)))
-
-            # if the cf is an alloy, the sum of contents is close to 100, then normalize to 1.
-            # if 99.5 <= np.nansum(contents_in_cf) <= 100.5:
-            if np.nansum(contents_in_cf) == 100:
-
-                contents_in_cf = list(pd.Series(contents_in_cf) / 100)
-                alloys += (cf, )
-                # print('contents divided by 100 :', cf)
-
-            dict_composition[cf] = {}
-            for e, c in zip(elements_in_cf, contents_in_cf):
-                dict_composition[cf][e] = dict_composition[cf].get(e, 0.0) + c
-                # Note: sometimes some elements appear multiple times in a cf.
-
-            progressbar(i + 1, len(self._chemical_formulas)) if _print else 0
-
-        print('  getting DataFrame from dict ...') if _print else 0
-        df_0 = pd.DataFrame(index=list(dict_composition), columns=element_list).fillna(0)
-        df_composition = pd.DataFrame.from_dict(dict_composition, orient='index')
-        df_composition = (df_0 + df_composition).replace(0, np.nan)
-        df_composition = df_composition.loc[self._chemical_formulas, element_list] * 1
-        dict_composition = df_composition.fillna(0).to_dict(orient='index')
-
-        # print('saving...')
-        # df_composition.to_csv(str(Path(__file__).absolute().parent) + '\\' + 'df_composition.csv')
-        # print('df_composition.csv')
-        # with open(_path + 'dict_composition.json', 'w') as _f:
-        #     json.dump(dict_composition, _f)
-        # print('dict_composition.json')
-
-        print('  Done.') if _print else 0
-
-        return {'dict': dict_composition, 'DataFrame': df_composition, 'alloys': alloys}
+# coding: utf-8
+# Copyright (c) pytmge Development Team.
+
+'''
+Classes for data preparation.
+    Dataset
+    parse_chemical_formulas
+    chemical_formulas
+    composition
+    categories
+    element_index
+
+'''
+
+import numpy as np
+import pandas as pd
+
+from pytmge.core import element_list, progressbar, instrument, _print
+from pytmge.core import verbose_option, is_verbose
+from pytmge.core import save_matrix
+from pytmge.core.featurization import split_formulas
+
+
+__author__ = 'Yang LIU'
+__maintainer__ = 'Yang LIU'
+__email__ = 'l_young@live.cn'
+__version__ = '1.0'
+__date__ = '2022/3/18'
+
+
+# the content of an element, mandatory in a chemical formula
+_content_pattern = r'[(0-9]*[\.]?[0-9]+'
+
+
+def parse_chemical_formulas(formulas):
+    '''
+    Checking and parsing chemical formulas in bulk, with vectorized string operations
+    (see pytmge.core.featurization.split_formulas),
+    no loop over the chemical formulas in Python.
+
+    A chemical formula is in proper format if it is a sequence of (element symbol, content),
+    e.g. 'H2O1' or 'C60', see chemical_formulas.check_format.
+    If the contents of a chemical formula add up to 100 (an alloy), they are divided by 100.
+
+    Parameters
+    ----------
+    formulas : Index, Series or list
+        Chemical formulas.
+
+    Returns
+    -------
+    is_proper : ndarray
+        Boolean, one per chemical formula.
+    contents : ndarray
+        chemical formulas x elements (in the order of element_list), 0 if absent
+        (all 0 for the chemical formulas not in proper format).
+    is_alloy : ndarray
+        Boolean, one per chemical formula.
+
+    '''
+
+    n = len(formulas)
+    contents = np.zeros((n, len(element_list)), dtype='float64')
+
+    is_proper, rows, columns, numbers = split_formulas(formulas, _content_pattern)
+    values = numbers.str.replace('(', '', regex=False).astype('float64').to_numpy()
+
+    # contents adding up to 100: an alloy, in percent.
+    totals = np.zeros(n, dtype='float64')
+    np.add.at(totals, rows, values)
+    is_alloy = totals == 100
+    values = np.where(is_alloy[rows], values / 100, values)
+
+    # an element appearing several times in a chemical formula is summed up.
+    np.add.at(contents, (rows, columns), values)
+
+    return is_proper, contents, is_alloy
+
+
+class _pieces:
+    '''
+    A DataFrame, Index or array grown by appending pieces:
+    an append costs the size of the piece only,
+    the pieces are concatenated once, when the whole is read.
+
+    '''
+
+    def __init__(self, whole, concat):
+        self._pieces = [whole]
+        self._concat = concat
+        self._length = len(whole)
+
+    def __len__(self):
+        return self._length
+
+    def append(self, piece):
+        self._pieces.append(piece)
+        self._length += len(piece)
+        return self
+
+    def get(self):
+        if len(self._pieces) > 1:
+            self._pieces = [self._concat(self._pieces)]
+        return self._pieces[0]
+
+
+def _concat_frames(frames):
+    return pd.concat(frames)
+
+
+def _concat_indexes(indexes):
+    return indexes[0].append(indexes[1:])
+
+
+class data_set:
+
+    @verbose_option
+    def __init__(self, df_dataset):
+        '''
+        df_dataset : DataFrame
+            Dataset of chemical formula and target variable.
+            (chemical formulas as index,
+            target variable and labels as columns,
+            target variable at the first column)
+
+        '''
+
+        self._data = _pieces(df_dataset, _concat_frames)  # grown by append
+        self.chemical_formulas = chemical_formulas(df_dataset)
+        self._categories = None  # built on first use, then kept up to date by append/update
+
+    @property
+    def data(self):
+        return self._data.get()
+
+    @data.setter
+    def data(self, df_dataset):
+        self._data = _pieces(df_dataset, _concat_frames)
+
+    @property
+    def target_variable(self):
+        return self.data.iloc[:, 0]
+
+    @classmethod
+    @verbose_option
+    def from_file(cls, path, formula_column=None, columns=None, format=None, use_threads=True):
+        '''
+        Loading a dataset from a CSV or Parquet file.
+
+        The file is read by pyarrow's multi-threaded readers (pandas' readers without pyarrow),
+        and the chemical formulas are checked and parsed in bulk
+        (see parse_chemical_formulas) straight into the composition store.
+
+        Parameters
+        ----------
+        path : str
+            File path, '.csv' (or '.csv.gz' etc.) or '.parquet'.
+        formula_column : str, optional
+            Column of the chemical formulas. The default is None (the first column).
+        columns : list, optional
+            Columns to load besides the chemical formulas, the target variable first.
+            The default is None (all of them, in the order of the file).
+        format : str, optional
+            'csv' or 'parquet'. The default is None (by file extension).
+        use_threads : bool, optional
+            The default is True.
+
+        Returns
+        -------
+        dataset : data_set
+
+        '''
+
+        if format is None:
+            format = 'parquet' if str(path).lower().endswith(('.parquet', '.pq')) else 'csv'
+        if format not in ('csv', 'parquet'):
+            raise ValueError("format should be 'csv' or 'parquet'.")
+
+        print('\n  loading', path, '...') if is_verbose(_print) else 0
+
+        with instrument.span('data_set.from_file', format=format) as event:
+            try:
+                import pyarrow
+            except ImportError:
+                pyarrow = None
+
+            names = None if columns is None or formula_column is None else [formula_column] + list(columns)
+            if format == 'parquet':
+                df_dataset = pd.read_parquet(path, columns=names)
+            elif pyarrow is not None:
+                import pyarrow.csv
+                table = pyarrow.csv.read_csv(
+                    path,
+                    read_options=pyarrow.csv.ReadOptions(use_threads=use_threads),
+                    convert_options=pyarrow.csv.ConvertOptions(include_columns=names),
+                )
+                df_dataset = table.to_pandas(split_blocks=True)
+            else:
+                df_dataset = pd.read_csv(path, usecols=names)
+
+            if formula_column is None:
+                formula_column = df_dataset.columns[0]
+            df_dataset = df_dataset.set_index(formula_column)
+            if columns is not None:
+                df_dataset = df_dataset.loc[:, list(columns)]
+
+            if event is not None:
+                event['rows'], event['features'] = df_dataset.shape
+
+        print(' ', df_dataset.shape[0], 'entries loaded.') if is_verbose(_print) else 0
+
+        return cls(df_dataset)
+
+    @verbose_option
+    def append(self, df_new):
+        '''
+        Appending new entries, without rebuilding the dataset.
+
+        Only the new chemical formulas are checked and parsed,
+        their composition is appended to the composition store,
+        and the duplicate map, the categories (n-e-c) and the highest entry of each category
+        are updated for the new entries only.
+        The cost is that of the new entries, whatever the size of the dataset:
+        the new rows are kept apart, and joined to the data (or composition) when it is next read.
+
+        Parameters
+        ----------
+        df_new : DataFrame
+            New entries, in the format of the dataset (same columns).
+
+        Returns
+        -------
+        self : data_set
+
+        '''
+
+        print('\n  appending', df_new.shape[0], 'entries ...') if is_verbose(_print) else 0
+
+        with instrument.span('data_set.append', rows=df_new.shape[0]):
+            self._data.append(df_new)
+
+            # only the chemical formulas not yet in the composition store
+            store = self.chemical_formulas.composition
+            new_formulas = [cf for cf in df_new.index.unique() if cf not in store]
+            new_composition = self.chemical_formulas.extend(new_formulas)
+
+            if self._categories is not None:
+                self._categories.extend(new_composition)
+                self._categories.add_entries(df_new.iloc[:, 0])
+
+        print('  Done.') if is_verbose(_print) else 0
+
+        return self
+
+    @verbose_option
+    def update(self, df_changed):
+        '''
+        Replacing the entries of the chemical formulas in df_changed by the rows of df_changed
+        (chemical formulas not in the dataset are appended).
+
+        Only the categories of the changed chemical formulas are re-evaluated.
+
+        Parameters
+        ----------
+        df_changed : DataFrame
+            Entries, in the format of the dataset (same columns).
+
+        Returns
+        -------
+        self : data_set
+
+        '''
+
+        replaced = self.data.index.isin(df_changed.index)
+        if not replaced.any():
+            return self.append(df_changed)
+
+        print('\n  updating', df_changed.shape[0], 'entries ...') if is_verbose(_print) else 0
+
+        with instrument.span('data_set.update', rows=df_changed.shape[0]):
+            ds_removed = self.data.iloc[:, 0][replaced]
+            self.data = self.data.loc[~replaced, :]
+            if self._categories is not None:
+                self._categories.remove_entries(ds_removed)
+
+        return self.append(df_changed)
+
+    @property
+    def duplicates(self):
+        '''
+        Chemical formulas having more than one entry, with their number of entries.
+
+        '''
+
+        return {cf: n for cf, n in self._get_categories().count.items() if n > 1}
+
+    def _get_categories(self):
+        if self._categories is None:
+            self._categories = categories(self.chemical_formulas.composition.df)
+            self._categories.add_entries(self.data.iloc[:, 0])
+        return self._categories
+
+    def composition_keys(self, decimals=3):
+        '''
+        Canonical composition key of each entry (see composition.keys),
+        <NA> for the chemical formulas in improper format.
+
+        Returns
+        -------
+        ds_key : Series
+            UInt64, same index as the dataset.
+
+        '''
+
+        ds_key = self.chemical_formulas.composition.keys(decimals)
+        ds_key = ds_key[~ds_key.index.duplicated()]
+        position = ds_key.index.get_indexer(self.data.index)
+        keys = pd.array(ds_key.to_numpy()[position], dtype='UInt64')
+        keys[position < 0] = pd.NA
+        return pd.Series(keys, index=self.data.index, name='composition_key')
+
+    @verbose_option
+    @instrument.stage('data_set.merge')
+    def merge(self, other, how='inner', decimals=3, suffixes=('', '_other')):
+        '''
+        Joining the entries of another dataset having the same composition,
+        whatever the order of the elements and the way the contents are written
+        (equal elemental fractions at the precision of decimals, see composition.keys).
+
+        A hash join on the canonical composition keys, linear in the number of entries.
+
+        Parameters
+        ----------
+        other : data_set
+            e.g. data_set(df_formation_energy).
+        how : str, optional
+            'inner' or 'left' (keep the entries of this dataset without a match).
+            The default is 'inner'.
+        decimals : int, optional
+            Precision of the elemental fractions. The default is 3.
+        suffixes : tuple, optional
+            Suffixes of the column names found in both datasets. The default is ('', '_other').
+
+        Returns
+        -------
+        df_merged : DataFrame
+            The chemical formulas of this dataset as index, its columns,
+            then the columns of other and 'formula_other' (the chemical formula in other).
+            An entry matching several entries of other appears once per match.
+
+        '''
+
+        if how not in ('inner', 'left'):
+            raise ValueError("how should be 'inner' or 'left'.")
+
+        print('\n  merging datasets by composition ...') if is_verbose(_print) else 0
+
+        key = '_composition_key'
+
+        df_left = self.data.assign(**{key: self.composition_keys(decimals).to_numpy()})
+        df_left = df_left.rename_axis('_formula').reset_index()
+
+        df_right = other.data.assign(**{key: other.composition_keys(decimals).to_numpy()})
+        df_right = df_right.loc[df_right[key].notna(), :]
+        df_right = df_right.rename_axis('formula' + suffixes[1]).reset_index()
+
+        if how == 'inner':
+            df_left = df_left.loc[df_left[key].notna(), :]
+
+        df_merged = df_left.merge(df_right, on=key, how=how, suffixes=suffixes, sort=False)
+        df_merged = df_merged.drop(columns=key).set_index('_formula').rename_axis(self.data.index.name)
+        df_merged['formula' + suffixes[1]] = df_merged.pop('formula' + suffixes[1])
+
+        print(' ', df_merged.shape[0], 'entries merged.') if is_verbose(_print) else 0
+        print('  Done.') if is_verbose(_print) else 0
+
+        return df_merged
+
+    @verbose_option
+    @instrument.stage('data_set.delete_duplicates')
+    def delete_duplicates(self):
+        '''
+        Delete duplicate entries in dataset.
+
+        If two or more entries have the same chemical formula
+        but different property values, keep the entry having greater value (of the first column).
+
+        Returns
+        -------
+        df_deduped_dataset : DataFrame
+            deduped subset.
+
+        '''
+
+        print('\n  deleting duplicate entries in dataset ...') if is_verbose(_print) else 0
+
+        # sort the dataset by the values of columns (first column at the end),
+        # on a sorted copy, the caller's DataFrame is left as it is.
+        df_sorted = self.data
+        for col_name in list(self.data)[::-1]:
+            df_sorted = df_sorted.sort_values(by=col_name)
+
+        deduped_dataset = {}
+        for i, cf in enumerate(list(df_sorted.index)):
+            deduped_dataset[cf] = df_sorted.loc[cf]
+            progressbar(i + 1, df_sorted.shape[0]) if is_verbose(_print) else 0
+
+        print('  original:', i + 1, '| deduped:', len(deduped_dataset)) if is_verbose(_print) else 0
+
+        df_deduped_dataset = pd.DataFrame.from_dict(deduped_dataset, orient='index')
+        # df_deduped_dataset.sort_index(ascending=True, inplace=True)
+        df_deduped_dataset = df_deduped_dataset.sort_values(
+            by=list(df_deduped_dataset)[0],
+            ascending=False
+        )
+
+        print('  Done.') if is_verbose(_print) else 0
+
+        return df_deduped_dataset
+
+    @verbose_option
+    @instrument.stage('data_set.near_duplicate_groups')
+    def near_duplicate_groups(self, tolerance=0.01):
+        '''
+        Grouping entries whose compositions are the same within a tolerance,
+        e.g. 'Nb3Sn1', 'Sn1Nb3' and 'Nb75Sn25'.
+
+        Compositions are normalized to elemental fractions (rounded to 12 decimals),
+        then put into the cells of a grid (cell width 8 * tolerance, 0 at the centre of a cell).
+        Entries are visited in descending order of the first column;
+        each one joins the group of the nearest group leader
+        whose elemental fractions differ by no more than tolerance, or else leads a new group.
+        The leaders are looked up in the cell of the entry and, along the elements
+        whose fraction is within tolerance of a cell edge, in the adjacent cells,
+        so no leader within tolerance is missed, whatever side of an edge it falls on.
+
+        What tolerance guarantees:
+            every entry of a group is within tolerance (+ 1e-9, for float rounding) of its leader,
+            the entry having the greatest value, in every elemental fraction;
+            an entry leads a new group only if no earlier leader is within tolerance.
+        Members of a group may differ by up to 2 * tolerance,
+        and doping series are not chained into one group.
+
+        Parameters
+        ----------
+        tolerance : float, optional
+            Maximum difference of elemental fractions. The default is 0.01.
+
+        Returns
+        -------
+        ds_group : Series
+            Group id of each entry of the dataset (same index as the dataset).
+            Entries with a chemical formula in improper format are groups of their own.
+
+        '''
+
+        print('\n  finding near-duplicate entries in dataset ...') if is_verbose(_print) else 0
+
+        df_composition = self.chemical_formulas.composition.df
+        df_composition = df_composition.loc[~df_composition.index.duplicated(), :]
+        fractions = np.round(self.chemical_formulas.composition.fractions(df_composition), 12)
+        n = fractions.shape[0]
+
+        # visiting order: descending (greatest) value of the first column
+        ds_value = self.data.iloc[:, 0].groupby(level=0).max()
+        value = ds_value.reindex(df_composition.index).to_numpy(dtype='float64', na_value=np.nan)
+        order = np.argsort(-np.nan_to_num(value, nan=-np.inf), kind='stable')
+
+        width = 8 * tolerance
+        slack = 1e-9
+        shifted = fractions / width + 0.5
+        cells = np.floor(shifted)
+        position = shifted - cells  # in the cell, in [0, 1)
+        margin = (tolerance + slack) / width
+        near_lower, near_upper = position < margin, position > 1 - margin
+
+        # row hash of the cell coordinates, modulo 2**64 (collisions are removed by the comparison below)
+        multipliers = np.random.default_rng(0).integers(1, 2**62, fractions.shape[1]).astype('uint64')
+        keys = (cells.astype('uint64') @ multipliers).tolist()
+        multipliers = multipliers.tolist()
+
+        groups = np.empty(n, dtype='int64')
+        leaders = {}  # cell -> leaders
+        for i in order:
+            cells_i = [keys[i]]
+            for d in np.flatnonzero(near_lower[i]):
+                cells_i += [(k - multipliers[d]) % 2**64 for k in cells_i]
+            for d in np.flatnonzero(near_upper[i]):
+                cells_i += [(k + multipliers[d]) % 2**64 for k in cells_i]
+            candidates = [j for k in cells_i for j in leaders.get(k, ())]
+            leader = -1
+            if candidates:
+                candidates = np.asarray(candidates, dtype='int64')
+                distance = np.abs(fractions[candidates] - fractions[i]).max(axis=1)
+                nearest = np.argmin(distance)
+                if distance[nearest] <= tolerance + slack:
+                    leader = candidates[nearest]
+            if leader < 0:
+                leader = i
+                leaders.setdefault(keys[i], []).append(i)
+            groups[i] = groups[leader] if leader != i else i
+
+        # entries of the dataset -> groups
+        position = df_composition.index.get_indexer(self.data.index)
+        group_of_entry = np.where(position >= 0, groups[position], -1)
+        improper = group_of_entry < 0
+        group_of_entry[improper] = n + np.arange(improper.sum())
+        _, group_of_entry = np.unique(group_of_entry, return_inverse=True)
+
+        ds_group = pd.Series(group_of_entry, index=self.data.index, name='group_id')
+
+        print('  entries:', len(ds_group), '| groups:', ds_group.nunique()) if is_verbose(_print) else 0
+        print('  Done.') if is_verbose(_print) else 0
+
+        return ds_group
+
+    @verbose_option
+    def delete_near_duplicates(self, tolerance=0.01, policy='max'):
+        '''
+        Merging near-duplicate entries (see near_duplicate_groups).
+
+        Parameters
+        ----------
+        tolerance : float, optional
+            Maximum difference of elemental fractions. The default is 0.01.
+        policy : str, optional
+            'max' : keep the entry having the greatest value (of the first column) in each group,
+            'mean' : one entry per group, numeric columns averaged,
+                     indexed by the chemical formula of the greatest value,
+            'group' : keep all entries, with a 'group_id' column added.
+            The default is 'max'.
+
+        Returns
+        -------
+        df_deduped_dataset : DataFrame
+            deduped dataset, in descending order of the first column.
+
+        '''
+
+        ds_group = self.near_duplicate_groups(tolerance=tolerance)
+        df = self.data.reset_index()
+        df.index = np.arange(len(df))
+        target = list(self.data)[0]
+        group = ds_group.to_numpy()
+
+        if policy == 'group':
+            df_deduped_dataset = self.data.assign(group_id=group)
+            return df_deduped_dataset.sort_values(by=['group_id', target], ascending=[True, False])
+
+        # the entry having the greatest value in each group
+        best = df.assign(_group=group).sort_values(by=target, ascending=False, kind='stable')
+        best = best.drop_duplicates('_group').sort_values(by='_group')
+
+        if policy == 'max':
+            df_deduped_dataset = self.data.iloc[best.index.to_numpy(), :]
+        elif policy == 'mean':
+            df_deduped_dataset = self.data.groupby(group).agg(
+                {c: 'mean' if pd.api.types.is_numeric_dtype(self.data[c]) else 'first' for c in self.data}
+            )
+            df_deduped_dataset.index = self.data.index[best.index.to_numpy()]
+        else:
+            raise ValueError('unknown policy: ' + str(policy))
+
+        return df_deduped_dataset.sort_values(by=target, ascending=False)
+
+    @verbose_option
+    @instrument.stage('data_set.categorization_by_composition')
+    def categorization_by_composition(self):
+        '''
+        Categorizing the chemical formulas, according to (n-e-c).
+            n : 'number_of_elements',
+            e : 'element',
+            c : 'elemental_contents'
+
+        Returns
+        -------
+        dict_category : dict
+            Dict of category.
+
+        '''
+
+        print('\n  categorizing chemical formulas ...') if is_verbose(_print) else 0
+
+        dict_category = self._get_categories().members
+
+        print('  Done.') if is_verbose(_print) else 0
+
+        return dict_category
+
+    @verbose_option
+    @instrument.stage('data_set.subset')
+    def subset(self):
+        '''
+        Extracting subset.
+        For each category, pick one entry having the highest value of material property.
+
+        Returns
+        -------
+        df_subset : DataFrame
+            df_subset.
+
+        '''
+
+        self.categorization_by_composition()
+
+        print('\n  extracting subset ...') if is_verbose(_print) else 0
+
+        # sometimes there are multiple highest ones
+        highest_entries = set().union(*self._categories.highest.values())
+
+        df_subset = self.data.loc[self.data.index.isin(highest_entries), :]
+
+        df_subset = df_subset.sort_values(by=list(df_subset)[0], ascending=False)
+
+        print('  Done.') if is_verbose(_print) else 0
+
+        return df_subset
+
+    def select(self, contains=None, exactly=None, within=None, excludes=None, number_of_elements=None):
+        '''
+        Selecting entries by chemical system, through the element index of the composition.
+
+        Parameters
+        ----------
+        contains : list, optional
+            Elements that must all be present, e.g. ['Cu', 'O'].
+        exactly : list, optional
+            The exact set of elements, e.g. ['Sr', 'Cu', 'O'].
+        within : list, optional
+            The chemical system, no element outside it, e.g. ['La', 'Sr', 'Cu', 'O'].
+        excludes : list, optional
+            Elements that must be absent.
+        number_of_elements : int, optional
+            Number of elements.
+
+        Returns
+        -------
+        df_selected : DataFrame
+            Entries of the dataset, e.g. for data_set(df_selected).subset().
+
+        '''
+
+        ids = self.chemical_formulas.composition.element_index.select(
+            contains=contains,
+            exactly=exactly,
+            within=within,
+            excludes=excludes,
+            number_of_elements=number_of_elements
+        )
+        formulas = self.chemical_formulas.composition.df.index[ids]
+
+        return self.data.loc[self.data.index.isin(formulas), :]
+
+
+class chemical_formulas:
+
+    def __init__(self, dataset: object):
+        self._data = _pieces(dataset.index, _concat_indexes)
+        is_proper, contents, is_alloy = parse_chemical_formulas(self.data)
+        self._in_proper_format = _pieces(self.check_format(is_proper), _concat_indexes)
+        self.composition = composition.from_contents(
+            self.data[is_proper], contents[is_proper], is_alloy[is_proper]
+        )
+
+    @property
+    def data(self):
+        return self._data.get()
+
+    @property
+    def in_proper_format(self):
+        return self._in_proper_format.get()
+
+    def extend(self, new_formulas):
+        '''
+        Checking and parsing new chemical formulas,
+        and appending them to the composition store.
+
+        Returns
+        -------
+        df_new_composition : DataFrame
+            composition of the new chemical formulas in proper format.
+
+        '''
+
+        new = chemical_formulas(pd.DataFrame(index=pd.Index(new_formulas)))
+
+        self._data.append(new.data)
+        self._in_proper_format.append(new.in_proper_format)
+
+        return self.composition.extend(new.composition)
+
+    @instrument.stage('chemical_formulas.check_format')
+    def check_format(self, is_proper=None):
+        '''
+        Checking the format of the chemical formulas.
+
+        The format is supposed to be like 'H2O1' or 'C60',
+        whereas 'H2O' or 'C' or 'La2Cu1O4-x' is NOT ok.
+
+        Do NOT use brakets.
+
+        Parameters
+        ----------
+        is_proper : ndarray, optional
+            The check already done by parse_chemical_formulas. The default is None.
+
+        Returns
+        -------
+        chemical_formulas_in_proper_format : Index
+            Chemical formulas in proper format.
+
+        '''
+
+        print('\n  checking format of chemical formulas ...') if is_verbose(_print) else 0
+
+        instrument.count('chemical_formulas.checked', len(self.data))
+
+        if is_proper is None:
+            is_proper = parse_chemical_formulas(self.data)[0]
+
+        # messages for the chemical formulas not in proper format only
+        for i in np.flatnonzero(~is_proper):
+            cf = self.data[i]
+            if pd.isnull(cf):
+                print('  chemical formula No.', i + 1, 'is null ...') if is_verbose(_print) else 0
+            else:
+                print('\n  chemical formula seems not right :', cf) if is_verbose(_print) else 0
+
+        chemical_formulas_in_proper_format = self.data[is_proper]
+
+        print('  ' + str(len(self.data) - len(chemical_formulas_in_proper_format)),
+              'chemical formulas seem not right.') if is_verbose(_print) else 0
+
+        print('  Done.') if is_verbose(_print) else 0
+
+        return chemical_formulas_in_proper_format
+
+
+class composition:
+
+    def __init__(self, chemical_formulas: list):
+        df_composition, self.alloys = self._from_formulas(pd.Index(chemical_formulas))
+        self._df = _pieces(df_composition, _concat_frames)  # grown by extend
+        self._dict = None
+        self._positions = None
+        self._element_index = None
+
+    @classmethod
+    def from_contents(cls, chemical_formulas, contents, is_alloy):
+        '''
+        The composition store of chemical formulas already parsed (see parse_chemical_formulas).
+
+        '''
+
+        chemical_formulas = pd.Index(chemical_formulas)
+        new = cls.__new__(cls)
+        new._df = _pieces(cls._frame(chemical_formulas, contents), _concat_frames)
+        new.alloys = list(chemical_formulas[is_alloy])
+        new._dict = None
+        new._positions = None
+        new._element_index = None
+        instrument.count('composition.rows', len(chemical_formulas))
+        return new
+
+    @property
+    def df(self):
+        '''
+        Chemical formulas as index, elements as columns, nan if absent.
+
+        '''
+
+        return self._df.get()
+
+    def _get_positions(self):
+        # chemical formula -> row of its first entry in df (built on first use, then kept up to date by extend)
+        if self._positions is None:
+            index = self.df.index
+            self._positions = dict(zip(index[::-1], range(len(index) - 1, -1, -1)))
+        return self._positions
+
+    def __contains__(self, chemical_formula):
+        return chemical_formula in self._get_positions()
+
+    @staticmethod
+    def _frame(chemical_formulas, contents):
+        # chemical formulas as index, elements as columns, nan if absent.
+        contents[contents == 0] = np.nan
+        return pd.DataFrame(contents, index=chemical_formulas, columns=element_list, copy=False)
+
+    @property
+    def dict(self):
+        '''
+        Chemical formulas as keys, {element: content} as values (built on first use).
+
+        '''
+
+        if self._dict is None:
+            df_composition = self.df.loc[~self.df.index.duplicated(), :]
+            self._dict = df_composition.fillna(0).to_dict(orient='index')
+        return self._dict
+
+    @property
+    def data(self):
+        return {'dict': self.dict, 'DataFrame': self.df, 'alloys': self.alloys}
+
+    @property
+    def element_index(self):
+        '''
+        Inverted index from element to chemical formulas (built on first use).
+
+        '''
+
+        if self._element_index is None:
+            self._element_index = element_index(self.df)
+        return self._element_index
+
+    def extend(self, chemical_formulas):
+        '''
+        Appending chemical formulas (in proper format, or a composition) to the composition store.
+
+        Returns
+        -------
+        df_new_composition : DataFrame
+            composition of the new chemical formulas.
+
+        '''
+
+        new = chemical_formulas if isinstance(chemical_formulas, composition) else composition(chemical_formulas)
+        df_new = new.df
+
+        # the lookups built so far are updated with the new rows only
+        offset = len(self._df)
+        if self._positions is not None:
+            for i, cf in enumerate(df_new.index):
+                self._positions.setdefault(cf, offset + i)
+        if self._dict is not None:
+            df_first = df_new.loc[~df_new.index.duplicated(), :]
+            for cf, row in df_first.fillna(0).to_dict(orient='index').items():
+                self._dict.setdefault(cf, row)
+        if self._element_index is not None:
+            self._element_index.extend(df_new)
+
+        self._df.append(df_new)
+        self.alloys += new.alloys
+
+        return df_new
+
+    def save(self, path, format=None):
+        '''
+        Save the composition DataFrame in a binary columnar format
+        ('parquet', 'arrow' or 'npy', see pytmge.core.data_io).
+        Load it back with pytmge.core.load_matrix.
+
+        '''
+
+        return save_matrix(self.df, path, format=format)
+
+    def fractions(self, df_composition=None):
+        '''
+        Elemental fractions (contents normalized to a sum of 1), 0 if absent.
+
+        Parameters
+        ----------
+        df_composition : DataFrame, optional
+            The default is None (self.df).
+
+        Returns
+        -------
+        fractions : ndarray
+            chemical formulas x elements.
+
+        '''
+
+        if df_composition is None:
+            df_composition = self.df
+        contents = df_composition.to_numpy(dtype='float64', na_value=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fractions = contents / contents.sum(axis=1, keepdims=True)
+        return np.nan_to_num(fractions)
+
+    def keys(self, decimals=3, df_composition=None):
+        '''
+        Canonical composition keys.
+
+        The elemental fractions (in the fixed order of element_list, so the order of
+        the elements in a chemical formula does not matter) are rounded to decimals,
+        and each row is hashed to one 64-bit integer,
+        e.g. 'Nb3Sn1', 'Sn1Nb3' and 'Nb75Sn25' have the same key.
+
+        Parameters
+        ----------
+        decimals : int, optional
+            Precision of the elemental fractions. The default is 3.
+        df_composition : DataFrame, optional
+            The default is None (self.df).
+
+        Returns
+        -------
+        ds_key : Series
+            uint64 key of each chemical formula (same index as df_composition).
+
+        '''
+
+        if df_composition is None:
+            df_composition = self.df
+        rounded = np.rint(self.fractions(df_composition) * 10 ** decimals).astype('int64')
+        keys = pd.util.hash_pandas_object(pd.DataFrame(rounded, copy=False), index=False).to_numpy()
+        return pd.Series(keys, index=df_composition.index, name='composition_key')
+
+    def composition(self):
+        '''
+        Composition of the chemical formulas
+        (extracted in bulk by parse_chemical_formulas).
+
+        If the cf is an alloy, the sum of contents is close to 100, then normalize to 1.
+
+        Returns
+        -------
+        dict_composition : dict
+            Chemical formulas as keys, {element: content} as values.
+
+        df_composition : DataFrame
+            Chemical formulas as index, elements as columns.
+
+        alloys : list
+            A list of alloys, the contents of which were divided by 100.
+        '''
+
+        return {'dict': self.dict, 'DataFrame': self.df, 'alloys': self.alloys}
+
+    @staticmethod
+    @instrument.stage('composition.composition')
+    def _from_formulas(chemical_formulas):
+        print('\n  extracting composition of chemical formulas ...') if is_verbose(_print) else 0
+
+        instrument.count('composition.rows', len(chemical_formulas))
+
+        _, contents, is_alloy = parse_chemical_formulas(chemical_formulas)
+        df_composition = composition._frame(chemical_formulas, contents)
+        alloys = list(chemical_formulas[is_alloy])
+
+        print('  Done.') if is_verbose(_print) else 0
+
+        return df_composition, alloys
+
+
+class categories:
+    '''
+    Categories (n-e-c) of chemical formulas and the highest entries of each category,
+    kept up to date entry by entry.
+        n : 'number_of_elements',
+        e : 'element',
+        c : 'elemental_contents'
+    (elements of content < 0.5 are ignored, contents are rounded to integers.)
+
+    '''
+
+    def __init__(self, df_composition):
+        self.labels = {}    # chemical formula -> its category labels
+        self.members = {}   # category label -> chemical formulas
+        self.count = {}     # chemical formula -> number of entries
+        self.value = {}     # chemical formula -> highest value of its entries
+        self.maximum = {}   # category label -> highest value
+        self.highest = {}   # category label -> chemical formulas having the highest value
+        self.extend(df_composition)
+
+    def extend(self, df_composition):
+        '''
+        Labeling new chemical formulas.
+
+        '''
+
+        is_new = np.fromiter((cf not in self.labels for cf in df_composition.index), dtype=bool, count=len(df_composition))
+        df_composition = df_composition.loc[~df_composition.index.duplicated() & is_new, :]
+        elements = np.asarray(df_composition.columns)
+        x = df_composition.to_numpy(dtype='float64', na_value=0)
+
+        is_counted = x >= 0.5
+        number_of_elements = is_counted.sum(axis=1)
+        contents = np.floor(x + 0.5).astype('int64')
+
+        rows, cols = np.nonzero(is_counted)
+        labels = [
+            str(n) + '-' + e + '-' + str(c)
+            for n, e, c in zip(number_of_elements[rows], elements[cols], contents[rows, cols])
+        ]
+
+        cfs = list(df_composition.index)
+        for cf in cfs:
+            self.labels[cf] = []
+        for r, label in zip(rows, labels):
+            self.labels[cfs[r]].append(label)
+            self.members.setdefault(label, []).append(cfs[r])
+
+        return self
+
+    def add_entries(self, ds_values):
+        '''
+        Counting new entries and updating the highest entries of their categories.
+
+        '''
+
+        for cf, v in ds_values.items():
+            self.count[cf] = self.count.get(cf, 0) + 1
+            if np.isnan(v):
+                continue
+            if cf not in self.value or v > self.value[cf]:
+                self.value[cf] = v
+            v = self.value[cf]
+            for label in self.labels.get(cf, ()):
+                m = self.maximum.get(label, -np.inf)
+                if v > m:
+                    self.maximum[label] = v
+                    self.highest[label] = {cf}
+                elif v == m:
+                    self.highest[label].add(cf)
+        return self
+
+    def remove_entries(self, ds_values):
+        '''
+        Removing all entries of the chemical formulas in ds_values,
+        and re-evaluating their categories.
+
+        '''
+
+        removed = set(ds_values.index)
+        affected = set()
+        for cf in removed:
+            self.count.pop(cf, None)
+            self.value.pop(cf, None)
+            affected.update(self.labels.get(cf, ()))
+
+        for label in affected:
+            values = [(self.value[cf], cf) for cf in self.members[label] if cf in self.value]
+            self.maximum.pop(label, None)
+            self.highest.pop(label, None)
+            if values:
+                m = max(v for v, cf in values)
+                self.maximum[label] = m
+                self.highest[label] = {cf for v, cf in values if v == m}
+        return self
+
+
+class element_index:
+    '''
+    Inverted index of a composition DataFrame:
+        element -> sorted row positions of the chemical formulas containing it,
+        number of elements -> sorted row positions.
+
+    Queries are intersections and unions of sorted id arrays,
+    they return row positions in df_composition (use .iloc, or composition.df.index[ids]).
+
+    Examples
+    --------
+    >>> index = dataset.chemical_formulas.composition.element_index
+    >>> ids = index.contains_all(['Cu', 'O', 'Sr'])
+    >>> df_features = feature_design.get_features(composition.df.iloc[ids])
+
+    '''
+
+    def __init__(self, df_composition):
+        '''
+        df_composition : DataFrame
+            Chemical formulas as index, elements as columns, empty (or 0) if absent.
+
+        '''
+
+        self.elements = list(df_composition.columns)
+        # grown by extend, each array is joined when next queried
+        self._formulas = _pieces(df_composition.index[:0], _concat_indexes)
+        self._element_postings = {e: _pieces(np.empty(0, dtype='int64'), np.concatenate) for e in self.elements}
+        self._number_of_elements = _pieces(np.empty(0, dtype='int64'), np.concatenate)
+        self._buckets = {}
+
+        self.extend(df_composition)
+
+    @property
+    def formulas(self):
+        return self._formulas.get()
+
+    @property
+    def postings(self):
+        return {e: p.get() for e, p in self._element_postings.items()}
+
+    @property
+    def number_of_elements(self):
+        return self._number_of_elements.get()
+
+    @property
+    def buckets(self):
+        return {n: b.get() for n, b in self._buckets.items()}
+
+    def extend(self, df_composition):
+        '''
+        Appending the rows of df_composition (same columns) to the index.
+
+        '''
+
+        offset = len(self._formulas)
+        self._formulas.append(df_composition.index)
+
+        contents = df_composition.loc[:, self.elements].to_numpy(dtype='float64', na_value=0)
+        rows, cols = np.nonzero(contents)  # rows are sorted within each column after a stable sort by column
+        order = np.argsort(cols, kind='stable')
+        rows, cols = rows[order] + offset, cols[order]
+        bounds = np.searchsorted(cols, np.arange(len(self.elements) + 1))
+
+        for i, e in enumerate(self.elements):
+            if bounds[i + 1] > bounds[i]:
+                self._element_postings[e].append(rows[bounds[i]:bounds[i + 1]])
+
+        number_of_elements = np.bincount(rows - offset, minlength=len(df_composition))
+        self._number_of_elements.append(number_of_elements)
+        for n in np.unique(number_of_elements):
+            ids = offset + np.flatnonzero(number_of_elements == n)
+            self._buckets.setdefault(n, _pieces(np.empty(0, dtype='int64'), np.concatenate)).append(ids)
+
+        return self
+
+    def _postings(self, elements):
+        for e in elements:
+            if e not in self._element_postings:
+                raise KeyError('unknown element: ' + str(e))
+        return [self._element_postings[e].get() for e in elements]
+
+    def contains_all(self, elements):
+        '''
+        Chemical formulas containing all of the elements.
+
+        '''
+
+        postings = sorted(self._postings(elements), key=len)
+        if not postings:
+            return np.arange(len(self._formulas))
+        ids = postings[0]
+        for p in postings[1:]:
+            ids = np.intersect1d(ids, p, assume_unique=True)
+        return ids
+
+    def contains_any(self, elements):
+        '''
+        Chemical formulas containing any of the elements.
+
+        '''
+
+        postings = self._postings(elements)
+        if not postings:
+            return np.empty(0, dtype='int64')
+        return np.unique(np.concatenate(postings))
+
+    def with_number_of_elements(self, n):
+        if n not in self._buckets:
+            return np.empty(0, dtype='int64')
+        return self._buckets[n].get()
+
+    def exactly(self, elements):
+        '''
+        Chemical formulas consisting of exactly these elements.
+
+        '''
+
+        elements = set(elements)
+        return np.intersect1d(
+            self.contains_all(elements),
+            self.with_number_of_elements(len(elements)),
+            assume_unique=True
+        )
+
+    def within(self, system):
+        '''
+        Chemical formulas within the chemical system (no element outside it).
+
+        '''
+
+        postings = self._postings(set(system))
+        if not postings:
+            return np.empty(0, dtype='int64')
+        counts = np.bincount(np.concatenate(postings), minlength=len(self._formulas))
+        return np.flatnonzero((counts == self.number_of_elements) & (counts > 0))
+
+    def select(self, contains=None, exactly=None, within=None, excludes=None, number_of_elements=None):
+        '''
+        Intersection of the given conditions (see data_set.select).
+
+        Returns
+        -------
+        ids : ndarray
+            Sorted row positions in df_composition.
+
+        '''
+
+        ids = np.arange(len(self._formulas))
+        if contains is not None:
+            ids = np.intersect1d(ids, self.contains_all(contains), assume_unique=True)
+        if exactly is not None:
+            ids = np.intersect1d(ids, self.exactly(exactly), assume_unique=True)
+        if within is not None:
+            ids = np.intersect1d(ids, self.within(within), assume_unique=True)
+        if number_of_elements is not None:
+            ids = np.intersect1d(ids, self.with_number_of_elements(number_of_elements), assume_unique=True)
+        if excludes is not None:
+            ids = np.setdiff1d(ids, self.contains_any(excludes), assume_unique=True)
+        return ids
@@ -0,0 +1,247 @@
+# coding: utf-8
+# Copyright (c) pytmge Development Team.
+
+"""
+scikit-learn transformers on top of feature_design and feature_engineering.
+    feature_cache
+    CompositionFeaturizer
+    PearsonSelector
+
+Needs scikit-learn.
+
+Grid searches clone the estimators for every fold and parameter set,
+a feature_cache given as parameter is shared by all the clones (it is not copied),
+so the features of a chemical formula are calculated once,
+and the correlation matrix and the elimination path of a training fold once for all thresholds.
+
+Examples
+--------
+>>> from sklearn.pipeline import make_pipeline
+>>> from sklearn.model_selection import GridSearchCV
+>>> cache = feature_cache()
+>>> model = make_pipeline(
+...     CompositionFeaturizer(cache=cache),
+...     PearsonSelector(cache=cache),
+...     RandomForestRegressor()
+... )
+>>> search = GridSearchCV(model, {'pearsonselector__threshold': [0.8, 0.85, 0.9, 0.95]}, cv=5)
+>>> search.fit(df_subset.index.to_numpy(), df_subset.iloc[:, 0])
+
+"""
+
+
+import threading
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+
+from pytmge.core import fingerprint, instrument
+from pytmge.core.crystal.data_preparation import chemical_formulas
+from pytmge.core.crystal.feature_design import feature_design, feature_scaler
+from pytmge.core.crystal.feature_engineering import feature_engineering
+
+
+__author__ = 'Yang LIU'
+__maintainer__ = 'Yang LIU'
+__email__ = 'l_young@live.cn'
+__version__ = '1.0'
+__date__ = '2022/3/18'
+
+
+class feature_cache:
+    '''
+    Features of chemical formulas, and elimination paths of feature matrices,
+    shared by the estimators (and all their clones) it is given to.
+
+    The sharing holds within one process (sequential fits, or threads):
+    process-based workers (e.g. GridSearchCV with n_jobs > 1 and the default loky backend)
+    receive pickled copies of the estimators, each with its own copy of the cache,
+    and what a worker calculates is not seen by the others (nor by the parent).
+    With such workers, fill the cache before fitting (get_features of all the chemical formulas),
+    the copies then start from the filled cache, or use the threading backend of joblib.
+
+    '''
+
+    def __init__(self):
+        self.features = {}  # attributes -> DataFrame of features, one row per chemical formula
+        self.paths = {}     # fingerprint -> (usable features, elimination path)
+        self._lock = threading.Lock()
+
+    def __deepcopy__(self, memo):
+        # sklearn.base.clone deep-copies the parameters, the cache has to stay shared.
+        return self
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self.features.clear()
+            self.paths.clear()
+        return
+
+    def get_features(self, formulas, attributes=None):
+        '''
+        Features of the chemical formulas (nan for those not in proper format),
+        calculating only those not in the cache.
+
+        The features are calculated outside the lock, so other threads are not kept waiting
+        (a chemical formula missed by two threads at once may be calculated twice, and is cached once).
+
+        '''
+
+        key = None if attributes is None else tuple(attributes)
+        formulas = pd.Index(formulas)
+
+        with self._lock:
+            df_cached = self.features.get(key)
+        if df_cached is None:
+            missing = formulas.unique()
+        else:
+            missing = formulas.unique().difference(df_cached.index, sort=False)
+
+        if len(missing):
+            instrument.count('feature_cache.misses', len(missing))
+            df_composition = chemical_formulas(pd.DataFrame(index=missing)).composition.df
+            df_new = feature_design.get_features(df_composition, attributes=attributes)
+            df_new = df_new.reindex(missing)  # nan rows for the chemical formulas not in proper format
+
+            with self._lock:
+                # the cache may have grown meanwhile, the chemical formulas added by other threads are kept as they are
+                df_cached = self.features.get(key)
+                if df_cached is None:
+                    df_cached = df_new
+                else:
+                    df_cached = pd.concat([df_cached, df_new.loc[~df_new.index.isin(df_cached.index), :]])
+                self.features[key] = df_cached
+
+        instrument.count('feature_cache.hits', len(formulas) - len(missing))
+
+        return df_cached.reindex(formulas)
+
+    def get_path(self, df_features, criterion='cv', ds_target=None):
+        '''
+        Usable features and elimination path (see feature_engineering.elimination_path)
+        of a feature matrix, computed once per matrix (and criterion).
+
+        '''
+
+        key = fingerprint(df_features, criterion, ds_target if criterion == 'target' else None)
+
+        with self._lock:
+            if key in self.paths:
+                return self.paths[key]
+
+        usable = list(df_features.columns[feature_scaler().fit(df_features).usable_])
+        df_usable_features = df_features.loc[:, usable]
+        df_path = feature_engineering.elimination_path(df_usable_features, criterion=criterion, ds_target=ds_target)
+
+        with self._lock:
+            self.paths[key] = (usable, df_path)
+        return usable, df_path
+
+
+def _get_cache(estimator):
+    if estimator.cache is not None:
+        return estimator.cache
+    if getattr(estimator, '_own_cache', None) is None:
+        estimator._own_cache = feature_cache()
+    return estimator._own_cache
+
+
+def _formulas(X):
+    # chemical formulas from a 1-D array-like, or the first column of a 2-D one.
+    if isinstance(X, pd.DataFrame):
+        X = X.iloc[:, 0]
+    X = np.asarray(X, dtype=object)
+    if X.ndim == 2:
+        X = X[:, 0]
+    return X
+
+
+class CompositionFeaturizer(TransformerMixin, BaseEstimator):
+    '''
+    Chemical formulas -> features (feature_design.get_features).
+
+    Parameters
+    ----------
+    attributes : list, optional
+        Names of elemental attributes. The default is None (all of them).
+    cache : feature_cache, optional
+        Shared cache of features. The default is None (a cache of this estimator only).
+
+    '''
+
+    def __init__(self, attributes=None, cache=None):
+        self.attributes = attributes
+        self.cache = cache
+
+    def fit(self, X, y=None):
+        self.n_features_in_ = 1
+        attributes, _ = feature_design.elemental_attributes(self.attributes)
+        self.feature_names_out_ = np.asarray(feature_design.feature_names(attributes), dtype=object)
+        return self
+
+    def transform(self, X):
+        '''
+        Returns
+        -------
+        df_features : DataFrame
+            chemical formulas as index, one row per chemical formula of X.
+
+        '''
+
+        df_features = _get_cache(self).get_features(_formulas(X), self.attributes)
+        return df_features
+
+    def get_feature_names_out(self, input_features=None):
+        return self.feature_names_out_
+
+
+class PearsonSelector(TransformerMixin, BaseEstimator):
+    '''
+    Usable features, then feature selection by Pearson correlation
+    (feature_engineering.feature_selection_by_Pearson_correlation).
+
+    Parameters
+    ----------
+    threshold : float, optional
+        The default is 0.9.
+    criterion : str, optional
+        'cv', 'std' or 'target'. The default is 'cv'.
+    cache : feature_cache, optional
+        Shared cache of elimination paths. The default is None (a cache of this estimator only).
+
+    '''
+
+    def __init__(self, threshold=0.9, criterion='cv', cache=None):
+        self.threshold = threshold
+        self.criterion = criterion
+        self.cache = cache
+
+    def fit(self, X, y=None):
+        if not isinstance(X, pd.DataFrame):
+            X = pd.DataFrame(X, columns=['x' + str(i) for i in range(np.shape(X)[1])])
+        ds_target = None if y is None else pd.Series(np.asarray(y), index=X.index)
+
+        usable, df_path = _get_cache(self).get_path(X, self.criterion, ds_target)
+
+        self.n_features_in_ = X.shape[1]
+        self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        self.selected_features_ = feature_engineering.selection_from_path(df_path, usable, self.threshold)
+        return self
+
+    def transform(self, X):
+        if isinstance(X, pd.DataFrame):
+            return X.loc[:, self.selected_features_]
+        position = {f: i for i, f in enumerate(self.feature_names_in_)}
+        return np.asarray(X)[:, [position[f] for f in self.selected_features_]]
+
+    def get_feature_names_out(self, input_features=None):
+        return np.asarray(self.selected_features_, dtype=object)
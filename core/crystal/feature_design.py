@@ -1,186 +1,505 @@
-# coding: utf-8
-# Copyright (c) pytmge Development Team.
-
-"""
-Extracting features based on electron orbital attributes.
-
-"""
-
-
-import os
-import shutil
-import warnings
-import numpy as np
-import pandas as pd
-from pathlib import Path
-
-from pytmge.core import elemental_data
-from pytmge.core import progressbar, _print
-
-
-__author__ = 'Yang LIU'
-__maintainer__ = 'Yang LIU'
-__email__ = 'l_young@live.cn'
-__version__ = '1.0'
-__date__ = '2022/3/18'
-
-
-class feature_design:
-    '''
-    Extracting features based on electron orbital attributes.
-
-    '''
-
-    def __init__(self):
-        self._elemental_attribute_format = '[attribute].[shell_selection].[math operator 1]'
-        self._feature_format = '[attribute].[shell_selection].[math operator 1].[math operator 2]'
-
-    @staticmethod
-    def delete_unusable_features(df_features):
-        '''
-        Delete the features having empty value(s)
-        and the features being of zero variance.
-
-        Parameters
-        ----------
-        df_features : DataFrame
-            features.
-
-        Returns
-        -------
-        df_usable_features : DataFrame
-            usable_features.
-
-        '''
-
-        print('deleting unusable features') if _print else 0
-
-        features_variance = np.var(df_features, axis=0)
-        df_usable_features = df_features.loc[:, features_variance != 0] * 1
-
-        na = list(df_usable_features.isna().any())
-        na = [False if i else True for i in na]
-        df_usable_features = df_usable_features.loc[:, na] * 1
-
-        # df_usable_features.to_csv(str(Path(__file__).absolute().parent) + '\\' + 'usable_feature_variables.csv')
-
-        print(df_usable_features.shape[0], 'entries', df_usable_features.shape[1], 'usable features') if _print else 0
-
-        return df_usable_features
-
-    @classmethod
-    def get_features(self, df_composition):
-        '''
-        Extracting features.
-
-        Parameters
-        ----------
-        df_composition : DataFrame
-            df_composition.
-
-        Returns
-        -------
-        df_features : DataFrame
-            features.
-
-        '''
-
-        print('\n  calculating features ...') if _print else 0
-
-        dict_oa = elemental_data().orbital_attributes_of_elements
-        df_orbital_attributes_of_elements = pd.DataFrame.from_dict(dict_oa, orient='index')
-
-        # # Lite edition
-        # _ea = df_orbital_attributes_of_elements.loc[
-        #     [
-        #         'E' in col_name
-        #         and 'range' in col_name
-        #         for col_name in list(df_orbital_attributes_of_elements.index)
-        #     ], :
-        # ]
-        # df_orbital_attributes_of_elements = _ea * 1
-        # #
-
-        print(df_orbital_attributes_of_elements.shape[0], 'attributes,', df_composition.shape[0], 'entries.')
-
-        cache_path = str(Path(__file__).absolute().parent) + '\\' + '_cache\\'
-        if os.path.exists(cache_path):
-            shutil.rmtree(cache_path)
-        os.makedirs(cache_path)
-
-        chemical_formula_list = list(df_composition.index)
-        elements_existence = (df_composition.notnull() * 1).replace(0, np.nan)
-
-        math_operators = {
-            'sum': 'sum(x)',
-            'avg': 'sum(x)/N',
-            'wavg': 'sum(w*x)/sum(w)',
-            'max': 'max(x)',
-            'min': 'min(x)',
-            'range': 'max(x)-min(x)',
-            'std': '(sum((x-wavg)**2)/N)**(1/2)'
-        }
-
-        warnings.filterwarnings('ignore')
-
-        i = 0
-        for a in list(df_orbital_attributes_of_elements.index):
-
-            ea = df_orbital_attributes_of_elements.loc[a, :] * 1
-            features = {}
-            for o in math_operators.keys():
-                features[a + '.' + o] = {}
-            if ea.notnull().sum() == 0:
-                # when all atomic_attribute values are nan, their feature_variables should be nan, too.
-                for o in math_operators.keys():
-                    for cf in chemical_formula_list:
-                        features[a + '.' + o][cf] = np.nan
-            else:
-                for cf in chemical_formula_list:
-                    v = ea * elements_existence.loc[cf]
-                    w = df_composition.loc[cf]  # weightings
-                    wea = v * w
-
-                    # compound_wavg is nan if this atomic_attribute are_empty for all elements.
-                    # compound_wavg = [np.nansum(wea) / w.sum(), np.nan][wea.notnull().sum() == 0]
-                    compound_wavg = np.nansum(wea) / w.sum() if wea.notnull().sum() else np.nan
-
-                    # compound_sum is nan if this atomic_attribute are_empty for all elements.
-                    # compound_sum = [np.nansum(v), np.nan][v.notnull().sum() == 0]
-                    compound_sum = np.nansum(v) if v.notnull().sum() else np.nan
-
-                    features[a + '.max'][cf] = np.nanmax(v)
-                    features[a + '.min'][cf] = np.nanmin(v)
-                    features[a + '.range'][cf] = np.nanmax(v) - np.nanmin(v)
-                    features[a + '.std'][cf] = np.nanstd(v)
-                    features[a + '.avg'][cf] = np.nanmean(v)
-                    features[a + '.wavg'][cf] = compound_wavg
-                    features[a + '.sum'][cf] = compound_sum
-
-                    i += 1
-                    progressbar(i, df_composition.shape[0] * df_orbital_attributes_of_elements.shape[0]) if _print else 0
-
-            _df_features = pd.DataFrame.from_dict(features, orient='columns', dtype='float64')
-            _df_features.to_csv(cache_path + 'feature_variables [' + a + '._].csv', float_format='%8f')
-
-        warnings.resetwarnings
-
-        # reload features
-        df_features = pd.DataFrame(dtype='float64')
-        file_list = os.listdir(cache_path)
-        i = 0
-        for f in file_list:
-            if os.path.isfile(cache_path + f):
-                df_data = pd.read_csv(cache_path + f, index_col=0)
-                for feature_name in list(df_data.columns):
-                    df_features[feature_name] = df_data[feature_name] * 1
-            i += 1
-            progressbar(i, len(file_list)) if _print else 0
-
-        # df_features.to_csv(str(Path(__file__).absolute().parent) + '\\' + 'feature_variables.csv', float_format='%8f')
-
-        shutil.rmtree(cache_path)
-
-        print('  Done.') if _print else 0
-
-        return df_features
+# coding: utf-8
+# Copyright (c) pytmge Development Team.
+
+"""
+Extracting features based on electron orbital attributes.
+    feature_design
+    feature_scaler
+
+"""
+
+
+import os
+import json
+import shutil
+import numpy as np
+import pandas as pd
+
+from pytmge.core import element_list, featurization
+from pytmge.core import progressbar, fingerprint, source_digest, instrument, _print
+from pytmge.core import verbose_option, is_verbose
+
+
+__author__ = 'Yang LIU'
+__maintainer__ = 'Yang LIU'
+__email__ = 'l_young@live.cn'
+__version__ = '1.0'
+__date__ = '2022/3/18'
+
+
+class feature_design:
+    '''
+    Extracting features based on electron orbital attributes.
+
+    '''
+
+    def __init__(self):
+        self._elemental_attribute_format = '[attribute].[shell_selection].[math operator 1]'
+        self._feature_format = '[attribute].[shell_selection].[math operator 1].[math operator 2]'
+        self._second_order_feature_format = '([feature 1])[operator]([feature 2])'
+
+    @staticmethod
+    @verbose_option
+    @instrument.stage('feature_design.delete_unusable_features')
+    def delete_unusable_features(df_features):
+        '''
+        Delete the features having empty value(s)
+        and the features being of zero variance.
+
+        df_features is not modified, the usable features are one copy of its usable columns.
+
+        Parameters
+        ----------
+        df_features : DataFrame
+            features.
+
+        Returns
+        -------
+        df_usable_features : DataFrame
+            usable_features.
+
+        '''
+
+        print('deleting unusable features') if is_verbose(_print) else 0
+
+        # one mask over the columns, block by block, so the temporaries stay small;
+        # the usable columns are then taken in one copy.
+        X = df_features.to_numpy(dtype='float64')
+        usable = np.empty(X.shape[1], dtype=bool)
+        for b in range(0, X.shape[1], 256):
+            block = X[:, b:b + 256]
+            usable[b:b + 256] = ~np.isnan(block).any(axis=0) & (np.var(block, axis=0) != 0)
+        df_usable_features = df_features.loc[:, usable]
+
+        # df_usable_features.to_csv(str(Path(__file__).absolute().parent) + '\\' + 'usable_feature_variables.csv')
+
+        print(df_usable_features.shape[0], 'entries', df_usable_features.shape[1], 'usable features') if is_verbose(_print) else 0
+
+        return df_usable_features
+
+    # the array-based engine, shared with pytmge.core.molecule (see pytmge.core.featurization)
+    math_operators = featurization.math_operators
+    elemental_attributes = staticmethod(featurization.elemental_attributes)
+    feature_names = staticmethod(featurization.feature_names)
+    get_feature_array = staticmethod(featurization.get_feature_array)
+
+    @classmethod
+    @verbose_option
+    @instrument.stage('feature_design.get_features')
+    def get_features(self, df_composition, checkpoint_path=None, attributes=None, block_size=24, n_jobs=1):
+        '''
+        Extracting features.
+
+        Parameters
+        ----------
+        df_composition : DataFrame
+            df_composition.
+        checkpoint_path : str, optional
+            A directory keeping the features of each finished block of attributes.
+            If an interrupted run left a checkpoint of the same df_composition
+            (and the same sources of pytmge, see source_digest) there,
+            the finished blocks are reloaded instead of recalculated.
+            The directory is removed when all features are done.
+            The default is None (no checkpoint).
+        attributes : list, optional
+            Names of elemental attributes. The default is None (all of them).
+        block_size : int, optional
+            Number of attributes calculated (and checkpointed) at a time. The default is 24.
+        n_jobs : int, optional
+            Number of threads calculating the rows of a block, -1 for one per CPU. The default is 1.
+        verbose : bool, optional
+            Messages of this call on or off. The default is None (_print of the module).
+
+        Returns
+        -------
+        df_features : DataFrame
+            features.
+
+        '''
+
+        print('\n  calculating features ...') if is_verbose(_print) else 0
+
+        attributes, attribute_array = self.elemental_attributes(attributes)
+
+        # # Lite edition
+        # attributes = [a for a in attributes if 'E' in a and 'range' in a]
+
+        # one row per chemical formula
+        if df_composition.index.has_duplicates:
+            df_composition = df_composition.loc[~df_composition.index.duplicated(), :]
+        if list(df_composition.columns) != element_list:
+            df_composition = df_composition.reindex(columns=element_list)
+        # a view of a composition store (nan if absent, read by the kernel chunk by chunk)
+        contents = df_composition.to_numpy(dtype='float64')
+
+        print(len(attributes), 'attributes,', df_composition.shape[0], 'entries.') if is_verbose(_print) else 0
+
+        instrument.count('features.rows', df_composition.shape[0])
+        instrument.count('features.attributes', len(attributes))
+
+        if checkpoint_path is not None:
+            cache_path = os.path.join(checkpoint_path, '')
+            # the blocks of another version of the feature code are not reused
+            _fingerprint = fingerprint(df_composition, attributes, block_size, source_digest())
+            _manifest = cache_path + 'checkpoint.json'
+            if os.path.isfile(_manifest):
+                with open(_manifest, 'rt') as _f:
+                    if json.load(_f).get('fingerprint') != _fingerprint:
+                        shutil.rmtree(cache_path)  # a checkpoint of other data
+            if not os.path.isfile(_manifest):
+                os.makedirs(cache_path, exist_ok=True)
+                with open(_manifest, 'w') as _f:
+                    json.dump({'fingerprint': _fingerprint}, _f)
+
+        n_operators = len(self.math_operators)
+        features = np.empty((contents.shape[0], len(attributes) * n_operators), dtype='float64')
+
+        blocks = range(0, len(attributes), block_size)
+        for i, b in enumerate(blocks):
+            block = features[:, b * n_operators:(b + block_size) * n_operators]
+
+            if checkpoint_path is not None:
+                _file = cache_path + 'features [' + str(b) + '].npy'
+                if os.path.isfile(_file):
+                    # finished before the interruption
+                    block[:] = np.load(_file)
+                else:
+                    self.get_feature_array(contents, attribute_array[:, b:b + block_size], out=block, n_jobs=n_jobs)
+                    # write-then-rename, an interruption never leaves a partial file behind.
+                    with open(_file + '.tmp', 'wb') as _f:
+                        np.save(_f, block)
+                    os.replace(_file + '.tmp', _file)
+            else:
+                self.get_feature_array(contents, attribute_array[:, b:b + block_size], out=block, n_jobs=n_jobs)
+
+            progressbar(i + 1, len(blocks)) if is_verbose(_print) else 0
+
+        if checkpoint_path is not None:
+            shutil.rmtree(cache_path)
+
+        df_features = pd.DataFrame(
+            features,
+            index=df_composition.index,
+            columns=self.feature_names(attributes),
+            copy=False
+        )
+
+        # df_features.to_csv(str(Path(__file__).absolute().parent) + '\\' + 'feature_variables.csv', float_format='%8f')
+
+        print('  Done.') if is_verbose(_print) else 0
+
+        return df_features
+
+    @staticmethod
+    @verbose_option
+    @instrument.stage('feature_design.get_second_order_features')
+    def get_second_order_features(
+            df_features,
+            ds_target=None,
+            operators=('*', '/', '-'),
+            n_features=1000,
+            max_pair_correlation=0.95,
+            max_parent_correlation=0.9,
+            min_variance=0.0,
+            block_memory=2**27):
+        '''
+        Generating second-order features, i.e. products, ratios and differences
+        of pairs of (usable) features, named like '(E.all.sum.avg)*(Nf.s.max.min)'.
+
+        The pairs are visited block by block, and candidates are pruned before (and right after)
+        they are computed, so that only one block of candidates is in memory at a time:
+            1) pairs of features correlated over max_pair_correlation are skipped
+               (taken from a blockwise correlation matrix of the features);
+            2) candidates having non-finite values or variance <= min_variance are dropped;
+            3) candidates correlated over max_parent_correlation with either of their two features are dropped.
+        The remaining candidates are scored, by |Pearson correlation| with ds_target if it is given,
+        else by 1 - (the higher |Pearson correlation| with their two features),
+        and only the n_features best ones are kept (as pair indices, not values) while iterating.
+
+        Parameters
+        ----------
+        df_features : DataFrame
+            Usable features (no empty values), chemical formulas as index.
+        ds_target : Series, optional
+            Target variable, chemical formulas as index. The default is None.
+        operators : tuple, optional
+            Any of '*', '/', '-'. The ratio is taken in both directions. The default is ('*', '/', '-').
+        n_features : int, optional
+            Number of second-order features to keep. The default is 1000.
+        max_pair_correlation : float, optional
+            The default is 0.95.
+        max_parent_correlation : float, optional
+            The default is 0.9.
+        min_variance : float, optional
+            The default is 0.0.
+        block_memory : int, optional
+            Approximate bound (in bytes) of the working memory of one block of pairs
+            (the pairs, their candidates and temporaries),
+            on top of the features and their standardized copy (2 x df_features).
+            The default is 2**27.
+
+        Returns
+        -------
+        df_second_order_features : DataFrame
+            chemical formulas as index, the kept second-order features as columns,
+            in descending order of score.
+
+        '''
+
+        print('\n  generating second-order features ...') if is_verbose(_print) else 0
+
+        _operators = {
+            '*': np.multiply,
+            '/': np.divide,
+            '-': np.subtract,
+            'r/': lambda a, b: np.divide(b, a),  # the ratio in the reversed direction
+        }
+        for o in operators:
+            if o not in ('*', '/', '-'):
+                raise ValueError('unknown operator: ' + str(o))
+        ops = [o for o in ('*', '/', '-') if o in operators]
+        if '/' in ops:
+            ops += ('r/', )
+
+        X = df_features.to_numpy(dtype='float64')
+        n, f = X.shape
+        columns = list(df_features.columns)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            Z = (X - X.mean(axis=0)) / X.std(axis=0)  # standardized features
+
+            if ds_target is not None:
+                t = ds_target.loc[df_features.index].to_numpy(dtype='float64')
+                zt = (t - t.mean()) / t.std()
+
+        # a block of b x b pairs. Its working set, n x b**2 float64 values each:
+        # Xi, Xj, Zi, Zj, the candidates of one operator, and one temporary
+        # (a filtered copy of the candidates, the deviations in std, or the selected Zi or Zj).
+        b = max(1, int(np.sqrt(block_memory / (8 * n * 6))))
+
+        kept_scores = np.empty(0)
+        kept_pairs = np.empty((0, 3), dtype='int64')  # (feature 1, feature 2, operator)
+
+        n_blocks = int(np.ceil(f / b))
+        n_candidates = 0
+        k = 0
+        for bi in range(0, f, b):
+            I = np.arange(bi, min(f, bi + b))
+            for bj in range(bi, f, b):
+                J = np.arange(bj, min(f, bj + b))
+
+                # 1) pair screen
+                with np.errstate(invalid='ignore'):
+                    r = np.abs(Z[:, I].T @ Z[:, J] / n)
+                mask = (I[:, None] < J[None, :]) & (r < max_pair_correlation)
+                pi, pj = np.nonzero(mask)
+                if len(pi) == 0:
+                    continue
+                fi, fj = I[pi], J[pj]
+                Xi, Xj = X[:, fi], X[:, fj]
+                Zi, Zj = Z[:, fi], Z[:, fj]
+
+                for io, o in enumerate(ops):
+                    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+                        Y = _operators[o](Xi, Xj)
+
+                        # 2) value screen
+                        ok = np.isfinite(Y).all(axis=0)
+                        if not ok.all():
+                            Y = Y[:, ok]
+                        mean = Y.mean(axis=0)
+                        std = Y.std(axis=0)
+                        ok2 = std ** 2 > min_variance
+                        if not ok2.all():
+                            Y, mean, std = Y[:, ok2], mean[ok2], std[ok2]
+                        keep = np.flatnonzero(ok)[ok2]
+                        _fi, _fj = fi[keep], fj[keep]
+
+                        # 3) parent screen
+                        Yc = Y
+                        Yc -= mean  # Y is a new array of this operator, centered in place
+                        ri = np.abs(np.einsum('nk,nk->k', Yc, Zi[:, keep]) / (n * std))
+                        rj = np.abs(np.einsum('nk,nk->k', Yc, Zj[:, keep]) / (n * std))
+                        r_parent = np.fmax(ri, rj)
+                        ok3 = r_parent <= max_parent_correlation
+
+                        if ds_target is not None:
+                            score = np.abs(Yc[:, ok3].T @ zt / (n * std[ok3]))
+                        else:
+                            score = 1 - r_parent[ok3]
+
+                    n_candidates += Y.shape[1]
+                    del Y, Yc  # freed before the candidates of the next operator are computed
+                    kept_scores = np.concatenate([kept_scores, score])
+                    kept_pairs = np.concatenate([
+                        kept_pairs,
+                        np.stack([_fi[ok3], _fj[ok3], np.full(ok3.sum(), io)], axis=1)
+                    ])
+
+                    # bounded: keep the best n_features only
+                    if len(kept_scores) > 2 * n_features:
+                        best = np.argpartition(-np.nan_to_num(kept_scores, nan=-np.inf), n_features)[:n_features]
+                        kept_scores, kept_pairs = kept_scores[best], kept_pairs[best]
+
+            k += 1
+            progressbar(k, n_blocks) if is_verbose(_print) else 0
+
+        instrument.count('second_order_features.candidates', n_candidates)
+
+        order = np.argsort(-np.nan_to_num(kept_scores, nan=-np.inf), kind='stable')[:n_features]
+        kept_pairs = kept_pairs[order]
+
+        second_order_features = {}
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            for i, j, io in kept_pairs:
+                o = ops[io]
+                if o == 'r/':
+                    name = '(' + columns[j] + ')/(' + columns[i] + ')'
+                else:
+                    name = '(' + columns[i] + ')' + o + '(' + columns[j] + ')'
+                second_order_features[name] = _operators[o](X[:, i], X[:, j])
+
+        df_second_order_features = pd.DataFrame(second_order_features, index=df_features.index)
+
+        print(n_candidates, 'candidates screened,', df_second_order_features.shape[1], 'kept.') if is_verbose(_print) else 0
+        print('  Done.') if is_verbose(_print) else 0
+
+        return df_second_order_features
+
+
+class feature_scaler:
+    '''
+    Deleting unusable features and standardizing the rest, in one fused pass.
+
+    fit() sweeps the features once, chunk by chunk, collecting the count, mean and variance
+    (merged chunk by chunk), min, max and NaNs of every column.
+    The usable features are those of delete_unusable_features
+    (no empty value, not of zero variance),
+    and transform() standardizes them like sklearn's StandardScaler, (x - mean) / std,
+    writing into one output array chunk by chunk, without intermediate copies.
+
+    The fitted parameters are kept, so new rows are transformed without refitting.
+
+    Examples
+    --------
+    >>> scaler = feature_scaler().fit(df_features)
+    >>> df_standardized_usable_features = scaler.transform(df_features)
+    >>> df_new = scaler.transform(feature_design.get_features(df_new_composition))
+
+    '''
+
+    def __init__(self, chunk_size=4096):
+        '''
+        chunk_size : int, optional
+            Number of rows per chunk. The default is 4096.
+
+        '''
+
+        self.chunk_size = chunk_size
+
+    @verbose_option
+    @instrument.stage('feature_scaler.fit')
+    def fit(self, df_features):
+        '''
+        Fitting the usable features, their means and standard deviations.
+
+        Parameters
+        ----------
+        df_features : DataFrame
+            features.
+
+        Returns
+        -------
+        self : feature_scaler
+
+        '''
+
+        X = df_features.to_numpy(dtype='float64')
+        n_columns = X.shape[1]
+
+        n = 0
+        mean = np.zeros(n_columns)
+        m2 = np.zeros(n_columns)
+        lowest = np.full(n_columns, np.inf)
+        highest = np.full(n_columns, -np.inf)
+        has_nan = np.zeros(n_columns, dtype=bool)
+
+        for s in range(0, X.shape[0], self.chunk_size):
+            chunk = X[s:s + self.chunk_size]
+            has_nan |= np.isnan(chunk).any(axis=0)
+            np.fmin(lowest, chunk.min(axis=0), out=lowest)
+            np.fmax(highest, chunk.max(axis=0), out=highest)
+
+            # merging the mean and the sum of squared deviations of the chunk (Chan et al.)
+            n_chunk = chunk.shape[0]
+            mean_chunk = chunk.mean(axis=0)
+            m2_chunk = ((chunk - mean_chunk) ** 2).sum(axis=0)
+            delta = mean_chunk - mean
+            total = n + n_chunk
+            mean += delta * (n_chunk / total)
+            m2 += m2_chunk + delta ** 2 * (n * n_chunk / total)
+            n = total
+
+        self.n_samples_seen_ = n
+        self.feature_names_in_ = np.asarray(df_features.columns, dtype=object)
+        self.usable_ = ~has_nan & (lowest != highest)
+
+        self.mean_ = mean[self.usable_]
+        self.var_ = m2[self.usable_] / max(n, 1)
+        self.scale_ = np.sqrt(self.var_)
+        self.scale_[self.scale_ == 0] = 1
+
+        print(n, 'entries', int(self.usable_.sum()), 'usable features') if is_verbose(_print) else 0
+
+        return self
+
+    def get_feature_names_out(self):
+        return self.feature_names_in_[self.usable_]
+
+    @verbose_option
+    @instrument.stage('feature_scaler.transform')
+    def transform(self, df_features, out=None):
+        '''
+        Standardizing the usable features.
+
+        Parameters
+        ----------
+        df_features : DataFrame
+            features, having the columns seen by fit().
+        out : ndarray, optional
+            A rows x usable features float64 array (e.g. a memory-mapped file) to write into.
+            The default is None (a new array).
+
+        Returns
+        -------
+        df_standardized_usable_features : DataFrame
+            a DataFrame on out.
+
+        '''
+
+        if list(df_features.columns) != list(self.feature_names_in_):
+            df_features = df_features.reindex(columns=self.feature_names_in_)
+        X = df_features.to_numpy(dtype='float64')
+        columns = np.flatnonzero(self.usable_)
+
+        if out is None:
+            out = np.empty((X.shape[0], len(columns)), dtype='float64')
+
+        for s in range(0, X.shape[0], self.chunk_size):
+            chunk = out[s:s + self.chunk_size]
+            np.take(X[s:s + self.chunk_size], columns, axis=1, out=chunk)
+            chunk -= self.mean_
+            chunk /= self.scale_
+
+        return pd.DataFrame(out, index=df_features.index, columns=self.get_feature_names_out(), copy=False)
+
+    def fit_transform(self, df_features, out=None):
+        return self.fit(df_features).transform(df_features, out=out)
+
+    def inverse_transform(self, df_standardized):
+        '''
+        Back to the scale of the usable features.
+
+        '''
+
+        return df_standardized * self.scale_ + self.mean_
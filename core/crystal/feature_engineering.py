@@ -1,119 +1,522 @@
-# coding: utf-8
-# Copyright (c) pytmge Development Team.
-
-"""
-
-"""
-
-
-# import os
-# import shutil
-# import warnings
-import numpy as np
-
-from pytmge.core import _print
-
-
-__author__ = 'Yang LIU'
-__maintainer__ = 'Yang LIU'
-__email__ = 'l_young@live.cn'
-__version__ = '1.0'
-__date__ = '2022/3/18'
-
-
-class feature_engineering:
-
-    @staticmethod
-    def feature_selection_by_Pearson_correlation(df_features, c=np.nan, threshold=0.9):
-        """
-        Feature selection by Pearson correlation.
-
-        The df_features and ds_target should have identical indices.
-
-        Features are removed one by one.
-        Each time, find the highest value of the Pearson correlation coefficient
-            in the whole correlationmatrix.
-        In the two features contributing that highest Pearson correlation coefficient,
-            discard the one that having lower coefficient of variance.
-
-        Parameters
-        ----------
-        df_features : DataFrame
-            chemical formulas as index.
-        ds_target : Series, optional
-            chemical formulas as index.
-        threshold : float, optional
-            If -1 < threshold < 1, threshold is of the Pearson corrrelation.
-            If threshold >= 1, threshold is of the number of selected features (al least n_threshold features will be left)..
-            The default is 0.9.
-
-        Returns
-        -------
-        df_selected_features : DataFrame
-            Independent features as index and columns.
-
-        """
-
-        print('\n3-1 feature selection by Pearson correlation ...') if _print else 0
-        print('  (this may take a couple of seconds)') if _print else 0
-
-        correlation_matrix = df_features.corr()
-        # df_normalized_features = (df_features - np.mean(df_features)) / (np.max(df_features) - np.min(df_features))
-
-        matrix = np.abs(np.round(correlation_matrix * 1, 6))
-
-        # for n in range(len(matrix.index)):
-        #     matrix.iloc[n, n] = np.nan
-        np.fill_diagonal(matrix.values, np.nan)
-
-        for n in range(len(correlation_matrix.index)):
-
-            a = np.array(matrix)
-            m = np.nanmax(a)  # find the maximum in the whole matrix
-
-            if threshold >= 1:
-                n_threshold = int(threshold) + 1
-                if matrix.shape[1] < n_threshold:
-                    break
-            elif threshold >= -1:
-                p_threshold = threshold
-                if m < p_threshold:
-                    break
-            else:
-                break
-            i = np.where(a == m)[0][0]
-            j = np.where(a == m)[1][0]
-            f1 = matrix.columns[i]
-            f2 = matrix.columns[j]
-
-            # f1, f2 are the two features having the highest correlation coefficient.
-            # Each time, choose one in the two features.
-
-            # Case 1: the feature having lower coefficient of variance is eliminated.
-            cv1 = np.std(df_features[f1]) / np.mean(df_features[f1])
-            cv2 = np.std(df_features[f2]) / np.mean(df_features[f2])
-
-            # # Case 2: the feature having lower std is eliminated.
-            # cv1 = np.std(df_normalized_features[f1])
-            # cv2 = np.std(df_normalized_features[f2])
-
-            # # Case 3: the feature having lower correlation with the target is eliminated.
-            # cv1 = np.round(np.corrcoef(df_features[f1], ds_target)[0][1], 4)
-            # cv2 = np.round(np.corrcoef(df_features[f2], ds_target)[0][1], 4)
-
-            if cv1 > cv2:
-                feature_to_drop = f2 * 1
-            else:
-                feature_to_drop = f1 * 1
-
-            matrix.drop(feature_to_drop, axis=0, inplace=True)
-            matrix.drop(feature_to_drop, axis=1, inplace=True)
-
-            # print(n, m, f1, f2, round(cv1, 3), round(cv2, 3))
-
-        df_selected_features = df_features.loc[:, list(matrix.index)] * 1
-
-        print(matrix.shape[1], 'features left.') if _print else 0
-        print('max correlation:', m, '\n') if _print else 0
-
-        return df_selected_features
+# coding: utf-8
+# Copyright (c) pytmge Development Team.
+
+"""
+
+"""
+
+
+# import os
+# import shutil
+# import warnings
+from statistics import NormalDist
+import numpy as np
+import pandas as pd
+
+from pytmge.core import instrument, _print
+from pytmge.core import verbose_option, is_verbose
+
+try:
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+    from scipy.cluster.hierarchy import linkage as hierarchy_linkage, fcluster
+    from scipy.spatial.distance import squareform
+except ImportError:  # single linkage without scipy, by union-find
+    connected_components = hierarchy_linkage = None
+
+
+__author__ = 'Yang LIU'
+__maintainer__ = 'Yang LIU'
+__email__ = 'l_young@live.cn'
+__version__ = '1.0'
+__date__ = '2022/3/18'
+
+
+def _columns(df_features, columns):
+    # the columns of df_features, without a copy if they are all of them, in order
+    if list(df_features.columns) == list(columns):
+        return df_features
+    return df_features.loc[:, columns]
+
+
+class feature_engineering:
+
+    # criteria of elimination: of two highly correlated features, the one having the lower score is eliminated.
+    criteria = {
+        'cv': 'coefficient of variation, std(x)/mean(x)',
+        'std': 'std after normalization, std((x-mean(x))/(max(x)-min(x)))',
+        'target': '|Pearson correlation with the target|',
+    }
+
+    @staticmethod
+    def feature_scores(df_features, criterion='cv', ds_target=None):
+        """
+        Scores of all features for an elimination criterion, computed at once.
+
+        Parameters
+        ----------
+        df_features : DataFrame
+            chemical formulas as index.
+        criterion : str or callable, optional
+            'cv', 'std', 'target' (see feature_engineering.criteria),
+            or a callable(df_features, ds_target) returning one score per feature.
+            The default is 'cv'.
+        ds_target : Series, optional
+            chemical formulas as index, needed by 'target'.
+
+        Returns
+        -------
+        scores : ndarray
+            One score per column of df_features.
+
+        """
+
+        if callable(criterion):
+            return np.asarray(criterion(df_features, ds_target), dtype='float64')
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if criterion == 'cv':
+                # Case 1: the feature having lower coefficient of variance is eliminated.
+                scores = df_features.std(ddof=0) / df_features.mean()
+            elif criterion == 'std':
+                # Case 2: the feature having lower std (after normalization) is eliminated.
+                scores = df_features.std(ddof=0) / (df_features.max() - df_features.min())
+            elif criterion == 'target':
+                # Case 3: the feature having lower correlation with the target is eliminated.
+                if ds_target is None:
+                    raise ValueError("criterion 'target' needs ds_target.")
+                scores = np.round(np.abs(df_features.corrwith(ds_target.loc[df_features.index])), 4)
+            else:
+                raise ValueError('unknown criterion: ' + str(criterion))
+
+        return scores.to_numpy(dtype='float64')
+
+    @staticmethod
+    @verbose_option
+    @instrument.stage('feature_engineering.approximate_correlation_matrix')
+    def approximate_correlation_matrix(df_features, threshold, sample_size=20000, confidence=0.999, seed=0,
+                                       block_memory=2**27):
+        """
+        A correlation matrix exact for every pair that may reach the threshold.
+
+        The correlations are first estimated on a random sample of rows.
+        The upper confidence bound of |r| of each pair is |r| + k * se(r),
+        k being the normal quantile for the confidence, corrected for the number of pairs (Bonferroni),
+        and se(r) the asymptotic standard error of r for any distribution (delta method):
+            se(r)**2 = (m22 (1 + r**2/2) - r (m31 + m13) + r**2/4 (m40 + m04)) / sample_size,
+        with the moments m of the standardized features estimated on the sample,
+        and never below that of bivariate normal features, (1 - r**2) / sqrt(sample_size).
+        Only the pairs whose upper bound reaches the threshold are computed exactly, on all the rows;
+        the others keep their estimates, below the threshold with the given confidence.
+
+        The confidence holds asymptotically, when the sample estimates the moments (up to the fourth) well:
+        for heavy-tailed features (e.g. lognormal ones with a large spread) it is optimistic,
+        use a larger sample, or transform the features (e.g. log) beforehand.
+
+        The elimination path (see elimination_path) down to the threshold only involves
+        correlations at or above the threshold, so it is the exact one with that confidence.
+        The features should have no empty value.
+
+        Parameters
+        ----------
+        df_features : DataFrame
+            chemical formulas as index.
+        threshold : float
+            The lowest threshold of the Pearson correlation the matrix is used for, 0 < threshold < 1.
+        sample_size : int, optional
+            Number of rows of the sample. The default is 20000.
+        confidence : float, optional
+            Probability that no pair reaching the threshold is missed. The default is 0.999.
+        seed : int, optional
+            Seed of the sample. The default is 0.
+        block_memory : int, optional
+            Approximate bound (in bytes) of the working memory of the exact computation,
+            done by blocks of columns. The default is 2**27.
+
+        Returns
+        -------
+        correlation_matrix : DataFrame
+            features x features.
+
+        """
+
+        X = df_features.to_numpy(dtype='float64')
+        n, n_features = X.shape
+        if sample_size >= n or n_features < 2:
+            return df_features.corr()
+
+        rng = np.random.default_rng(seed)
+        sample = X[np.sort(rng.choice(n, sample_size, replace=False))]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            U = (sample - sample.mean(axis=0)) / sample.std(axis=0)  # standardized sample
+            r = U.T @ U / sample_size
+            U2 = U ** 2
+            m22 = U2.T @ U2 / sample_size
+            m40 = U2.mean(axis=0)
+            U2 *= U
+            m31 = U2.T @ U / sample_size
+            del U, U2
+            r2 = r ** 2
+            variance = m22 * (1 + r2 / 2) - r * (m31 + m31.T) + r2 / 4 * (m40[:, None] + m40)
+            del m22, m31
+            variance = np.maximum(variance, (1 - r2) ** 2)  # never narrower than under normality
+
+        n_pairs = n_features * (n_features - 1) / 2
+        k = NormalDist().inv_cdf(1 - (1 - confidence) / (2 * n_pairs))
+        with np.errstate(invalid='ignore'):
+            upper = np.abs(r) + k * np.sqrt(variance / sample_size)
+        del variance, r2
+        # nan (constant in the sample) has to be computed exactly too
+        i, j = np.nonzero(np.triu(~(upper < threshold), k=1))
+        del upper
+
+        instrument.count('approximate_correlation.pairs', int(n_pairs))
+        instrument.count('approximate_correlation.exact_pairs', len(i))
+        print(len(i), 'of', int(n_pairs), 'pairs computed exactly.') if is_verbose(_print) else 0
+
+        # exact correlations of the candidates, feature by feature,
+        # the pairs being grouped by feature once (np.nonzero lists them row by row),
+        # and the other features of each group taken by blocks of columns (n x block)
+        mean = X.mean(axis=0)
+        std = X.std(axis=0)
+        block = max(1, block_memory // (8 * n))
+        starts = np.flatnonzero(np.r_[True, i[1:] != i[:-1]]) if len(i) else np.empty(0, dtype='int64')
+        ends = np.r_[starts[1:], len(i)]
+        for start, end in zip(starts, ends):
+            a = i[start]
+            xa = X[:, a] - mean[a]
+            for s in range(start, end, block):
+                b = j[s:min(s + block, end)]
+                Xb = X[:, b]
+                Xb -= mean[b]
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    r[a, b] = (xa @ Xb) / (n * std[a] * std[b])
+                r[b, a] = r[a, b]
+            del xa, Xb
+
+        np.fill_diagonal(r, 1)
+        return pd.DataFrame(r, index=df_features.columns, columns=df_features.columns, copy=False)
+
+    @staticmethod
+    def elimination_path(df_features, criterion='cv', ds_target=None, correlation_matrix=None, stop=None):
+        """
+        Eliminating features one by one, recording each step.
+
+        Each time, find the highest value of |Pearson correlation coefficient|
+            in the whole correlation matrix (rounded to 6 decimals).
+        In the two features contributing that highest value,
+            discard the one having the lower score (see feature_scores).
+
+        The path does not depend on the threshold:
+        the selection for any threshold is a prefix of the path.
+
+        Parameters
+        ----------
+        df_features : DataFrame
+            chemical formulas as index.
+        criterion : str or callable, optional
+            The default is 'cv'.
+        ds_target : Series, optional
+            chemical formulas as index.
+        correlation_matrix : DataFrame, optional
+            df_features.corr(), if already computed. The default is None.
+        stop : callable, optional
+            stop(max_correlation, n_left) -> bool, checked before each step.
+            The default is None (until one feature is left).
+
+        Returns
+        -------
+        df_path : DataFrame
+            One row per step:
+            'max_correlation' (before the step), 'n_left' (before the step),
+            'dropped' and 'kept' (the two features contributing max_correlation).
+
+        """
+
+        if correlation_matrix is None:
+            correlation_matrix = df_features.corr()
+
+        columns = list(correlation_matrix.columns)
+        scores = feature_engineering.feature_scores(_columns(df_features, columns), criterion, ds_target)
+
+        a = correlation_matrix.to_numpy(dtype='float64', copy=True)  # the working copy, rounded in place
+        np.abs(np.round(a, 6, out=a), out=a)
+        a[np.isnan(a)] = -np.inf
+        np.fill_diagonal(a, -np.inf)
+
+        # maximum (and its first position) of each row, updated when a feature is dropped.
+        row_max = a.max(axis=1, initial=-np.inf)
+        row_arg = a.argmax(axis=1) if a.size else np.zeros(len(a), dtype='int64')
+
+        path = []
+        n_left = len(columns)
+        while n_left > 1:
+
+            m = row_max.max()
+            if m == -np.inf or (stop is not None and stop(m, n_left)):
+                break
+
+            # the first (row-major) position of the maximum in the whole matrix
+            i = np.flatnonzero(row_max == m)[0]
+            j = row_arg[i]
+
+            if scores[i] > scores[j]:
+                d, k = j, i
+            else:
+                d, k = i, j
+
+            path.append((m, n_left, columns[d], columns[k]))
+
+            a[d, :] = -np.inf
+            a[:, d] = -np.inf
+            row_max[d] = -np.inf
+            for r in np.flatnonzero(row_arg == d):
+                if r != d:
+                    row_arg[r] = a[r].argmax()
+                    row_max[r] = a[r, row_arg[r]]
+            n_left -= 1
+
+        return pd.DataFrame(path, columns=['max_correlation', 'n_left', 'dropped', 'kept'])
+
+    @staticmethod
+    @verbose_option
+    @instrument.stage('feature_engineering.feature_selection_by_Pearson_correlation')
+    def feature_selection_by_Pearson_correlation(
+            df_features,
+            ds_target=None,
+            threshold=0.9,
+            criterion='cv',
+            correlation_matrix=None,
+            sample_size=None):
+        """
+        Feature selection by Pearson correlation.
+
+        The df_features and ds_target should have identical indices.
+
+        Features are removed one by one.
+        Each time, find the highest value of the Pearson correlation coefficient
+            in the whole correlationmatrix.
+        In the two features contributing that highest Pearson correlation coefficient,
+            discard the one having the lower score of the criterion
+            (by default, the lower coefficient of variance).
+
+        The correlation matrix and the scores are computed once,
+        and one elimination path serves all the thresholds given.
+
+        Parameters
+        ----------
+        df_features : DataFrame
+            chemical formulas as index.
+        ds_target : Series, optional
+            chemical formulas as index.
+        threshold : float or list, optional
+            If -1 < threshold < 1, threshold is of the Pearson corrrelation.
+            If threshold >= 1, threshold is of the number of selected features (al least n_threshold features will be left)..
+            A list of thresholds (of either kind) sweeps them in one pass.
+            The default is 0.9.
+        criterion : str or callable, optional
+            'cv', 'std' or 'target' (see feature_engineering.criteria),
+            or a callable(df_features, ds_target) returning one score per feature.
+            The default is 'cv'.
+        correlation_matrix : DataFrame, optional
+            df_features.corr(), if already computed. The default is None.
+        sample_size : int, optional
+            For very tall datasets: pre-screen the correlations on a sample of rows,
+            see approximate_correlation_matrix.
+            Only used when all thresholds are of the Pearson correlation (0 < threshold < 1)
+            and there is no empty value.
+            The default is None (exact correlation matrix).
+
+        Returns
+        -------
+        df_selected_features : DataFrame
+            chemical formulas as index, selected features as columns.
+            If threshold is a list, a dict {threshold: df_selected_features}.
+
+        """
+
+        print('\n3-1 feature selection by Pearson correlation ...') if is_verbose(_print) else 0
+        print('  (this may take a couple of seconds)') if is_verbose(_print) else 0
+
+        thresholds = list(threshold) if np.ndim(threshold) else [threshold]
+
+        if correlation_matrix is None:
+            if (sample_size is not None and sample_size < df_features.shape[0]
+                    and all(0 < t < 1 for t in thresholds) and not df_features.isna().any().any()):
+                correlation_matrix = feature_engineering.approximate_correlation_matrix(
+                    df_features, min(thresholds), sample_size=sample_size)
+            else:
+                correlation_matrix = df_features.corr()
+        n_features = correlation_matrix.shape[1]
+
+        # how far the path has to go for all thresholds
+        n_min = min([int(t) for t in thresholds if t >= 1], default=n_features)
+        p_min = min([t for t in thresholds if -1 <= t < 1], default=np.inf)
+
+        df_path = feature_engineering.elimination_path(
+            df_features,
+            criterion=criterion,
+            ds_target=ds_target,
+            correlation_matrix=correlation_matrix,
+            stop=lambda m, n_left: n_left <= n_min and m < p_min
+        )
+
+        selected = {}
+        for t in thresholds:
+            kept = feature_engineering.selection_from_path(df_path, correlation_matrix.columns, t)
+            selected[t] = df_features.loc[:, kept]
+
+            n_steps = n_features - len(kept)
+            print(selected[t].shape[1], 'features left.') if is_verbose(_print) else 0
+            if n_steps < len(df_path):
+                print('max correlation:', df_path['max_correlation'].iloc[n_steps], '\n') if is_verbose(_print) else 0
+
+        return selected if np.ndim(threshold) else selected[threshold]
+
+    @staticmethod
+    def selection_from_path(df_path, columns, threshold):
+        '''
+        Features left by an elimination path (see elimination_path) at a threshold.
+
+        Parameters
+        ----------
+        df_path : DataFrame
+            The elimination path of the features in columns.
+        columns : list
+            All the features, in order.
+        threshold : float
+            Of the Pearson correlation if -1 <= threshold < 1,
+            else of the number of selected features.
+
+        Returns
+        -------
+        selected_features : list
+            The features left, in the order of columns.
+
+        '''
+
+        if threshold >= 1:
+            n_steps = max(0, len(columns) - int(threshold))
+        elif threshold >= -1:
+            n_steps = int((df_path['max_correlation'] >= threshold).sum())
+        else:
+            n_steps = 0
+        dropped = set(df_path['dropped'].iloc[:n_steps])
+        return [f for f in columns if f not in dropped]
+
+    @staticmethod
+    @verbose_option
+    @instrument.stage('feature_engineering.feature_selection_by_clustering')
+    def feature_selection_by_clustering(
+            df_features,
+            ds_target=None,
+            threshold=0.9,
+            criterion='cv',
+            correlation_matrix=None,
+            linkage='single',
+            return_clusters=False):
+        """
+        Feature selection by clustering correlated features, in one pass.
+
+        The features are clustered on the distance 1 - |Pearson correlation coefficient|
+        (rounded to 6 decimals), cut at 1 - threshold,
+        and each cluster is represented by its feature having the highest score of the criterion
+        (by default, the highest coefficient of variance, as in feature_selection_by_Pearson_correlation).
+
+        With linkage='single', the clusters are the connected components
+        of the graph of the pairs having |r| >= threshold,
+        so no two selected features have |r| >= threshold across clusters,
+        but features of one cluster may be linked through a chain.
+        'complete' (needs scipy) makes clusters whose features all have |r| >= threshold pairwise,
+        'average' (needs scipy) is in between.
+
+        Parameters
+        ----------
+        df_features : DataFrame
+            chemical formulas as index.
+        ds_target : Series, optional
+            chemical formulas as index, needed by the criterion 'target'.
+        threshold : float, optional
+            threshold of the Pearson correlation. The default is 0.9.
+        criterion : str or callable, optional
+            see feature_scores. The default is 'cv'.
+        correlation_matrix : DataFrame, optional
+            df_features.corr(), if already computed. The default is None.
+        linkage : str, optional
+            'single', 'complete' or 'average'. The default is 'single'.
+        return_clusters : bool, optional
+            Also return the members of each cluster. The default is False.
+
+        Returns
+        -------
+        df_selected_features : DataFrame
+            chemical formulas as index, selected features as columns (in the order of df_features).
+        dict_clusters : dict
+            If return_clusters, {selected feature: [the features it stands for]}.
+
+        """
+
+        print('\n3-1 feature selection by clustering (' + linkage + ' linkage) ...') if is_verbose(_print) else 0
+
+        if correlation_matrix is None:
+            correlation_matrix = df_features.corr()
+
+        columns = list(correlation_matrix.columns)
+        n_features = len(columns)
+        scores = feature_engineering.feature_scores(_columns(df_features, columns), criterion, ds_target)
+
+        a = correlation_matrix.to_numpy(dtype='float64', copy=True)  # the working copy, rounded in place
+        np.abs(np.round(a, 6, out=a), out=a)
+        a[np.isnan(a)] = 0
+
+        if linkage == 'single':
+            i, j = np.nonzero(np.triu(a >= threshold, k=1))
+            if connected_components is not None:
+                graph = coo_matrix((np.ones(len(i)), (i, j)), shape=(n_features, n_features))
+                _, labels = connected_components(graph, directed=False)
+            else:
+                parent = np.arange(n_features)
+
+                def _root(x):
+                    while parent[x] != x:
+                        parent[x] = parent[parent[x]]
+                        x = parent[x]
+                    return x
+
+                for x, y in zip(i, j):
+                    rx, ry = _root(x), _root(y)
+                    if rx != ry:
+                        parent[max(rx, ry)] = min(rx, ry)
+                labels = np.array([_root(x) for x in range(n_features)])
+
+        elif linkage in ('complete', 'average'):
+            if hierarchy_linkage is None:
+                raise ImportError("linkage '" + linkage + "' needs scipy.")
+            distance = 1 - a
+            np.fill_diagonal(distance, 0)
+            Z = hierarchy_linkage(squareform(np.clip(distance, 0, 1), checks=False), method=linkage)
+            # distances equal to 1 - threshold are in the same cluster (|r| >= threshold)
+            labels = fcluster(Z, t=1 - threshold, criterion='distance')
+
+        else:
+            raise ValueError('unknown linkage: ' + str(linkage))
+
+        # representative: the highest score of each cluster (nan scores last, ties to the first feature)
+        ds_scores = pd.Series(np.nan_to_num(scores, nan=-np.inf), index=columns)
+        representative = ds_scores.groupby(labels, sort=False).idxmax()
+
+        selected = set(representative)
+        df_selected_features = df_features.loc[:, [f for f in columns if f in selected]]
+
+        print(df_selected_features.shape[1], 'features left.') if is_verbose(_print) else 0
+
+        if not return_clusters:
+            return df_selected_features
+
+        dict_clusters = {f: [] for f in df_selected_features.columns}
+        for f, label in zip(columns, labels):
+            kept = representative[label]
+            if f != kept:
+                dict_clusters[kept].append(f)
+
+        return df_selected_features, dict_clusters
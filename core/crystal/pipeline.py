@@ -0,0 +1,244 @@
+# coding: utf-8
+# Copyright (c) pytmge Development Team.
+
+"""
+A checkpointed, resumable pipeline runner.
+    pipeline
+    crystal_pipeline
+
+"""
+
+
+import os
+import glob
+import shutil
+import inspect
+import pandas as pd
+
+from pytmge.core import fingerprint, source_digest, instrument, _print
+from pytmge.core import verbose_option, is_verbose
+from pytmge.core.crystal.data_preparation import data_set
+from pytmge.core.crystal.feature_design import feature_design
+from pytmge.core.crystal.feature_engineering import feature_engineering
+from pytmge.core.crystal.plot_figures import plot_target_vs_features
+
+
+__author__ = 'Yang LIU'
+__maintainer__ = 'Yang LIU'
+__email__ = 'l_young@live.cn'
+__version__ = '1.0'
+__date__ = '2022/3/18'
+
+
+class pipeline:
+    '''
+    A chain of stages, the output of each stage is stored in a local artifact cache.
+
+    The fingerprint of a stage covers its name, its function
+    (name, bytecode, constants, default values and closure, see fingerprint),
+    the sources of pytmge (the code the function calls, see source_digest),
+    its parameters and the fingerprints of its inputs.
+    A stage whose fingerprint has an artifact in the cache is skipped,
+    and its output is only loaded if a later stage that has to run needs it.
+
+    Stages accepting a 'checkpoint_path' argument (e.g. feature_design.get_features)
+    get a checkpoint directory next to their artifact,
+    so an interrupted stage resumes where it stopped;
+    the checkpoints of a stage under other fingerprints are removed.
+
+    Examples
+    --------
+    >>> p = crystal_pipeline('./_artifacts', threshold=0.9)
+    >>> df_selected_features = p.run(df_example)
+    >>> df_features = p.load('features')
+
+    '''
+
+    _input = 'input'
+
+    def __init__(self, cache_path):
+        '''
+        cache_path : str
+            Directory of the artifact cache.
+
+        '''
+
+        self.cache_path = cache_path
+        self.stages = {}
+        self.fingerprints = {}
+        self.results = {}
+
+    def add_stage(self, name, function, inputs=(_input, ), **params):
+        '''
+        Declaring a stage.
+
+        Parameters
+        ----------
+        name : str
+            Name of the stage.
+        function : callable
+            Called as function(*outputs_of_inputs, **params).
+        inputs : tuple, optional
+            Names of the earlier stages (or 'input', the data given to run) whose outputs are passed to function.
+            The default is ('input', ).
+        **params :
+            Parameters of the stage.
+
+        Returns
+        -------
+        self : pipeline
+
+        '''
+
+        for i in inputs:
+            if i != self._input and i not in self.stages:
+                raise ValueError('stage ' + name + ': unknown input ' + str(i))
+        self.stages[name] = (function, tuple(inputs), params)
+        return self
+
+    def _artifact(self, name):
+        return os.path.join(self.cache_path, name + '-' + self.fingerprints[name][:16] + '.pkl')
+
+    def _fingerprint(self, data):
+        self.fingerprints = {self._input: fingerprint(data)}
+        sources = source_digest()
+        for name, (function, inputs, params) in self.stages.items():
+            self.fingerprints[name] = fingerprint(
+                name, function, sources, params, [self.fingerprints[i] for i in inputs]
+            )
+        return self.fingerprints
+
+    def is_cached(self, name):
+        return os.path.isfile(self._artifact(name))
+
+    def load(self, name):
+        '''
+        Output of a stage, from memory or from the artifact cache.
+
+        '''
+
+        if name not in self.results:
+            self.results[name] = pd.read_pickle(self._artifact(name))
+        return self.results[name]
+
+    @verbose_option
+    def run(self, data, until=None, force=()):
+        '''
+        Running the stages, skipping those having an up-to-date artifact.
+
+        Parameters
+        ----------
+        data : object
+            The 'input' of the pipeline, e.g. a DataFrame of dataset.
+        until : str, optional
+            Name of the last stage to run. The default is None (all stages).
+        force : tuple, optional
+            Names of stages to rerun even if they are cached. The default is ().
+
+        Returns
+        -------
+        result : object
+            Output of the last stage run.
+
+        '''
+
+        os.makedirs(self.cache_path, exist_ok=True)
+        self._fingerprint(data)
+        self.results = {self._input: data}
+
+        names = list(self.stages)
+        if until is not None:
+            names = names[:names.index(until) + 1]
+
+        # stages to run: not cached, or forced.
+        to_run = [n for n in names if n in force or not self.is_cached(n)]
+
+        for name in names:
+            function, inputs, params = self.stages[name]
+
+            # checkpoints of the same stage having other fingerprints (left by failed runs) are out of date.
+            checkpoint = self._artifact(name)[:-len('.pkl')] + '.checkpoint'
+            for d in glob.glob(os.path.join(glob.escape(self.cache_path), glob.escape(name) + '-*.checkpoint')):
+                if os.path.normpath(d) != os.path.normpath(checkpoint):
+                    shutil.rmtree(d, ignore_errors=True)
+
+            if name not in to_run:
+                print('\n  stage', name, 'is up to date.') if is_verbose(_print) else 0
+                continue
+
+            print('\n  running stage', name, '...') if is_verbose(_print) else 0
+
+            with instrument.span('pipeline.' + name):
+                kwargs = dict(params)
+                artifact = self._artifact(name)
+                if 'checkpoint_path' in inspect.signature(function).parameters:
+                    kwargs['checkpoint_path'] = checkpoint
+                result = function(*[self.load(i) for i in inputs], **kwargs)
+
+                # artifacts of the same stage having other fingerprints are out of date.
+                for f in glob.glob(os.path.join(glob.escape(self.cache_path), glob.escape(name) + '-*.pkl')):
+                    os.remove(f)
+                pd.to_pickle(result, artifact + '.tmp')
+                os.replace(artifact + '.tmp', artifact)
+
+            self.results[name] = result
+
+        return self.load(names[-1])
+
+
+def _subset(df_dataset):
+    return data_set(df_dataset).subset()
+
+
+def _composition(df_dataset):
+    return data_set(df_dataset).chemical_formulas.composition.df
+
+
+def _plot(df_dataset, df_features, path):
+    plot_target_vs_features(df_dataset.iloc[:, 0], df_features, path=path)
+    return path
+
+
+def crystal_pipeline(cache_path, threshold=0.9, use_subset=True, figure_path=None):
+    '''
+    The pipeline of the example:
+        data_set -> subset() -> get_features -> delete_unusable_features
+        -> feature selection by Pearson correlation -> plotting (if figure_path is given).
+
+    Parameters
+    ----------
+    cache_path : str
+        Directory of the artifact cache.
+    threshold : float, optional
+        threshold of feature_selection_by_Pearson_correlation. The default is 0.9.
+    use_subset : bool, optional
+        Whether to extract the subset of the dataset first. The default is True.
+    figure_path : str, optional
+        Where the target_vs_feature figures are saved. The default is None (no plotting).
+
+    Returns
+    -------
+    pipeline : pipeline
+        Stages 'subset' (if use_subset), 'composition', 'features',
+        'usable_features', 'selected_features' and 'figures' (if figure_path is given).
+
+    '''
+
+    p = pipeline(cache_path)
+    dataset = 'input'
+    if use_subset:
+        p.add_stage('subset', _subset)
+        dataset = 'subset'
+    p.add_stage('composition', _composition, inputs=(dataset, ))
+    p.add_stage('features', feature_design.get_features, inputs=('composition', ))
+    p.add_stage('usable_features', feature_design.delete_unusable_features, inputs=('features', ))
+    p.add_stage(
+        'selected_features',
+        feature_engineering.feature_selection_by_Pearson_correlation,
+        inputs=('usable_features', ),
+        threshold=threshold
+    )
+    if figure_path is not None:
+        p.add_stage('figures', _plot, inputs=(dataset, 'selected_features'), path=figure_path)
+
+    return p
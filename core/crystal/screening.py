@@ -0,0 +1,256 @@
+# coding: utf-8
+# Copyright (c) pytmge Development Team.
+
+"""
+High-throughput enumeration and screening of hypothetical compositions.
+    composition_space
+    screen
+
+"""
+
+
+import itertools
+import numpy as np
+import pandas as pd
+
+from pytmge.core import element_list, progressbar, instrument, _print
+from pytmge.core import verbose_option, is_verbose
+from pytmge.core.crystal.feature_design import feature_design
+
+
+__author__ = 'Yang LIU'
+__maintainer__ = 'Yang LIU'
+__email__ = 'l_young@live.cn'
+__version__ = '1.0'
+__date__ = '2022/3/18'
+
+
+class composition_space:
+    '''
+    A grid of compositions, enumerated directly as arrays of elemental contents.
+
+    The composition is made of sites, each site is shared by a set of elements
+    whose contents add up to the total of the site, on a grid of step * total.
+    The space is the Cartesian product of the sites.
+
+    Examples
+    --------
+    (Ba, Sr)1 (Fe, Co)2 As2 on a 0.05 grid, quaternary only:
+    >>> space = composition_space(
+    ...     [(['Ba', 'Sr'], 1), (['Fe', 'Co'], 2), (['As'], 2)],
+    ...     step=0.05,
+    ...     number_of_elements=(4, 4)
+    ... )
+    >>> len(space), space.count()
+    (441, 76)
+
+    '''
+
+    def __init__(self, sites, step=0.05, number_of_elements=None, constraint=None):
+        '''
+        sites : list
+            (elements, total) or (elements, total, step) for each site.
+        step : float, optional
+            Default grid step, as a fraction of the total of a site. The default is 0.05.
+        number_of_elements : tuple, optional
+            (min, max) number of elements present. The default is None.
+        constraint : callable, optional
+            constraint(contents) -> boolean mask of the rows to keep,
+            contents being a chunk of compositions x elements (in the order of element_list).
+
+        '''
+
+        self.sites = []
+        for site in sites:
+            elements, total = site[0], site[1]
+            _step = site[2] if len(site) > 2 else step
+            for e in elements:
+                if e not in element_list:
+                    raise ValueError('unknown element: ' + str(e))
+            self.sites.append((list(elements), float(total), self._grid(len(elements), _step)))
+
+        # decimals writing every content of the grid (e.g. 3 for a 0.001 step), 10 at most
+        values = np.concatenate([np.unique(grid) * total for _, total, grid in self.sites])
+        self._decimals = next(
+            (d for d in range(10) if np.allclose(np.round(values, d), values, rtol=0, atol=1e-9)), 10
+        )
+
+        self.number_of_elements = number_of_elements
+        self.constraint = constraint
+        self._sizes = [len(grid) for _, _, grid in self.sites]
+        self.elements = sorted(
+            {e for elements, _, _ in self.sites for e in elements},
+            key=element_list.index
+        )
+
+    @staticmethod
+    def _grid(n, step):
+        # all fractions (multiples of step) of n elements adding up to 1
+        units = int(round(1 / step))
+        grid = [
+            c for c in itertools.product(range(units + 1), repeat=n - 1)
+            if sum(c) <= units
+        ]
+        grid = np.array(grid, dtype='float64').reshape(len(grid), n - 1)
+        grid = np.hstack([grid, units - grid.sum(axis=1, keepdims=True)])
+        return grid / units
+
+    def __len__(self):
+        '''
+        Size of the grid, before the constraints.
+
+        '''
+
+        return int(np.prod(self._sizes))
+
+    def chunks(self, chunk_size=65536):
+        '''
+        Enumerating the compositions in chunks.
+
+        Yields
+        ------
+        contents : ndarray
+            compositions x elements (in the order of element_list), 0 if absent,
+            the rows meeting the constraints only.
+
+        '''
+
+        columns = [[element_list.index(e) for e in elements] for elements, _, _ in self.sites]
+
+        for start in range(0, len(self), chunk_size):
+            flat = np.arange(start, min(start + chunk_size, len(self)))
+            positions = np.unravel_index(flat, self._sizes)
+
+            contents = np.zeros((len(flat), len(element_list)), dtype='float64')
+            for (elements, total, grid), cols, pos in zip(self.sites, columns, positions):
+                for j, col in enumerate(cols):
+                    contents[:, col] += grid[pos, j] * total
+
+            keep = np.ones(len(flat), dtype=bool)
+            if self.number_of_elements is not None:
+                n = (contents > 0).sum(axis=1)
+                keep &= (n >= self.number_of_elements[0]) & (n <= self.number_of_elements[1])
+            if self.constraint is not None:
+                keep &= np.asarray(self.constraint(contents), dtype=bool)
+
+            yield contents[keep]
+
+    def count(self):
+        '''
+        Number of compositions meeting the constraints.
+
+        '''
+
+        return sum(len(c) for c in self.chunks())
+
+    def formulas(self, contents):
+        '''
+        Chemical formulas of rows of contents, e.g. 'Ba0.6Sr0.4Fe2As2',
+        the contents written with the decimals of the grid (without trailing zeros).
+
+        '''
+
+        columns = [element_list.index(e) for e in self.elements]
+        return [
+            ''.join(e + self._number(c) for e, c in zip(self.elements, row) if c > 0)
+            for row in np.round(contents[:, columns], self._decimals)
+        ]
+
+    def _number(self, c):
+        # fixed decimals, never an exponent ('1e-05')
+        text = '{:.{}f}'.format(c, self._decimals)
+        return text.rstrip('0').rstrip('.') if '.' in text else text
+
+
+@verbose_option
+@instrument.stage('screening.screen')
+def screen(space, model, k=100, features=None, largest=True, chunk_size=65536):
+    '''
+    Featurizing and scoring all compositions of a space, keeping the top k.
+
+    Compositions flow as arrays from the enumerator through the featurizer
+    (feature_design.get_feature_array) to the model, chunk by chunk,
+    only the elemental attributes needed by the requested features are computed,
+    and chemical formulas are written for the top k only.
+
+    Parameters
+    ----------
+    space : composition_space
+        The compositions to screen.
+    model : callable
+        model(X) -> scores, X being compositions x features (in the order of features).
+        e.g. a fitted regressor's predict.
+    k : int, optional
+        Number of compositions to keep. The default is 100.
+    features : list, optional
+        Feature names the model takes, e.g. list(df_selected_features.columns).
+        The default is None (all 3528 features).
+    largest : bool, optional
+        Keep the highest scores (else the lowest). The default is True.
+    chunk_size : int, optional
+        Number of compositions per chunk. The default is 65536.
+
+    Returns
+    -------
+    df_top : DataFrame
+        chemical formulas as index, 'score' and the contents of the elements of the space as columns,
+        in descending (or ascending) order of score.
+        The compositions the model scores nan are left out (so there may be fewer than k).
+
+    '''
+
+    print('\n  screening', len(space), 'compositions ...') if is_verbose(_print) else 0
+
+    if features is None:
+        attributes = None
+    else:
+        attributes = list(dict.fromkeys(f.rsplit('.', 1)[0] for f in features))
+    attributes, attribute_array = feature_design.elemental_attributes(attributes)
+
+    names = feature_design.feature_names(attributes)
+    if features is None:
+        columns = slice(None)
+    else:
+        position = {f: i for i, f in enumerate(names)}
+        columns = np.array([position[f] for f in features])
+
+    sign = 1 if largest else -1
+    top_scores = np.empty(0)
+    top_contents = np.empty((0, len(element_list)))
+
+    n_chunks = int(np.ceil(len(space) / chunk_size))
+    n_screened = 0
+    for i, contents in enumerate(space.chunks(chunk_size)):
+        n_screened += len(contents)
+        if len(contents):
+            X = feature_design.get_feature_array(contents, attribute_array)[:, columns]
+            scores = sign * np.asarray(model(X), dtype='float64').ravel()
+            scored = ~np.isnan(scores)
+            if not scored.all():
+                scores, contents = scores[scored], contents[scored]
+
+            # bounded: merge the chunk into the current top k
+            top_scores = np.concatenate([top_scores, scores])
+            top_contents = np.concatenate([top_contents, contents])
+            if len(top_scores) > k:
+                best = np.argpartition(-top_scores, k - 1)[:k]
+                top_scores, top_contents = top_scores[best], top_contents[best]
+        progressbar(i + 1, n_chunks) if is_verbose(_print) else 0
+
+    instrument.count('screening.compositions', n_screened)
+
+    order = np.argsort(-top_scores, kind='stable')
+    top_scores, top_contents = top_scores[order], top_contents[order]
+
+    columns = [element_list.index(e) for e in space.elements]
+    df_top = pd.DataFrame(
+        top_contents[:, columns],
+        index=space.formulas(top_contents),
+        columns=space.elements
+    )
+    df_top.insert(0, 'score', sign * top_scores)
+
+    print(' ', n_screened, 'compositions screened.') if is_verbose(_print) else 0
+    print('  Done.') if is_verbose(_print) else 0
+
+    return df_top
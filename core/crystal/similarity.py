@@ -0,0 +1,329 @@
+# coding: utf-8
+# Copyright (c) pytmge Development Team.
+
+"""
+Nearest-neighbour search over compositions or features.
+    similarity_index
+
+"""
+
+
+import numpy as np
+import pandas as pd
+
+from pytmge.core import element_list, instrument, _print
+from pytmge.core import verbose_option, is_verbose
+from pytmge.core.crystal.data_preparation import composition
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:  # brute force without scipy
+    cKDTree = None
+
+
+__author__ = 'Yang LIU'
+__maintainer__ = 'Yang LIU'
+__email__ = 'l_young@live.cn'
+__version__ = '1.0'
+__date__ = '2022/3/18'
+
+
+class similarity_index:
+    '''
+    A KD-tree over composition vectors (or feature vectors),
+    answering batched k-nearest-neighbour and radius queries
+    under 'l1', 'l2' or 'cosine' distance.
+
+    Only the dimensions used by at least one indexed vector are put in the tree,
+    the part of a query outside them is added back to the distances exactly.
+
+    Examples
+    --------
+    >>> index = similarity_index.from_composition(dataset.chemical_formulas.composition, metric='l1')
+    >>> distances, formulas = index.query(['Ba0.6K0.4Fe2As2', 'Mg1B2'], k=5)
+    >>> index.save('composition_index.npz')
+    >>> index = similarity_index.load('composition_index.npz')
+
+    '''
+
+    metrics = ('l1', 'l2', 'cosine')
+    _block_memory = 2**26  # bytes of the temporaries of a brute-force search (without scipy)
+
+    @verbose_option
+    def __init__(self, vectors, labels, columns, metric='l2', normalize=False, center=None, scale=None):
+        '''
+        vectors : ndarray
+            n x d, one row per entry.
+        labels : list
+            n labels (e.g. chemical formulas).
+        columns : list
+            d names of the dimensions (e.g. elements or features).
+        metric : str, optional
+            'l1', 'l2' or 'cosine'. The default is 'l2'.
+        normalize : bool, optional
+            Whether vectors (and queries) are normalized to a sum of 1,
+            e.g. elemental contents to fractions. The default is False.
+        center, scale : ndarray, optional
+            Standardization applied to vectors (and queries), (x - center) / scale.
+
+        '''
+
+        if metric not in self.metrics:
+            raise ValueError('unknown metric: ' + str(metric))
+
+        self.metric = metric
+        self.normalize = normalize
+        self.columns = list(columns)
+        self.labels = np.asarray(labels)
+        self.center = None if center is None else np.asarray(center, dtype='float64')
+        self.scale = None if scale is None else np.asarray(scale, dtype='float64')
+
+        vectors = self._prepare(np.asarray(vectors, dtype='float64'))
+        self._used = np.flatnonzero(np.any(vectors != 0, axis=0))
+        self._vectors = np.ascontiguousarray(vectors[:, self._used])
+        self._tree = None if cKDTree is None else cKDTree(self._vectors)
+
+        print('  similarity index:', self._vectors.shape[0], 'entries,',
+              len(self._used), 'of', len(self.columns), 'dimensions used.') if is_verbose(_print) else 0
+
+    @classmethod
+    @verbose_option
+    def from_composition(cls, composition, metric='l1', normalize=True):
+        '''
+        Index of composition vectors.
+
+        Parameters
+        ----------
+        composition : composition or DataFrame
+            a composition object (e.g. data_set(...).chemical_formulas.composition)
+            or its df (chemical formulas as index, elements as columns).
+        metric : str, optional
+            The default is 'l1'.
+        normalize : bool, optional
+            Compare elemental fractions rather than contents. The default is True.
+
+        '''
+
+        df = composition.df if hasattr(composition, 'df') else composition
+        return cls(df.to_numpy(dtype='float64', na_value=0), list(df.index), list(df.columns),
+                   metric=metric, normalize=normalize)
+
+    @classmethod
+    @verbose_option
+    def from_features(cls, df_features, columns=None, metric='l2', standardize=True):
+        '''
+        Index of feature vectors.
+
+        Parameters
+        ----------
+        df_features : DataFrame
+            Usable (or selected) features, chemical formulas as index.
+        columns : list, optional
+            Features to use. The default is None (all).
+        metric : str, optional
+            The default is 'l2'.
+        standardize : bool, optional
+            Scale each feature to zero mean and unit variance. The default is True.
+
+        '''
+
+        if columns is not None:
+            df_features = df_features.loc[:, columns]
+        X = df_features.to_numpy(dtype='float64')
+        center = scale = None
+        if standardize:
+            center = X.mean(axis=0)
+            scale = X.std(axis=0)
+            scale[scale == 0] = 1
+        return cls(X, list(df_features.index), list(df_features.columns),
+                   metric=metric, center=center, scale=scale)
+
+    def _prepare(self, X):
+        if self.center is not None:
+            X = (X - self.center) / self.scale
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if self.normalize:
+                X = X / X.sum(axis=1, keepdims=True)
+            if self.metric == 'cosine':
+                X = X / np.linalg.norm(X, axis=1, keepdims=True)
+        return np.nan_to_num(X)
+
+    def vectors(self, queries):
+        '''
+        Query vectors from chemical formulas, a DataFrame or an array.
+
+        '''
+
+        if isinstance(queries, pd.DataFrame):
+            return queries.reindex(columns=self.columns).to_numpy(dtype='float64', na_value=0)
+        queries = np.asarray(queries)
+        if queries.dtype.kind in 'OUS':
+            if self.columns != element_list:
+                raise ValueError('chemical formulas can only query a composition index.')
+            df = composition(list(queries)).df
+            return df.to_numpy(dtype='float64', na_value=0)
+        return np.atleast_2d(queries.astype('float64'))
+
+    def _split(self, queries):
+        # the part in the indexed dimensions, and the norm of the rest
+        X = self._prepare(self.vectors(queries))
+        rest = np.delete(X, self._used, axis=1)
+        X = np.ascontiguousarray(X[:, self._used])
+        if self.metric == 'l1':
+            extra = np.abs(rest).sum(axis=1)
+        else:
+            extra = np.linalg.norm(rest, axis=1)
+        return X, extra
+
+    def _p(self):
+        return 1 if self.metric == 'l1' else 2
+
+    def _distance(self, d, extra):
+        # distance in the indexed dimensions -> full distance
+        if self.metric == 'l1':
+            d = d + extra
+        else:
+            d = np.sqrt(d ** 2 + extra ** 2)
+        if self.metric == 'cosine':
+            d = d ** 2 / 2  # 1 - cos, for unit vectors
+        return d
+
+    def _radius(self, r, extra):
+        # full distance -> radius in the indexed dimensions (nan if unreachable)
+        if self.metric == 'cosine':
+            r = np.sqrt(2 * r)
+        with np.errstate(invalid='ignore'):
+            if self.metric == 'l1':
+                return np.where(r >= extra, r - extra, np.nan)
+            return np.sqrt(r ** 2 - extra ** 2)
+
+    @verbose_option
+    @instrument.stage('similarity_index.query')
+    def query(self, queries, k=5):
+        '''
+        k nearest neighbours of each query.
+
+        Parameters
+        ----------
+        queries : list, DataFrame or ndarray
+            Chemical formulas (composition index only), or vectors.
+        k : int, optional
+            The default is 5.
+        verbose : bool, optional
+            Messages of this call (e.g. of parsing chemical formulas) on or off.
+            The default is None (_print of the module).
+
+        Returns
+        -------
+        distances : ndarray
+            n_queries x k, ascending.
+        labels : ndarray
+            n_queries x k, labels of the neighbours.
+
+        '''
+
+        X, extra = self._split(queries)
+        k = min(k, len(self.labels))
+        if self._tree is not None:
+            d, i = self._tree.query(X, k=k, p=self._p(), workers=-1)
+            d, i = d.reshape(len(X), k), i.reshape(len(X), k)
+        else:
+            d, i = self._brute_force(X, k)
+        return self._distance(d, extra[:, None]), self.labels[i]
+
+    @verbose_option
+    @instrument.stage('similarity_index.query_radius')
+    def query_radius(self, queries, r):
+        '''
+        All neighbours within distance r of each query.
+
+        Returns
+        -------
+        neighbours : list
+            For each query, a tuple (distances, labels), ascending.
+
+        '''
+
+        X, extra = self._split(queries)
+        radius = self._radius(r, extra)
+        neighbours = []
+        for x, e, rr in zip(X, extra, radius):
+            if np.isnan(rr):
+                i = np.empty(0, dtype='int64')
+            elif self._tree is not None:
+                i = np.asarray(self._tree.query_ball_point(x, rr, p=self._p()), dtype='int64')
+            else:
+                i = np.flatnonzero(self._raw_distance(x[None, :])[0] <= rr)
+            d = self._distance(self._raw_distance(x[None, :], i)[0], e)
+            order = np.argsort(d, kind='stable')
+            neighbours.append((d[order], self.labels[i[order]]))
+        return neighbours
+
+    def _raw_distance(self, X, i=None):
+        V = self._vectors if i is None else self._vectors[i]
+        if self.metric == 'l1':
+            # by blocks of queries, the differences (rows x n x d) staying within _block_memory
+            rows = max(1, self._block_memory // (8 * max(1, V.shape[0] * V.shape[1])))
+            return np.concatenate([
+                np.abs(X[s:s + rows, None, :] - V[None, :, :]).sum(axis=2) for s in range(0, max(1, len(X)), rows)
+            ])
+        # |x|^2 - 2 x.v + |v|^2, without the differences
+        d = X @ V.T
+        d *= -2
+        d += (X ** 2).sum(axis=1)[:, None]
+        d += (V ** 2).sum(axis=1)
+        np.maximum(d, 0, out=d)
+        return np.sqrt(d, out=d)
+
+    def _brute_force(self, X, k):
+        n, d = self._vectors.shape
+        # queries per block: the distances (and, for l1, the differences) within _block_memory
+        chunk = max(1, self._block_memory // (8 * n * (d if self.metric == 'l1' else 2)))
+        D, I = [], []
+        for s in range(0, len(X), chunk):
+            dist = self._raw_distance(X[s:s + chunk])
+            if k < n:
+                # the k nearest of each row, then sorted (by distance, then position)
+                i = np.argpartition(dist, k - 1, axis=1)[:, :k]
+                i.sort(axis=1)
+                order = np.argsort(np.take_along_axis(dist, i, axis=1), axis=1, kind='stable')
+                i = np.take_along_axis(i, order, axis=1)
+            else:
+                i = np.argsort(dist, axis=1, kind='stable')
+            D.append(np.take_along_axis(dist, i, axis=1))
+            I.append(i)
+        return np.concatenate(D), np.concatenate(I)
+
+    def save(self, path):
+        '''
+        Save the index to an .npz file. The tree is rebuilt when loading.
+
+        '''
+
+        np.savez(
+            path,
+            vectors=self._vectors,
+            used=self._used,
+            labels=self.labels,
+            columns=np.asarray(self.columns),
+            metric=self.metric,
+            normalize=self.normalize,
+            center=np.empty(0) if self.center is None else self.center,
+            scale=np.empty(0) if self.scale is None else self.scale,
+        )
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            index = cls.__new__(cls)
+            index.metric = str(data['metric'])
+            index.normalize = bool(data['normalize'])
+            index.columns = data['columns'].tolist()
+            index.labels = data['labels']
+            index.center = data['center'] if data['center'].size else None
+            index.scale = data['scale'] if data['scale'].size else None
+            index._used = data['used']
+            index._vectors = data['vectors']
+        index._tree = None if cKDTree is None else cKDTree(index._vectors)
+        return index
@@ -0,0 +1,185 @@
+# coding: utf-8
+# Copyright (c) pytmge Development Team.
+
+"""
+Saving and loading composition and feature matrices in binary columnar formats.
+
+Supported formats (chosen by file extension, or by the format argument):
+    'parquet' : Apache Parquet (needs pyarrow), compressed, column projection on read.
+    'arrow'   : Arrow IPC / Feather v2 (needs pyarrow), uncompressed, memory-mapped, zero-copy.
+    'npy'     : raw float64 NumPy array in column-major order,
+                plus a '.manifest.json' file holding the index and column names.
+                Memory-mapped, no extra dependency.
+
+"""
+
+
+import os
+import json
+import numpy as np
+import pandas as pd
+
+
+__author__ = 'Yang LIU'
+__maintainer__ = 'Yang LIU'
+__email__ = 'l_young@live.cn'
+__version__ = '1.0'
+__date__ = '2022/3/18'
+
+
+_formats = {
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.arrow': 'arrow',
+    '.feather': 'arrow',
+    '.ipc': 'arrow',
+    '.npy': 'npy',
+}
+
+
+def _get_format(path, format):
+    if format is None:
+        format = _formats.get(os.path.splitext(str(path))[1].lower())
+    if format not in ('parquet', 'arrow', 'npy'):
+        raise ValueError('unknown format of ' + str(path) + ', use one of parquet, arrow, npy.')
+    return format
+
+
+def _manifest_path(path):
+    return os.path.splitext(str(path))[0] + '.manifest.json'
+
+
+def save_matrix(df, path, format=None, compression='snappy'):
+    '''
+    Save a composition or feature matrix.
+
+    Parameters
+    ----------
+    df : DataFrame
+        chemical formulas as index, elements or features as columns.
+    path : str
+        File path, the extension decides the format if format is None.
+    format : str, optional
+        'parquet', 'arrow' or 'npy'. The default is None.
+    compression : str, optional
+        Compression of parquet files. The default is 'snappy'.
+        Arrow and npy files are always uncompressed, so that they can be memory-mapped.
+
+    Returns
+    -------
+    path : str
+        path.
+
+    '''
+
+    format = _get_format(path, format)
+
+    if format == 'parquet':
+        df.to_parquet(path, compression=compression)
+
+    elif format == 'arrow':
+        import pyarrow as pa
+        import pyarrow.feather as feather
+        table = pa.Table.from_pandas(df, preserve_index=True)
+        feather.write_feather(table, path, compression='uncompressed')
+
+    else:
+        # column-major, so that each feature is contiguous on disk.
+        np.save(path, np.asfortranarray(df.to_numpy(dtype='float64')))
+        manifest = {
+            'index': df.index.tolist(),
+            'index_name': df.index.name,
+            'columns': [str(c) for c in df.columns],
+        }
+        with open(_manifest_path(path), 'w') as _f:
+            json.dump(manifest, _f)
+
+    return path
+
+
+def load_matrix(path, columns=None, format=None, memory_map=True, as_frame=True):
+    '''
+    Load a composition or feature matrix saved by save_matrix.
+
+    Only the requested columns are read.
+    With memory_map=True, 'arrow' and 'npy' files are mapped rather than read,
+    the pages of unselected columns are never touched.
+
+    Parameters
+    ----------
+    path : str
+        File path.
+    columns : list, optional
+        Names of the columns to load. The default is None (all columns).
+    format : str, optional
+        'parquet', 'arrow' or 'npy'. The default is None (by file extension).
+    memory_map : bool, optional
+        The default is True.
+    as_frame : bool, optional
+        If False, return (array, index, columns) instead of a DataFrame.
+        For 'npy' files with all columns or a contiguous run of columns,
+        the array is a read-only view on the mapped file (zero copy).
+        The default is True.
+
+    Returns
+    -------
+    df : DataFrame
+        chemical formulas as index.
+    or (array, index, columns) : tuple
+        when as_frame is False.
+
+    '''
+
+    format = _get_format(path, format)
+
+    if format == 'parquet':
+        import pyarrow.parquet as pq
+        table = pq.read_table(path, columns=_with_index_columns(pq.read_schema(path), columns), memory_map=memory_map)
+        df = table.to_pandas(split_blocks=True)
+
+    elif format == 'arrow':
+        import pyarrow as pa
+        import pyarrow.ipc as ipc
+        source = pa.memory_map(path, 'r') if memory_map else pa.OSFile(path, 'rb')
+        table = ipc.open_file(source).read_all()
+        if columns is not None:
+            table = table.select(_with_index_columns(table.schema, columns))
+        # split_blocks: each column keeps pointing at its own (mapped) buffer.
+        df = table.to_pandas(split_blocks=True)
+
+    else:
+        with open(_manifest_path(path), 'rt') as _f:
+            manifest = json.load(_f)
+        array = np.load(path, mmap_mode='r' if memory_map else None)
+        all_columns = manifest['columns']
+        index = pd.Index(manifest['index'], name=manifest['index_name'])
+        if columns is not None:
+            position = {c: i for i, c in enumerate(all_columns)}
+            positions = [position[c] for c in columns]
+            if positions and positions == list(range(positions[0], positions[0] + len(positions))):
+                array = array[:, positions[0]:positions[-1] + 1]  # a view
+            else:
+                array = array[:, positions]  # copies the selected columns only
+            all_columns = list(columns)
+        if not as_frame:
+            return array, index, all_columns
+        df = pd.DataFrame(array, index=index, columns=all_columns, copy=False)
+        return df
+
+    if not as_frame:
+        return df.to_numpy(), df.index, list(df.columns)
+
+    return df
+
+
+def _with_index_columns(schema, columns):
+    '''
+    Adding the stored index column(s) to a column projection.
+
+    '''
+
+    if columns is None:
+        return None
+    metadata = schema.pandas_metadata or {}
+    index_columns = [c for c in metadata.get('index_columns', []) if isinstance(c, str)]
+    return list(columns) + [c for c in index_columns if c not in columns]
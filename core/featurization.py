@@ -0,0 +1,247 @@
+# coding: utf-8
+# Copyright (c) pytmge Development Team.
+
+"""
+The array-based engine shared by crystal and molecule:
+formulas -> contents (compounds x elements) -> features (compounds x (attributes * 7)).
+    split_formulas
+    elemental_attributes
+    feature_names
+    get_feature_array
+
+No loop over the compounds in Python, neither in parsing nor in featurization.
+
+"""
+
+
+import os
+import functools
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # pandas string methods without pyarrow
+    pa = pc = None
+
+from pytmge.core import elemental_data, element_list
+
+
+__author__ = 'Yang LIU'
+__maintainer__ = 'Yang LIU'
+__email__ = 'l_young@live.cn'
+__version__ = '1.0'
+__date__ = '2022/3/18'
+
+
+# an element symbol (longest first, so 'Fe' is not read as 'F')
+element_pattern = '(?:' + '|'.join(sorted(element_list, key=len, reverse=True)) + ')'
+
+# the 7 math operators of compounds, in the order of the feature columns.
+math_operators = {
+    'sum': 'sum(x)',
+    'avg': 'sum(x)/N',
+    'wavg': 'sum(w*x)/sum(w)',
+    'max': 'max(x)',
+    'min': 'min(x)',
+    'range': 'max(x)-min(x)',
+    'std': '(sum((x-wavg)**2)/N)**(1/2)'
+}
+
+
+def split_formulas(formulas, content_pattern, default_content=None):
+    '''
+    Checking formulas and splitting them into (element, content) pairs, in bulk
+    (pyarrow's compute kernels, or pandas' string methods without pyarrow).
+
+    A formula is in proper format if it is a sequence of element symbols,
+    each followed by a content matching content_pattern
+    (or by no content, if default_content is given).
+
+    Parameters
+    ----------
+    formulas : Index, Series or list
+        Formulas.
+    content_pattern : str
+        Regular expression of a content, e.g. r'[0-9]+'.
+    default_content : str, optional
+        Content of an element written without one, e.g. '1' for 'H2O'.
+        The default is None (contents are mandatory).
+
+    Returns
+    -------
+    is_proper : ndarray
+        Boolean, one per formula.
+    rows : ndarray
+        The formula of each pair (its position in formulas).
+    columns : ndarray
+        The element of each pair (its position in element_list).
+    contents : Series
+        The content of each pair, as a string (with default_content filled in).
+
+    '''
+
+    optional = '?' if default_content is not None else ''
+    formula_pattern = '(?:' + element_pattern + '(?:' + content_pattern + ')' + optional + ')+'
+
+    if pa is not None:
+        try:
+            array = pa.array(formulas, type=pa.string(), from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):  # not all strings
+            array = pa.array([f if isinstance(f, str) else None for f in formulas], type=pa.string())
+        is_proper = pc.fill_null(pc.match_substring_regex(array, '^' + formula_pattern + '$'), False)
+        is_proper = is_proper.to_numpy(zero_copy_only=False)
+        if not is_proper.any():
+            return is_proper, np.zeros(0, dtype='int64'), np.zeros(0, dtype='int64'), pd.Series([], dtype='str')
+        proper = array.filter(pa.array(is_proper))
+
+        if default_content is None:
+            # elements: the pieces between the contents
+            elements = pc.split_pattern_regex(proper, content_pattern)
+        else:
+            # elements: contents removed, then one separator after each symbol (adjacent symbols as in 'CH4')
+            symbols = pc.replace_substring_regex(proper, content_pattern, '')
+            symbols = pc.replace_substring_regex(symbols, '(' + element_pattern + ')', '\\1 ')
+            elements = pc.split_pattern(symbols, ' ')
+        # contents: the pieces between the symbols, the piece before the first symbol being empty
+        numbers = pc.list_slice(pc.split_pattern_regex(proper, element_pattern), 1)
+
+        rows = np.flatnonzero(is_proper)[pc.list_parent_indices(numbers).to_numpy()]
+        columns = pc.index_in(pc.list_flatten(elements), value_set=pa.array(element_list + ['']))
+        columns = columns.to_numpy(zero_copy_only=False)
+        columns = columns[columns < len(element_list)].astype('int64')  # the empty piece at the end
+        contents = pc.list_flatten(numbers).to_pandas()
+    else:
+        formulas = np.asarray(formulas, dtype=object)
+        ds_formulas = pd.Series(formulas).astype('str')
+        is_proper = ds_formulas.str.fullmatch(formula_pattern).fillna(False).to_numpy(dtype=bool) & ~pd.isnull(formulas)
+        if not is_proper.any():
+            return is_proper, np.zeros(0, dtype='int64'), np.zeros(0, dtype='int64'), pd.Series([], dtype='str')
+        df_parts = ds_formulas[is_proper].str.extractall('(' + element_pattern + ')(' + content_pattern + ')' + optional)
+        rows = df_parts.index.get_level_values(0).to_numpy()
+        columns = pd.Categorical(df_parts[0], categories=element_list).codes.astype('int64')
+        contents = df_parts[1].fillna('')
+
+    if default_content is not None:
+        contents = contents.where(contents != '', default_content)
+
+    return is_proper, rows, columns, contents
+
+
+@functools.lru_cache(maxsize=None)
+def _orbital_attributes_of_elements():
+    dict_oa = elemental_data().orbital_attributes_of_elements
+    return pd.DataFrame.from_dict(dict_oa, orient='index')
+
+
+def elemental_attributes(attributes=None):
+    '''
+    Elemental attributes as an array.
+
+    Parameters
+    ----------
+    attributes : list, optional
+        Names of elemental attributes, '[attribute].[shell_selection].[math operator 1]'.
+        The default is None (all of them).
+
+    Returns
+    -------
+    attributes : list
+        Names of the elemental attributes.
+    attribute_array : ndarray
+        elements (in the order of element_list) x attributes, nan if not available.
+
+    '''
+
+    df_orbital_attributes_of_elements = _orbital_attributes_of_elements()
+    if attributes is None:
+        attributes = list(df_orbital_attributes_of_elements.index)
+    attribute_array = df_orbital_attributes_of_elements.loc[attributes, element_list].to_numpy(dtype='float64').T
+    return list(attributes), np.ascontiguousarray(attribute_array)
+
+
+def feature_names(attributes):
+    return [a + '.' + o for a in attributes for o in math_operators]
+
+
+def get_feature_array(contents, attribute_array, chunk_size=4096, out=None, n_jobs=1):
+    '''
+    Calculating features from an array of elemental contents.
+
+    For each compound (row) and each elemental attribute,
+    the 7 math operators are applied to the attribute values of the elements present,
+    elements whose attribute value is empty are ignored
+    (all 7 features are empty if no element has a value).
+    Features are rounded to 6 decimals.
+
+    Parameters
+    ----------
+    contents : ndarray
+        compounds x elements (in the order of element_list), 0 or nan if absent,
+        fractions (crystals) or integer counts (molecules).
+    attribute_array : ndarray
+        elements x attributes, see elemental_attributes().
+    chunk_size : int, optional
+        Number of rows computed at a time. The default is 4096.
+    out : ndarray, optional
+        compounds x (attributes * 7) array to write into.
+    n_jobs : int, optional
+        Number of threads sharing the chunks, -1 for one per CPU. The default is 1.
+
+    Returns
+    -------
+    features : ndarray
+        compounds x (attributes * 7), the 7 operators of each attribute next to each other
+        (in the order of math_operators).
+
+    '''
+
+    n = contents.shape[0]
+    n_attributes = attribute_array.shape[1]
+    n_operators = len(math_operators)
+    if out is None:
+        out = np.empty((n, n_attributes * n_operators), dtype='float64')
+    view = out.reshape(n, n_attributes, n_operators)
+
+    def _chunk(s):
+        c = np.nan_to_num(np.asarray(contents[s:s + chunk_size], dtype='float64'))
+        present = c > 0
+
+        # the present elements of each row, packed to the left
+        k = max(int(present.sum(axis=1).max(initial=0)), 1)
+        idx = np.argsort(~present, axis=1, kind='stable')[:, :k]
+        is_present = np.take_along_axis(present, idx, axis=1)
+        w = np.take_along_axis(c, idx, axis=1) * is_present
+
+        V = attribute_array[idx]  # rows x k x attributes
+        valid = is_present[:, :, None] & ~np.isnan(V)
+        V0 = np.where(valid, V, 0)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            N = valid.sum(axis=1)
+            empty = N == 0
+            _sum = V0.sum(axis=1)
+            _avg = _sum / N
+            # summed in an order not depending on k, so a row gives the same values in any chunk
+            _wavg = (V0 * w[:, :, None]).sum(axis=1) / c.sum(axis=1)[:, None]
+            _max = np.where(valid, V, -np.inf).max(axis=1)
+            _min = np.where(valid, V, np.inf).min(axis=1)
+            _std = np.sqrt((np.where(valid, V - _avg[:, None, :], 0) ** 2).sum(axis=1) / N)
+
+        v = view[s:s + chunk_size]
+        for i, x in enumerate((_sum, _avg, _wavg, _max, _min, _max - _min, _std)):
+            x[empty] = np.nan
+            v[:, :, i] = np.round(x, 6)
+
+    starts = range(0, n, chunk_size)
+    if n_jobs == 1 or len(starts) < 2:
+        for s in starts:
+            _chunk(s)
+    else:
+        # the chunks write to disjoint rows of out, and NumPy releases the GIL in the heavy parts.
+        with ThreadPoolExecutor(max_workers=n_jobs if n_jobs > 0 else os.cpu_count()) as executor:
+            list(executor.map(_chunk, starts))
+
+    return out
@@ -1,8 +1,13 @@
-# coding: utf-8
-# Copyright (c) pytmge Development Team.
-
-"""
-This package contains modules and classes
-for machine learning to predict molecules.
-
-"""
+# coding: utf-8
+# Copyright (c) pytmge Development Team.
+
+"""
+This package contains modules and classes
+for machine learning to predict molecules.
+
+"""
+
+
+from pytmge.core.molecule.data_preparation import parse_molecular_formulas, molecular_formulas
+
+from pytmge.core.molecule.feature_design import feature_design
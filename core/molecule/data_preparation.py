@@ -0,0 +1,102 @@
+# coding: utf-8
+# Copyright (c) pytmge Development Team.
+
+'''
+Classes for data preparation of molecules.
+    parse_molecular_formulas
+    molecular_formulas
+
+'''
+
+import numpy as np
+import pandas as pd
+
+from pytmge.core import element_list, instrument, _print
+from pytmge.core import verbose_option, is_verbose
+from pytmge.core.featurization import split_formulas
+
+
+__author__ = 'Yang LIU'
+__maintainer__ = 'Yang LIU'
+__email__ = 'l_young@live.cn'
+__version__ = '1.0'
+__date__ = '2022/3/18'
+
+
+# the count of an element, a positive integer, 1 if not written (as in 'H2O' or 'CH4')
+_count_pattern = r'[1-9][0-9]*'
+
+
+def parse_molecular_formulas(formulas):
+    '''
+    Checking and parsing molecular formulas in bulk, with vectorized string operations
+    (see pytmge.core.featurization.split_formulas),
+    no loop over the molecular formulas in Python.
+
+    A molecular formula is in proper format if it is a sequence of element symbols,
+    each followed by a positive integer count or by nothing (a count of 1),
+    e.g. 'H2O', 'CH4' or 'C6H12O6' (Hill notation).
+    Zero counts ('H0O'), charges, dots and brackets are NOT ok.
+    Unlike chemical formulas of crystals, counts adding up to 100 are counts (not percents).
+
+    Parameters
+    ----------
+    formulas : Index, Series or list
+        Molecular formulas.
+
+    Returns
+    -------
+    is_proper : ndarray
+        Boolean, one per molecular formula.
+    counts : ndarray
+        molecular formulas x elements (in the order of element_list), integers, 0 if absent
+        (all 0 for the molecular formulas not in proper format).
+
+    '''
+
+    n = len(formulas)
+    counts = np.zeros((n, len(element_list)), dtype='int64')
+
+    is_proper, rows, columns, numbers = split_formulas(formulas, _count_pattern, default_content='1')
+    values = numbers.astype('int64').to_numpy()
+
+    # an element appearing several times in a molecular formula is summed up.
+    np.add.at(counts, (rows, columns), values)
+
+    return is_proper, counts
+
+
+class molecular_formulas:
+
+    @verbose_option
+    def __init__(self, formulas):
+        '''
+        formulas : Index, Series or list
+            Molecular formulas.
+
+        '''
+
+        self.data = pd.Index(formulas)
+        is_proper, counts = parse_molecular_formulas(self.data)
+        self._is_proper = is_proper
+        self.in_proper_format = self.data[is_proper]
+        self.counts = counts[is_proper]
+
+        instrument.count('molecular_formulas.checked', len(self.data))
+
+        print('  ' + str(len(self.data) - len(self.in_proper_format)),
+              'molecular formulas seem not right.') if is_verbose(_print) else 0
+
+    @property
+    def not_in_proper_format(self):
+        return self.data[~self._is_proper]
+
+    @property
+    def composition(self):
+        '''
+        Molecular formulas (in proper format) as index, elements as columns,
+        counts as values, 0 if absent.
+
+        '''
+
+        return pd.DataFrame(self.counts, index=self.in_proper_format, columns=element_list, copy=False)
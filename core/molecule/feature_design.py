@@ -0,0 +1,109 @@
+# coding: utf-8
+# Copyright (c) pytmge Development Team.
+
+"""
+Extracting features of molecules based on electron orbital attributes,
+with the array-based engine of crystal (see pytmge.core.featurization).
+    feature_design
+
+"""
+
+
+import numpy as np
+import pandas as pd
+
+from pytmge.core import featurization
+from pytmge.core import progressbar, instrument, _print
+from pytmge.core import verbose_option, is_verbose
+from pytmge.core.molecule.data_preparation import parse_molecular_formulas
+
+
+__author__ = 'Yang LIU'
+__maintainer__ = 'Yang LIU'
+__email__ = 'l_young@live.cn'
+__version__ = '1.0'
+__date__ = '2022/3/18'
+
+
+class feature_design:
+    '''
+    Extracting features of molecules based on electron orbital attributes:
+    the same elemental attributes and the same 7 math operators as crystal,
+    with integer counts as weights (of 'wavg').
+
+    '''
+
+    math_operators = featurization.math_operators
+    elemental_attributes = staticmethod(featurization.elemental_attributes)
+    feature_names = staticmethod(featurization.feature_names)
+    get_feature_array = staticmethod(featurization.get_feature_array)
+
+    @classmethod
+    @verbose_option
+    @instrument.stage('molecule.feature_design.get_features')
+    def get_features(self, formulas, attributes=None, batch_size=65536, n_jobs=1):
+        '''
+        Extracting features from molecular formulas.
+
+        The molecular formulas are parsed and featurized batch by batch,
+        so only one batch of counts is held at a time.
+
+        Parameters
+        ----------
+        formulas : Index, Series or list
+            Molecular formulas, e.g. 'H2O' or 'C6H12O6' (see parse_molecular_formulas).
+        attributes : list, optional
+            Names of elemental attributes. The default is None (all of them).
+        batch_size : int, optional
+            Number of molecular formulas parsed and featurized at a time. The default is 65536.
+        n_jobs : int, optional
+            Number of threads calculating the rows of a batch, -1 for one per CPU. The default is 1.
+        verbose : bool, optional
+            Messages of this call on or off. The default is None (_print of the module).
+
+        Returns
+        -------
+        df_features : DataFrame
+            features, one row per molecular formula (the first of duplicates),
+            empty for the molecular formulas not in proper format.
+
+        '''
+
+        print('\n  calculating features of molecules ...') if is_verbose(_print) else 0
+
+        attributes, attribute_array = self.elemental_attributes(attributes)
+
+        # one row per molecular formula (isomers share theirs)
+        formulas = pd.Index(formulas)
+        if formulas.has_duplicates:
+            formulas = formulas[~formulas.duplicated()]
+
+        print(len(attributes), 'attributes,', len(formulas), 'entries.') if is_verbose(_print) else 0
+
+        instrument.count('features.rows', len(formulas))
+        instrument.count('features.attributes', len(attributes))
+
+        # molecular formulas not in proper format have no element, all their features are empty.
+        features = np.empty((len(formulas), len(attributes) * len(self.math_operators)), dtype='float64')
+        n_proper = 0
+
+        batches = range(0, len(formulas), batch_size)
+        for i, b in enumerate(batches):
+            is_proper, counts = parse_molecular_formulas(formulas[b:b + batch_size])
+            self.get_feature_array(counts, attribute_array, out=features[b:b + batch_size], n_jobs=n_jobs)
+            n_proper += int(is_proper.sum())
+
+            progressbar(i + 1, len(batches)) if is_verbose(_print) else 0
+
+        print(' ', len(formulas) - n_proper, 'molecular formulas seem not right.') if is_verbose(_print) else 0
+
+        df_features = pd.DataFrame(
+            features,
+            index=formulas,
+            columns=self.feature_names(attributes),
+            copy=False
+        )
+
+        print('  Done.') if is_verbose(_print) else 0
+
+        return df_features
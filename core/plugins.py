@@ -1,19 +1,420 @@
-# coding: utf-8
-# Copyright (c) pytmge Development Team.
-
-"""
-
-"""
-
-import sys
-import math
-
-
-def progressbar(current, total):
-    if True:
-        percent = '{:.2%}'.format(current / total)
-        sys.stdout.write('\r[%-50s] %s' % ('=' * math.floor(current * 50 / total), percent))
-        sys.stdout.flush()
-        if current == total:
-            print()
-    return
+# coding: utf-8
+# Copyright (c) pytmge Development Team.
+
+"""
+Plugins.
+    progressbar
+    progress_reporter
+    fingerprint
+    source_digest
+    verbose_option
+    instrumentation
+
+"""
+
+import os
+import sys
+import math
+import time
+import hashlib
+import inspect
+import functools
+import contextvars
+import logging
+import threading
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+
+_logger = logging.getLogger('pytmge')
+_verbose = contextvars.ContextVar('pytmge_verbose', default=None)
+
+
+class progress_reporter:
+    '''
+    A progress bar that is redrawn at most max_rate times per second.
+
+    Calls in between are dropped after one clock read,
+    so it can be called on every iteration of a hot loop.
+
+    '''
+
+    def __init__(self, max_rate=10, stream=None):
+        '''
+        max_rate : float, optional
+            Maximum number of redraws per second. The default is 10.
+        stream : file-like, optional
+            Where the bar is written. The default is sys.stdout.
+
+        '''
+
+        self.max_rate = max_rate
+        self.stream = stream
+        self._interval = 1 / max_rate if max_rate else 0
+        self._last = -math.inf
+        self._lock = threading.Lock()
+
+    def __call__(self, current, total):
+        now = time.monotonic()
+        if current != total and now - self._last < self._interval:
+            return
+        with self._lock:
+            self._last = now
+            stream = self.stream or sys.stdout
+            percent = '{:.2%}'.format(current / total)
+            stream.write('\r[%-50s] %s' % ('=' * math.floor(current * 50 / total), percent))
+            if current == total:
+                stream.write('\n')
+            stream.flush()
+        return
+
+
+_progress_reporter = progress_reporter()
+
+
+def progressbar(current, total):
+    _progress_reporter(current, total)
+    return
+
+
+def fingerprint(*objects):
+    '''
+    A stable hex digest of the given objects.
+
+    DataFrames and Series are hashed by values, index and columns,
+    NumPy arrays by dtype, shape and bytes,
+    functions by qualified name, bytecode, names and constants (those of nested functions too),
+    default values and the contents of their closure cells,
+    and anything else by its repr (dicts sorted by key; the type only, for a repr showing an address).
+
+    Returns
+    -------
+    digest : str
+        40 hex characters.
+
+    '''
+
+    sha = hashlib.sha1()
+    for obj in objects:
+        _update_fingerprint(sha, obj)
+    return sha.hexdigest()
+
+
+_package_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # the pytmge package
+_source_digests = {}
+
+
+def source_digest():
+    '''
+    A hex digest of the sources of pytmge (the .py files of the package, its __init__ and version included,
+    the tests and examples excepted).
+
+    A fingerprint only covers the code of the functions given to it, not the code they call:
+    results cached under a fingerprint (see pipeline, feature_design.get_features) add this digest,
+    so any edit of pytmge invalidates them.
+    Recalculated when the size or modification time of a source file changes.
+
+    Returns
+    -------
+    digest : str
+        40 hex characters.
+
+    '''
+
+    files = []
+    for root, dirs, names in os.walk(_package_path):
+        dirs[:] = sorted(d for d in dirs if not d.startswith(('.', '_')) and d not in ('tests', 'example'))
+        files += [os.path.join(root, n) for n in sorted(names) if n.endswith('.py')]
+    stats = tuple((f, os.stat(f).st_size, os.stat(f).st_mtime_ns) for f in files)
+
+    if stats not in _source_digests:
+        sha = hashlib.sha1()
+        for f in files:
+            sha.update(os.path.relpath(f, _package_path).replace(os.sep, '/').encode())
+            with open(f, 'rb') as _f:
+                sha.update(_f.read())
+        _source_digests.clear()
+        _source_digests[stats] = sha.hexdigest()
+    return _source_digests[stats]
+
+
+def _update_fingerprint(sha, obj):
+    import numpy as np
+    import pandas as pd
+
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        sha.update(type(obj).__name__.encode())
+        sha.update(pd.util.hash_pandas_object(obj, index=True).values.tobytes())
+        if isinstance(obj, pd.DataFrame):
+            sha.update(repr(list(obj.columns)).encode())
+        else:
+            sha.update(repr(obj.name).encode())
+    elif isinstance(obj, np.ndarray):
+        sha.update((str(obj.dtype) + str(obj.shape)).encode())
+        sha.update(np.ascontiguousarray(obj).tobytes())
+    elif callable(obj) and hasattr(obj, '__code__'):
+        sha.update((obj.__module__ + '.' + obj.__qualname__).encode())
+        function = inspect.unwrap(obj)
+        _update_code(sha, function.__code__)
+        _update_fingerprint(sha, function.__defaults__)
+        _update_fingerprint(sha, function.__kwdefaults__)
+        for cell in function.__closure__ or ():
+            try:
+                contents = cell.cell_contents
+            except ValueError:  # an empty cell
+                sha.update(b'<empty cell>')
+                continue
+            if contents is obj or contents is function:  # a recursive closure
+                sha.update(b'<self>')
+            else:
+                _update_fingerprint(sha, contents)
+    elif isinstance(obj, dict):
+        for k in sorted(obj, key=repr):
+            sha.update(repr(k).encode())
+            _update_fingerprint(sha, obj[k])
+    elif isinstance(obj, (list, tuple)):
+        sha.update(type(obj).__name__.encode())
+        for o in obj:
+            _update_fingerprint(sha, o)
+    else:
+        r = repr(obj)
+        if ' at 0x' in r:  # the default repr, the address changes from a process to the next
+            r = type(obj).__module__ + '.' + type(obj).__qualname__
+        sha.update(r.encode())
+    return
+
+
+def _update_code(sha, code):
+    # bytecode, names and constants, recursing into the code of nested functions
+    sha.update(code.co_code)
+    sha.update(repr(code.co_names).encode())
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            _update_code(sha, const)
+        elif isinstance(const, frozenset):  # its repr depends on the hash seed
+            sha.update(repr(sorted(repr(c) for c in const)).encode())
+        else:
+            sha.update(repr(const).encode())
+    return
+
+
+def is_verbose(default):
+    '''
+    The verbosity of the current call (see verbose_option),
+    else default (the _print of the calling module).
+
+    '''
+
+    verbose = _verbose.get()
+    return default if verbose is None else verbose
+
+
+def verbose_option(func):
+    '''
+    Decorator adding a keyword argument verbose=None to func.
+
+    verbose=True or False switches the messages of func,
+    and of everything it calls, on or off for this call only.
+    The switch is a context variable, so concurrent calls in other threads are not affected.
+    verbose=None leaves the messages to the _print of each module.
+
+    '''
+
+    @functools.wraps(func)
+    def wrapper(*args, verbose=None, **kwargs):
+        if verbose is None:
+            return func(*args, **kwargs)
+        token = _verbose.set(bool(verbose))
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _verbose.reset(token)
+
+    return wrapper
+
+
+class instrumentation:
+    '''
+    Collecting per-stage timing spans, counters and (optionally) memory samples.
+
+    Each finished span is emitted as an event (a dict) to the registered callbacks
+    and to the 'pytmge' logger at INFO level,
+    with the counters increased during the span (in 'counters').
+    When there is no callback and the logger is not enabled for INFO,
+    span() returns a shared null context, so instrumented code costs nothing.
+
+    Examples
+    --------
+    >>> events = []
+    >>> instrument.add_callback(events.append)
+    >>> instrument.sample_memory = True
+    >>> df_features = feature_design.get_features(df_composition)
+    >>> events[-1]['name'], events[-1]['elapsed'], events[-1]['features']
+
+    '''
+
+    def __init__(self, callbacks=None, sample_memory=False, logger=_logger):
+        '''
+        callbacks : list, optional
+            Callables receiving each event dict.
+        sample_memory : bool, optional
+            If True, the traced memory (tracemalloc) at the end of each span and its peak during the span
+            are added to the events. Tracing started for a span is stopped when the outermost span ends.
+            The default is False.
+        logger : logging.Logger, optional
+            The default is logging.getLogger('pytmge').
+
+        '''
+
+        self.callbacks = list(callbacks or [])
+        self.sample_memory = sample_memory
+        self.logger = logger
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def enabled(self):
+        return bool(self.callbacks) or self.logger.isEnabledFor(logging.INFO)
+
+    def add_callback(self, callback):
+        self.callbacks.append(callback)
+        return callback
+
+    def remove_callback(self, callback):
+        self.callbacks.remove(callback)
+        return
+
+    def count(self, name, n=1):
+        '''
+        Increase a named counter by n (thread-safe).
+
+        '''
+
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+        return
+
+    def reset(self):
+        '''
+        Set all counters back to zero.
+
+        '''
+
+        with self._lock:
+            self.counters.clear()
+        return
+
+    def span(self, name, **info):
+        '''
+        Timing span of a stage.
+
+        Parameters
+        ----------
+        name : str
+            Name of the stage, e.g. 'feature_design.get_features'.
+        **info :
+            Extra fields of the event, e.g. rows=..., features=...
+            They can be updated inside the span through the yielded dict.
+
+        Returns
+        -------
+        context manager
+            Yielding the event dict (or None when instrumentation is disabled).
+
+        '''
+
+        if not self.enabled:
+            return nullcontext()
+        return self._span(name, info)
+
+    def stage(self, name):
+        '''
+        Decorator wrapping a function in a span.
+
+        If the function returns a DataFrame (or anything having .shape),
+        'rows' and 'features' are added to the event.
+
+        '''
+
+        def decorator(func):
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self._span(name, {}) as event:
+                    result = func(*args, **kwargs)
+                    shape = getattr(result, 'shape', None)
+                    if shape is not None and len(shape) == 2:
+                        event['rows'], event['features'] = shape
+                return result
+
+            return wrapper
+
+        return decorator
+
+    @contextmanager
+    def _span(self, name, info):
+        event = {'name': name}
+        event.update(info)
+
+        depth = getattr(self._local, 'depth', 0)
+        self._local.depth = depth + 1
+        with self._lock:
+            counters = dict(self.counters)
+
+        # peaks of the open spans of this thread: tracemalloc keeps a single peak,
+        # reset when a span starts, after handing it to the span enclosing it.
+        peaks = getattr(self._local, 'peaks', None)
+        if peaks is None:
+            peaks = self._local.peaks = []
+        sampled = self.sample_memory
+        started_tracing = False
+        if sampled:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            current, peak = tracemalloc.get_traced_memory()
+            if peaks:
+                peaks[-1] = max(peaks[-1], peak)
+            tracemalloc.reset_peak()
+            peaks.append(current)
+
+        start = time.perf_counter()
+        try:
+            yield event
+        finally:
+            event['elapsed'] = time.perf_counter() - start
+            event['depth'] = depth
+            self._local.depth = depth
+            with self._lock:
+                delta = {k: v - counters.get(k, 0) for k, v in self.counters.items() if v != counters.get(k, 0)}
+            if delta:
+                event['counters'] = delta
+            if sampled:
+                current, peak = tracemalloc.get_traced_memory()
+                peak = max(peaks.pop(), peak)
+                if peaks:
+                    peaks[-1] = max(peaks[-1], peak)
+                event['memory_current'], event['memory_peak'] = current, peak
+                if started_tracing:
+                    tracemalloc.stop()
+            self._emit(event)
+
+    def _emit(self, event):
+        for callback in list(self.callbacks):
+            callback(event)
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(
+                '%s: %.3f s %s',
+                event['name'],
+                event['elapsed'],
+                {k: v for k, v in event.items() if k not in ('name', 'elapsed')}
+            )
+        return
+
+
+instrument = instrumentation()
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+"""
+Throughput of molecule featurization (formulas -> features),
+against crystal featurization of example.csv with the same engine.
+
+    python benchmark_molecule.py --n 100000 --attributes 72
+
+"""
+
+
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+from pytmge.core.crystal import data_set
+from pytmge.core.crystal import feature_design as crystal_feature_design
+from pytmge.core.molecule import parse_molecular_formulas
+from pytmge.core.molecule import feature_design as molecule_feature_design
+
+
+def random_molecular_formulas(n, seed=0):
+    '''
+    PubChem-like molecular formulas in Hill notation:
+    C and H first, then up to 4 other elements, counts up to the thousands.
+
+    '''
+
+    rng = np.random.default_rng(seed)
+    others = ['Br', 'Cl', 'F', 'I', 'N', 'Na', 'O', 'P', 'S', 'Si']
+    carbons = rng.integers(1, 3000, n)
+    hydrogens = rng.integers(0, 6000, n)
+    formulas = []
+    for c, h, k in zip(carbons, hydrogens, rng.integers(0, 5, n)):
+        f = 'C' + (str(c) if c > 1 else '') + ('H' + (str(h) if h > 1 else '') if h else '')
+        for e in sorted(rng.choice(others, k, replace=False)):
+            count = int(rng.integers(1, 100))
+            f += e + (str(count) if count > 1 else '')
+        formulas.append(f)
+    return formulas
+
+
+def rate(n, seconds):
+    return str(int(n / seconds)) + ' rows/s'
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--n', type=int, default=100000, help='number of molecular formulas')
+    parser.add_argument('--attributes', type=int, default=72, help='number of elemental attributes (0 for all)')
+    parser.add_argument('--n-jobs', type=int, default=1)
+    args = parser.parse_args()
+
+    attributes, _ = crystal_feature_design.elemental_attributes()
+    attributes = attributes[:args.attributes] if args.attributes else attributes
+
+    # ------ crystal ------
+
+    df_example = pd.read_csv(Path(__file__).absolute().parent / 'example.csv', index_col=0)
+
+    t = time.perf_counter()
+    df_composition = data_set(df_example, verbose=False).chemical_formulas.composition.df
+    t_parse = time.perf_counter() - t
+    t = time.perf_counter()
+    df_features = crystal_feature_design.get_features(df_composition, attributes=attributes, n_jobs=args.n_jobs, verbose=False)
+    t_features = time.perf_counter() - t
+
+    print('crystal  :', df_features.shape[0], 'chemical formulas,', df_features.shape[1], 'features')
+    print('  parsing      ', rate(df_example.shape[0], t_parse))
+    print('  featurization', rate(df_features.shape[0], t_features))
+
+    # ------ molecule ------
+
+    formulas = random_molecular_formulas(args.n)
+
+    t = time.perf_counter()
+    is_proper, counts = parse_molecular_formulas(formulas)
+    t_parse = time.perf_counter() - t
+    t = time.perf_counter()
+    df_features = molecule_feature_design.get_features(formulas, attributes=attributes, n_jobs=args.n_jobs, verbose=False)
+    t_features = time.perf_counter() - t
+
+    print('molecule :', df_features.shape[0], 'molecular formulas,', df_features.shape[1], 'features,',
+          'largest count', counts.max())
+    print('  parsing      ', rate(len(formulas), t_parse))
+    print('  featurization', rate(df_features.shape[0], t_features), '(parsing included)')
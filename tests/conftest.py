@@ -0,0 +1,45 @@
+# coding: utf-8
+# Copyright (c) pytmge Development Team.
+
+"""
+Test configuration: the repository root is the package 'pytmge',
+whatever the name of the directory it is checked out in.
+
+"""
+
+
+import sys
+import tracemalloc
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+
+_root = Path(__file__).absolute().parent.parent
+
+if 'pytmge' not in sys.modules:
+    _spec = importlib.util.spec_from_file_location(
+        'pytmge', _root / '__init__.py', submodule_search_locations=[str(_root)]
+    )
+    _module = importlib.util.module_from_spec(_spec)
+    sys.modules['pytmge'] = _module
+    _spec.loader.exec_module(_module)
+
+
+@pytest.fixture(scope='session')
+def example_path():
+    return _root / 'example'
+
+
+@pytest.fixture(scope='session')
+def peak_memory():
+    # peak_memory(function, *args, **kwargs) -> (result, peak of the memory traced during the call, in bytes)
+    def _peak(function, *args, **kwargs):
+        tracemalloc.start()
+        try:
+            result = function(*args, **kwargs)
+            return result, tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return _peak
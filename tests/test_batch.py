@@ -0,0 +1,21 @@
+# coding: utf-8
+# Copyright (c) pytmge Development Team.
+
+import pytest
+
+from pytmge.core.crystal import batch
+
+
+@pytest.mark.parametrize('usable', [False, True])
+def test_merge_empty_shards(tmp_path, usable):
+    # no chemical formula in proper format: every shard is empty
+    (tmp_path / 'dataset.csv').write_text('formula,Tc\nnot_a_formula,1.0\nxx,2.0\n')
+    output_path = str(tmp_path / 'shards')
+    columns = None
+    for shard in range(2):
+        df = batch.run_shard(str(tmp_path / 'dataset.csv'), output_path, shard, 2, usable=usable, verbose=False)
+        columns = list(df.columns)
+
+    df_features = batch.merge_shards(output_path, 2, usable=usable, verbose=False)
+    assert df_features.shape == (0, len(columns))
+    assert list(df_features.columns) == columns
@@ -0,0 +1,175 @@
+# coding: utf-8
+# Copyright (c) pytmge Development Team.
+
+import importlib
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pytmge.core.crystal import data_set
+
+
+def test_near_duplicates_across_a_cell_edge(capsys):
+    df_dataset = pd.DataFrame({'Tc': [18.0, 17.5, 9.0]}, index=['Nb74Sn26', 'Nb75Sn25', 'Nb80Sn20'])
+    ds_group = data_set(df_dataset, verbose=False).near_duplicate_groups(tolerance=0.01, verbose=False)
+    assert ds_group.tolist() == [0, 0, 1]
+    assert capsys.readouterr().out == ''
+
+
+def test_near_duplicate_groups_are_exact():
+    rng = np.random.default_rng(0)
+    a = rng.integers(1, 100, 400)
+    formulas = ['Fe' + str(x) + 'Ni' + str(100 - x) + 'Co' + str(y) for x, y in zip(a, rng.integers(1, 5, 400))]
+    df_dataset = pd.DataFrame({'y': rng.normal(size=400)}, index=formulas)
+    df_dataset = df_dataset[~df_dataset.index.duplicated()]
+    tolerance = 0.02
+
+    ds_group = data_set(df_dataset, verbose=False).near_duplicate_groups(tolerance=tolerance, verbose=False)
+
+    composition = data_set(df_dataset, verbose=False).chemical_formulas.composition
+    fractions = composition.fractions(composition.df)
+    order = np.argsort(-df_dataset['y'].to_numpy(), kind='stable')
+    leader = {}
+    for i in order:
+        leader.setdefault(ds_group.iloc[i], i)
+    leaders = sorted(leader.values(), key=lambda i: list(order).index(i))
+    for i in range(len(fractions)):
+        # within tolerance of the leader of its group
+        assert np.abs(fractions[i] - fractions[leader[ds_group.iloc[i]]]).max() <= tolerance + 1e-9
+    for n, i in enumerate(leaders):
+        # no earlier leader within tolerance
+        earlier = fractions[leaders[:n]]
+        assert (np.abs(earlier - fractions[i]).max(axis=1, initial=0) > tolerance + 1e-9).all()
+
+
+def _recording(calls, name, function):
+    # function, recording the size of its last argument
+    def wrapper(*args, **kwargs):
+        calls.append((name, len(args[-1])))
+        return function(*args, **kwargs)
+    return wrapper
+
+
+def test_append_processes_the_new_entries_only(monkeypatch):
+    rng = np.random.default_rng(0)
+    formulas = ['Fe' + str(i) + 'Ni' + str(x) for i, x in zip(range(1, 20001), rng.integers(1, 9, 20000))]
+    ds = data_set(pd.DataFrame({'y': rng.normal(size=20000)}, index=formulas), verbose=False)
+    ds.duplicates
+    ds.chemical_formulas.composition.element_index
+    ds.chemical_formulas.composition.dict
+
+    calls = []
+    module = importlib.import_module('pytmge.core.crystal.data_preparation')
+    for name in ('parse_chemical_formulas', '_concat_frames', '_concat_indexes'):
+        monkeypatch.setattr(module, name, _recording(calls, name, getattr(module, name)))
+    for cls, name in ((module.categories, 'extend'), (module.categories, 'add_entries'),
+                      (module.element_index, 'extend')):
+        monkeypatch.setattr(cls, name, _recording(calls, cls.__name__ + '.' + name, getattr(cls, name)))
+
+    sizes = []
+    concat, isin = pd.concat, pd.Index.isin
+    monkeypatch.setattr(pd, 'concat', lambda objs, *a, **k: sizes.append(sum(map(len, objs))) or concat(objs, *a, **k))
+    monkeypatch.setattr(pd.Index, 'isin', lambda self, values, *a: sizes.append(len(values)) or isin(self, values, *a))
+
+    for r in range(3):
+        # 200 new chemical formulas and 50 already in the dataset
+        new = ['Cu1Zn' + str(1000 * r + i) for i in range(200)] + formulas[:50]
+        ds.append(pd.DataFrame({'y': np.ones(250)}, index=new), verbose=False)
+
+    # the new chemical formulas are parsed and indexed, the new entries categorized,
+    # and nothing is concatenated to the whole dataset
+    assert sorted(set(calls)) == [
+        ('categories.add_entries', 250), ('categories.extend', 200),
+        ('element_index.extend', 200), ('parse_chemical_formulas', 200),
+    ]
+    assert len(calls) == 3 * 4
+    assert max(sizes, default=0) <= 250
+
+    assert len(ds.data) == 20000 + 3 * 250
+    assert len(ds.chemical_formulas.composition.df) == 20000 + 3 * 200
+    assert ds.duplicates == {cf: 4 for cf in formulas[:50]}
+
+
+@pytest.fixture(scope='module')
+def df_example(example_path):
+    return pd.read_csv(example_path / 'example.csv', index_col=0)
+
+
+_queries = [
+    {'contains': ['Cu', 'O']},
+    {'exactly': ['Nb', 'Sn']},
+    {'within': ['La', 'Sr', 'Cu', 'O']},
+    {'contains': ['Fe'], 'excludes': ['O', 'F']},
+    {'number_of_elements': 2, 'contains': ['B']},
+]
+
+
+@pytest.fixture(scope='module')
+def example_elements(df_example):
+    # the set of elements of each chemical formula in proper format
+    composition = data_set(df_example, verbose=False).chemical_formulas.composition.df
+    present = composition.notna() & (composition != 0)
+    return present.apply(lambda row: set(row.index[row]), axis=1)
+
+
+def _brute_force_select(elements, contains=(), exactly=None, within=None, excludes=(), number_of_elements=None):
+    keep = [
+        set(contains) <= e and not (set(excludes) & e)
+        and (exactly is None or e == set(exactly))
+        and (within is None or (e and e <= set(within)))
+        and (number_of_elements is None or len(e) == number_of_elements)
+        for e in elements
+    ]
+    return set(elements.index[keep])
+
+
+@pytest.mark.parametrize('query', _queries)
+def test_select_after_append_equals_a_rebuild(df_example, example_elements, query):
+    ds = data_set(df_example.iloc[:8000], verbose=False)
+    ds.select(**query)  # the element index built before the appends
+    ds.append(df_example.iloc[8000:11000], verbose=False)
+    ds.append(df_example.iloc[10500:], verbose=False)
+
+    selected = ds.select(**query)
+    rebuilt = data_set(pd.concat([df_example.iloc[:11000], df_example.iloc[10500:]]), verbose=False).select(**query)
+    assert len(selected) > 0
+    assert selected.sort_index().equals(rebuilt.sort_index())
+    assert set(selected.index) == _brute_force_select(example_elements, **query)
+
+
+def test_improper_formulas_are_silent(capsys):
+    df_dataset = pd.DataFrame({'Tc': [39.0, 1.0, 2.0]}, index=['Mg1B2', None, 'not_a_formula'])
+    ds = data_set(df_dataset, verbose=False)
+    assert list(ds.chemical_formulas.in_proper_format) == ['Mg1B2']
+    assert capsys.readouterr().out == ''
+
+    data_set(df_dataset, verbose=True)
+    out = capsys.readouterr().out
+    assert 'chemical formula No. 2 is null' in out and 'not_a_formula' in out
+
+
+def test_composition_keys():
+    composition = data_set(
+        pd.DataFrame({'y': [1.0, 2.0, 3.0, 4.0]}, index=['Nb3Sn1', 'Sn1Nb3', 'Sn25Nb75', 'Nb3Sn2']), verbose=False
+    ).chemical_formulas.composition
+    keys = composition.keys()
+    assert keys['Nb3Sn1'] == keys['Sn1Nb3'] == keys['Sn25Nb75'] != keys['Nb3Sn2']
+
+
+@pytest.mark.parametrize('how', ['inner', 'left'])
+def test_merge_by_composition(how):
+    ds_tc = data_set(pd.DataFrame({'Tc': [18.0, 39.0, 1.0]}, index=['Nb3Sn1', 'Mg1B2', 'Xx1']), verbose=False)
+    ds_energy = data_set(
+        pd.DataFrame({'Ef': [-0.2, -0.1]}, index=['Sn25Nb75', 'Cu1O1']), verbose=False
+    )
+
+    df_merged = ds_tc.merge(ds_energy, how=how, verbose=False)
+    assert list(df_merged.columns) == ['Tc', 'Ef', 'formula_other']
+    assert df_merged.loc['Nb3Sn1', 'formula_other'] == 'Sn25Nb75'
+    assert df_merged.loc['Nb3Sn1', 'Ef'] == -0.2
+    if how == 'inner':
+        assert list(df_merged.index) == ['Nb3Sn1']
+    else:
+        assert list(df_merged.index) == ['Nb3Sn1', 'Mg1B2', 'Xx1']
+        assert df_merged.loc[['Mg1B2', 'Xx1'], 'Ef'].isna().all()
@@ -0,0 +1,38 @@
+# coding: utf-8
+# Copyright (c) pytmge Development Team.
+
+import time
+import threading
+
+import pandas as pd
+
+from pytmge.core.crystal import estimators
+
+
+def test_cache_is_not_locked_during_a_miss(monkeypatch):
+    started, release = threading.Event(), threading.Event()
+
+    def get_features(df_composition, attributes=None):
+        if 'Nb3Sn1' in df_composition.index:
+            started.set()
+            release.wait(10)
+        return pd.DataFrame({'f': 1.0}, index=df_composition.index)
+
+    monkeypatch.setattr(estimators.feature_design, 'get_features', get_features)
+    cache = estimators.feature_cache()
+    cache.get_features(['Mg1B2'])
+
+    # a slow miss in one thread ...
+    thread = threading.Thread(target=cache.get_features, args=(['Nb3Sn1', 'Mg1B2'], ))
+    thread.start()
+    assert started.wait(10)
+
+    # ... does not keep the hits of another thread waiting
+    t = time.perf_counter()
+    df = cache.get_features(['Mg1B2'])
+    assert time.perf_counter() - t < 5
+    assert df['f'].tolist() == [1.0]
+
+    release.set()
+    thread.join()
+    assert cache.features[None].index.tolist() == ['Mg1B2', 'Nb3Sn1']
@@ -0,0 +1,70 @@
+# coding: utf-8
+# Copyright (c) pytmge Development Team.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pytmge.core.crystal import data_set, feature_design, feature_scaler
+
+
+@pytest.fixture(scope='module')
+def df_features():
+    rng = np.random.default_rng(0)
+    X = rng.lognormal(size=(4000, 80))
+    return pd.DataFrame(X, columns=['f' + str(i) for i in range(80)])
+
+
+@pytest.mark.parametrize('operators', [('*', ), ('*', '/', '-')])
+def test_second_order_features_block_memory(peak_memory, df_features, operators):
+    block_memory = 2**24
+    df, peak = peak_memory(
+        feature_design.get_second_order_features, df_features,
+        operators=operators, n_features=20, block_memory=block_memory, verbose=False
+    )
+    assert df.shape == (df_features.shape[0], 20)
+    # the features and their standardized copy, plus the working memory of one block
+    assert peak <= 2 * df_features.to_numpy().nbytes + 1.1 * block_memory
+
+
+@pytest.fixture(scope='module')
+def df_composition(example_path):
+    df_dataset = pd.read_csv(example_path / 'example.csv', index_col=0).iloc[:400, :]
+    return data_set(df_dataset, verbose=False).chemical_formulas.composition.df
+
+
+def test_get_features_peak_memory(peak_memory, df_composition):
+    df, peak = peak_memory(feature_design.get_features, df_composition, verbose=False)
+    assert df.shape[0] == df_composition.shape[0]
+    # the features, and the temporaries of one block of attributes
+    assert peak <= 1.6 * df.to_numpy().nbytes
+
+
+def test_delete_unusable_features_peak_memory(peak_memory, df_composition):
+    X = feature_design.get_features(df_composition, verbose=False).to_numpy(copy=True)
+    X[:, ::7] = np.nan
+    df_features = pd.DataFrame(X, index=df_composition.index, columns=['f' + str(i) for i in range(X.shape[1])])
+
+    df, peak = peak_memory(feature_design.delete_unusable_features, df_features, verbose=False)
+    assert not df.isna().any().any() and 0 < df.shape[1] < df_features.shape[1]
+    # one copy of the usable columns, no copy of the features
+    assert peak <= df.to_numpy().nbytes + 0.1 * X.nbytes
+
+
+def test_feature_scaler_equals_delete_unusable_features_and_StandardScaler(df_features):
+    from sklearn.preprocessing import StandardScaler
+
+    X = df_features.to_numpy(copy=True)[:1000]
+    X[5, 3] = np.nan    # empty value
+    X[:, 7] = 2.5       # zero variance
+    df = pd.DataFrame(X, columns=df_features.columns)
+
+    scaler = feature_scaler(chunk_size=333).fit(df, verbose=False)  # chunks of 333, 333, 333 and 1 rows
+    df_usable = feature_design.delete_unusable_features(df, verbose=False)
+    assert list(scaler.get_feature_names_out()) == list(df_usable.columns)
+
+    out = np.empty(df_usable.shape)
+    df_standardized = scaler.transform(df, out=out, verbose=False)
+    assert np.shares_memory(df_standardized.to_numpy(), out)
+    assert list(df_standardized.columns) == list(df_usable.columns)
+    np.testing.assert_allclose(out, StandardScaler().fit_transform(df_usable.to_numpy()), rtol=0, atol=1e-10)
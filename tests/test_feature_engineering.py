@@ -0,0 +1,140 @@
+# coding: utf-8
+# Copyright (c) pytmge Development Team.
+
+import importlib
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pytmge.core.crystal import feature_engineering
+
+
+def _skewed_features(n, n_features, spread, seed=1):
+    # lognormal features sharing one factor: skewed, heavy-tailed, correlated
+    rng = np.random.default_rng(seed)
+    g = rng.standard_normal(n)
+    rho = rng.uniform(0.3, 0.8, n_features)
+    X = np.exp(spread * (rho * g[:, None] + np.sqrt(1 - rho ** 2) * rng.standard_normal((n, n_features))))
+    return pd.DataFrame(X, columns=['f' + str(i) for i in range(n_features)])
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_approximate_correlation_matrix_is_exact_above_the_threshold(seed):
+    # pairs are missed at seeds 0 and 1 with the margin of bivariate normal features
+    df_features = _skewed_features(100000, 40, spread=1.2)
+    threshold = 0.35
+    exact = df_features.corr().to_numpy()
+    approximate = feature_engineering.approximate_correlation_matrix(
+        df_features, threshold, sample_size=2000, seed=seed, block_memory=8 * 100000 * 3, verbose=False
+    ).to_numpy()
+
+    reaching = np.abs(exact) >= threshold
+    assert reaching.sum() > len(exact)
+    np.testing.assert_allclose(approximate[reaching], exact[reaching], rtol=1e-10)
+    np.testing.assert_allclose(approximate, approximate.T)
+
+
+def test_feature_selection_by_Pearson_correlation_peak_memory(peak_memory):
+    rng = np.random.default_rng(0)
+    g = rng.standard_normal(20000)
+    X = g[:, None] + rng.standard_normal((20000, 200)) * rng.uniform(0.1, 2, 200)
+    df_features = pd.DataFrame(X, columns=['f' + str(i) for i in range(200)])
+
+    df, peak = peak_memory(
+        feature_engineering.feature_selection_by_Pearson_correlation, df_features, threshold=0.8, verbose=False
+    )
+    assert 0 < df.shape[1] < df_features.shape[1]
+    # the copy made by DataFrame.corr, and the selected features
+    assert peak <= 2.5 * X.nbytes
+
+
+def _reference_selection(df_features, threshold):
+    # the selection of the original feature_selection_by_Pearson_correlation:
+    # the whole matrix searched again after each elimination
+    a = np.abs(np.round(df_features.corr().to_numpy(), 6))
+    np.fill_diagonal(a, np.nan)
+    columns = list(df_features.columns)
+    while len(columns) > 1:
+        m = np.nanmax(a)
+        if (threshold >= 1 and len(columns) < int(threshold) + 1) or (threshold < 1 and m < threshold):
+            break
+        i, j = [int(x[0]) for x in np.where(a == m)]
+        cv = [np.std(df_features[f]) / np.mean(df_features[f]) for f in (columns[i], columns[j])]
+        drop = j if cv[0] > cv[1] else i
+        a = np.delete(np.delete(a, drop, axis=0), drop, axis=1)
+        del columns[drop]
+    return columns
+
+
+@pytest.fixture(scope='module')
+def df_correlated():
+    rng = np.random.default_rng(0)
+    g = rng.standard_normal((500, 4))
+    X = 5 + g[:, rng.integers(0, 4, 60)] + rng.standard_normal((500, 60)) * rng.uniform(0.05, 1, 60)
+    return pd.DataFrame(X, columns=['f' + str(i) for i in range(60)])
+
+
+@pytest.mark.parametrize('threshold', [0.95, 0.8, 0.5, 10])
+def test_pearson_selection_reproduces_the_reference(df_correlated, threshold):
+    df = feature_engineering.feature_selection_by_Pearson_correlation(df_correlated, threshold=threshold, verbose=False)
+    assert list(df.columns) == _reference_selection(df_correlated, threshold)
+
+
+def test_threshold_sweep_equals_single_thresholds(df_correlated):
+    thresholds = [0.95, 0.8, 10]
+    selected = feature_engineering.feature_selection_by_Pearson_correlation(
+        df_correlated, threshold=thresholds, verbose=False
+    )
+    for t in thresholds:
+        single = feature_engineering.feature_selection_by_Pearson_correlation(df_correlated, threshold=t, verbose=False)
+        assert list(selected[t].columns) == list(single.columns)
+
+
+def test_selection_from_path(df_correlated):
+    df_path = feature_engineering.elimination_path(df_correlated)
+    assert list(df_path['n_left']) == list(range(60, 1, -1))
+    columns = feature_engineering.selection_from_path(df_path, list(df_correlated.columns), 0.8)
+    assert list(columns) == _reference_selection(df_correlated, 0.8)
+
+
+def _cluster(df_features, linkage, threshold=0.8):
+    df, clusters = feature_engineering.feature_selection_by_clustering(
+        df_features, threshold=threshold, linkage=linkage, return_clusters=True, verbose=False
+    )
+    members = [f for f, others in clusters.items() for f in [f] + others]
+    assert sorted(members) == sorted(df_features.columns)  # a partition of the features
+    assert list(clusters) == list(df.columns)
+    cv = df_features.std(ddof=0) / df_features.mean()
+    for f, others in clusters.items():
+        # the representative has the highest cv of its cluster
+        assert cv[f] == cv[[f] + others].max()
+    return df, clusters
+
+
+def test_single_linkage_leaves_no_correlated_pair(df_correlated):
+    df, _ = _cluster(df_correlated, 'single')
+    r = np.abs(np.round(df.corr().to_numpy(), 6))
+    np.fill_diagonal(r, 0)
+    assert 1 < df.shape[1] < df_correlated.shape[1]
+    assert (r < 0.8).all()
+
+
+def test_single_linkage_without_scipy(df_correlated, monkeypatch):
+    module = importlib.import_module('pytmge.core.crystal.feature_engineering')
+    expected = _cluster(df_correlated, 'single')[1]
+    monkeypatch.setattr(module, 'connected_components', None)  # union-find
+    assert _cluster(df_correlated, 'single')[1] == expected
+
+
+def test_complete_linkage_clusters_are_correlated_pairwise(df_correlated):
+    _, clusters = _cluster(df_correlated, 'complete')
+    r = np.abs(np.round(df_correlated.corr(), 6))
+    for f, others in clusters.items():
+        assert (r.loc[[f] + others, [f] + others].to_numpy() >= 0.8).all()
+
+
+def test_average_linkage(df_correlated):
+    single = _cluster(df_correlated, 'single')[0].shape[1]
+    complete = _cluster(df_correlated, 'complete')[0].shape[1]
+    assert single <= _cluster(df_correlated, 'average')[0].shape[1] <= complete
@@ -0,0 +1,70 @@
+# coding: utf-8
+# Copyright (c) pytmge Development Team.
+
+import importlib.util
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pytmge.core import element_list
+from pytmge.core.crystal import data_set
+from pytmge.core.crystal import feature_design as crystal_feature_design
+from pytmge.core.molecule import parse_molecular_formulas, molecular_formulas
+from pytmge.core.molecule import feature_design
+
+
+featurization = importlib.import_module('pytmge.core.featurization')
+
+
+def _counts(counts):
+    return {element_list[j]: int(c) for j, c in enumerate(counts) if c}
+
+
+@pytest.mark.parametrize('pyarrow', [True, False])
+def test_parse_molecular_formulas(monkeypatch, pyarrow):
+    if not pyarrow:
+        monkeypatch.setattr(featurization, 'pa', None)
+    formulas = ['CH4', 'HOH', 'H2O', 'C1200H2402O3', 'NaCl', 'C6H12O6',
+                'H0O', 'h2o', 'H2O+', '(CH3)2', 'C1.5H', 'Xx2', '', None]
+    is_proper, counts = parse_molecular_formulas(formulas)
+
+    assert is_proper.tolist() == [True] * 6 + [False] * 8
+    assert [_counts(c) for c in counts[:6]] == [
+        {'C': 1, 'H': 4}, {'H': 2, 'O': 1}, {'H': 2, 'O': 1},
+        {'C': 1200, 'H': 2402, 'O': 3}, {'Na': 1, 'Cl': 1}, {'C': 6, 'H': 12, 'O': 6},
+    ]
+    assert not counts[6:].any()
+
+
+def test_molecular_formulas(capsys):
+    mf = molecular_formulas(['CH4', 'H0O', 'C2H6'], verbose=False)
+    assert list(mf.in_proper_format) == ['CH4', 'C2H6']
+    assert list(mf.not_in_proper_format) == ['H0O']
+    assert mf.composition.loc['C2H6', ['C', 'H']].tolist() == [2, 6]
+    assert capsys.readouterr().out == ''
+
+
+def test_molecule_features_equal_crystal_features():
+    formulas = ['CH4', 'C6H12O6', 'NaCl', 'C1200H2402O3', 'H0O']
+    crystal = ['C1H4', 'C6H12O6', 'Na1Cl1', 'C1200H2402O3']
+    attributes = crystal_feature_design.elemental_attributes()[0][:30]
+
+    df_molecule = feature_design.get_features(formulas, attributes=attributes, batch_size=2, verbose=False)
+    df_composition = data_set(pd.DataFrame({'y': np.zeros(4)}, index=crystal), verbose=False).chemical_formulas.composition.df
+    df_crystal = crystal_feature_design.get_features(df_composition, attributes=attributes, verbose=False)
+
+    assert list(df_molecule.columns) == list(df_crystal.columns)
+    np.testing.assert_allclose(df_molecule.to_numpy()[:4], df_crystal.to_numpy(), rtol=1e-12)
+    assert np.isnan(df_molecule.loc['H0O']).all()
+
+
+def test_benchmark_formulas_are_proper(example_path):
+    spec = importlib.util.spec_from_file_location('benchmark_molecule', example_path / 'benchmark_molecule.py')
+    benchmark = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(benchmark)
+
+    formulas = benchmark.random_molecular_formulas(2000)
+    is_proper, counts = parse_molecular_formulas(formulas)
+    assert is_proper.all()
+    assert counts.max() >= 1000
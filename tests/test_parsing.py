@@ -0,0 +1,90 @@
+# coding: utf-8
+# Copyright (c) pytmge Development Team.
+
+import re
+import sys
+import importlib
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pytmge.core import element_list
+from pytmge.core.crystal import data_set
+from pytmge.core.crystal.data_preparation import parse_chemical_formulas
+
+
+featurization = importlib.import_module('pytmge.core.featurization')
+
+_extra = [
+    None, '', 'H2O', 'La2Cu1O4-x', 'Fe', '2Fe', 'Xx1',
+    'Fe70Ni30', 'Fe70.5Ni29.5', 'Nb3Sn1Nb1', 'Fe.5Ni.5', 'C60', 'Fe(2Ni1',
+]
+
+
+@pytest.fixture(scope='module')
+def formulas(example_path):
+    df_example = pd.read_csv(example_path / 'example.csv', index_col=0)
+    return list(df_example.index) + _extra
+
+
+def _reference(formulas):
+    # the original check_format and composition, formula by formula with re
+    is_proper = np.zeros(len(formulas), dtype=bool)
+    contents = np.zeros((len(formulas), len(element_list)))
+    is_alloy = np.zeros(len(formulas), dtype=bool)
+    for i, cf in enumerate(formulas):
+        if pd.isnull(cf):
+            continue
+        elements = re.split(r'[(0-9]*[\.]?[0-9]+', cf)
+        if elements[-1] != '':
+            continue
+        elements = elements[:-1]
+        if not elements or any(e not in element_list for e in elements):
+            continue
+        is_proper[i] = True
+        values = list(map(float, re.findall(r'[0-9]*[\.]?[0-9]+', cf)))
+        if np.nansum(values) == 100:
+            values = [v / 100 for v in values]
+            is_alloy[i] = True
+        for e, c in zip(elements, values):
+            contents[i, element_list.index(e)] += c
+    return is_proper, contents, is_alloy
+
+
+def test_pyarrow_and_pandas_paths_agree(formulas, monkeypatch):
+    with_pyarrow = featurization.split_formulas(formulas, r'[(0-9]*[\.]?[0-9]+')
+    monkeypatch.setattr(featurization, 'pa', None)
+    with_pandas = featurization.split_formulas(formulas, r'[(0-9]*[\.]?[0-9]+')
+
+    for a, b in zip(with_pyarrow[:3], with_pandas[:3]):
+        np.testing.assert_array_equal(a, b)
+    assert list(with_pyarrow[3]) == list(with_pandas[3])
+
+
+@pytest.mark.parametrize('pyarrow', [True, False])
+def test_parse_chemical_formulas_equals_the_reference(formulas, monkeypatch, pyarrow):
+    if not pyarrow:
+        monkeypatch.setattr(featurization, 'pa', None)
+    is_proper, contents, is_alloy = parse_chemical_formulas(formulas)
+    ref_is_proper, ref_contents, ref_is_alloy = _reference(formulas)
+
+    np.testing.assert_array_equal(is_proper, ref_is_proper)
+    np.testing.assert_array_equal(is_alloy, ref_is_alloy)
+    np.testing.assert_allclose(contents, ref_contents, rtol=1e-12)
+    assert is_proper[-len(_extra):].tolist() == [
+        False, False, False, False, False, False, False,
+        True, True, True, True, True, True,
+    ]
+
+
+@pytest.mark.parametrize('pyarrow', [True, False])
+def test_from_file_equals_read_csv(example_path, monkeypatch, pyarrow):
+    if not pyarrow:
+        monkeypatch.setitem(sys.modules, 'pyarrow', None)  # import pyarrow fails
+    ds = data_set.from_file(str(example_path / 'example.csv'), verbose=False)
+    ds_ref = data_set(pd.read_csv(example_path / 'example.csv', index_col=0), verbose=False)
+
+    pd.testing.assert_frame_equal(ds.data, ds_ref.data, check_dtype=False)
+    assert ds.chemical_formulas.in_proper_format.equals(ds_ref.chemical_formulas.in_proper_format)
+    pd.testing.assert_frame_equal(ds.chemical_formulas.composition.df, ds_ref.chemical_formulas.composition.df)
@@ -0,0 +1,90 @@
+# coding: utf-8
+# Copyright (c) pytmge Development Team.
+
+import os
+import sys
+import importlib
+
+import pandas as pd
+
+from pytmge.core import plugins
+from pytmge.core.crystal import pipeline
+
+
+_source = '''
+def scale(df, checkpoint_path=None):
+    calls.append(checkpoint_path)
+    return df * {factor}
+'''
+
+
+def _scale(factor, calls):
+    # the same function (module and name) before and after an edit of its source
+    namespace = {'__name__': 'stages', 'calls': calls}
+    exec(_source.format(factor=factor), namespace)
+    return namespace['scale']
+
+
+def _run(cache_path, factor, calls):
+    p = pipeline(str(cache_path)).add_stage('scaled', _scale(factor, calls))
+    return p, p.run(pd.DataFrame({'a': [1.0, 2.0]}), verbose=False)
+
+
+def test_cached_stage_is_skipped(tmp_path):
+    calls = []
+    _run(tmp_path, 2, calls)
+    _, df = _run(tmp_path, 2, calls)
+    assert len(calls) == 1
+    assert df['a'].tolist() == [2.0, 4.0]
+
+
+def test_edited_constant_forces_rerun(tmp_path):
+    calls = []
+    _run(tmp_path, 2, calls)
+    _, df = _run(tmp_path, 3, calls)
+    assert len(calls) == 2
+    assert df['a'].tolist() == [3.0, 6.0]
+    assert len([f for f in os.listdir(tmp_path) if f.endswith('.pkl')]) == 1
+
+
+def test_stale_checkpoints_are_removed(tmp_path):
+    calls = []
+    stale = tmp_path / 'scaled-0123456789abcdef.checkpoint'
+    stale.mkdir()
+    (stale / 'checkpoint.json').write_text('{}')
+
+    p, _ = _run(tmp_path, 2, calls)
+    assert not stale.exists()
+    assert calls[0] == p._artifact('scaled')[:-len('.pkl')] + '.checkpoint'
+
+
+calls = []
+
+
+def _scale_by_helper(df, checkpoint_path=None):
+    calls.append(checkpoint_path)
+    return df * importlib.import_module('helpers').factor()
+
+
+def test_edited_callee_forces_rerun(tmp_path, monkeypatch):
+    # a stage calling a function of the package: an edit of that function changes no byte of the stage
+    package = tmp_path / 'package'
+    package.mkdir()
+    monkeypatch.setattr(plugins, '_package_path', str(package))
+    monkeypatch.syspath_prepend(str(package))
+    monkeypatch.setattr(sys, 'dont_write_bytecode', True)
+    monkeypatch.delitem(sys.modules, 'helpers', raising=False)
+    calls.clear()
+
+    def run(factor):
+        (package / 'helpers.py').write_text('def factor():\n    return ' + str(factor) + '\n')
+        importlib.reload(importlib.import_module('helpers'))
+        p = pipeline(str(tmp_path / 'cache')).add_stage('scaled', _scale_by_helper)
+        return p.run(pd.DataFrame({'a': [1.0, 2.0]}), verbose=False)
+
+    run(2)
+    run(2)
+    assert len(calls) == 1
+    df = run(30)
+    assert len(calls) == 2
+    assert df['a'].tolist() == [30.0, 60.0]
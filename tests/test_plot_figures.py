@@ -0,0 +1,29 @@
+# coding: utf-8
+# Copyright (c) pytmge Development Team.
+
+import numpy as np
+import pandas as pd
+import matplotlib
+import matplotlib.pyplot as plt
+
+from pytmge.core.crystal import plot_figures
+
+
+matplotlib.use('Agg')
+
+
+def test_plot_target_vs_features_peak_memory(peak_memory, tmp_path, monkeypatch):
+    saved = []
+    # the data flow only, not the rendering of the images (fixed cost, independent of the features)
+    monkeypatch.setattr(plt, 'savefig', lambda name, **kwargs: saved.append(name))
+
+    rng = np.random.default_rng(0)
+    df_features = pd.DataFrame(rng.standard_normal((100000, 20)), columns=['f' + str(i) for i in range(20)])
+    ds_target = pd.Series(rng.standard_normal(100000), name='Tc')
+
+    _, peak = peak_memory(
+        plot_figures.plot_target_vs_features, ds_target, df_features, path=str(tmp_path) + '/', verbose=False
+    )
+    assert len(saved) == df_features.shape[1]
+    # one figure at a time: no copy of the features, and no pile-up of the closed figures
+    assert peak <= 0.5 * df_features.to_numpy().nbytes
@@ -0,0 +1,112 @@
+# coding: utf-8
+# Copyright (c) pytmge Development Team.
+
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from pytmge.core import fingerprint, verbose_option
+from pytmge.core.plugins import instrumentation
+
+
+def _stage(df, threshold=0.9):
+    return df
+
+
+def _stage_edited(df, threshold=0.5):
+    return df
+
+
+def test_fingerprint_of_data():
+    df = pd.DataFrame({'a': [1.0, 2.0]}, index=['H2O1', 'C60'])
+    assert fingerprint(df) == fingerprint(df.copy())
+    assert fingerprint(df) != fingerprint(df * 2)
+    assert fingerprint(np.arange(3)) != fingerprint(np.arange(3.0))
+
+
+def test_fingerprint_of_constants():
+    assert fingerprint(lambda x: x * 2) != fingerprint(lambda x: x * 3)
+    assert fingerprint(lambda x: x * 2) == fingerprint(lambda x: x * 2)
+
+
+def test_fingerprint_of_nested_constants():
+    def outer_2(x):
+        return (lambda y: y * 2)(x)
+
+    def outer_3(x):
+        return (lambda y: y * 3)(x)
+
+    outer_3.__qualname__ = outer_2.__qualname__
+    assert fingerprint(outer_2) != fingerprint(outer_3)
+
+
+def test_fingerprint_of_defaults():
+    _stage_edited.__qualname__ = _stage.__qualname__
+    assert fingerprint(_stage) != fingerprint(_stage_edited)
+
+    def _keyword(df, *, threshold=0.9):
+        return df
+
+    before = fingerprint(_keyword)
+    _keyword.__kwdefaults__ = {'threshold': 0.5}
+    assert fingerprint(_keyword) != before
+
+
+def test_fingerprint_of_closures():
+    def make(factor):
+        def scale(x):
+            return x * factor
+        return scale
+
+    assert fingerprint(make(2)) != fingerprint(make(3))
+    assert fingerprint(make(2)) == fingerprint(make(2))
+
+
+def test_fingerprint_of_decorated_functions():
+    @verbose_option
+    def stage_2(x):
+        return x * 2
+
+    @verbose_option
+    def stage_3(x):
+        return x * 3
+
+    stage_3.__qualname__ = stage_2.__qualname__
+    assert fingerprint(stage_2) != fingerprint(stage_3)
+
+
+def test_memory_peak_of_nested_spans():
+    events = []
+    recorder = instrumentation(callbacks=[events.append], sample_memory=True)
+    assert not tracemalloc.is_tracing()
+
+    with recorder.span('outer'):
+        big = np.ones(2**22)  # 32 MB
+        del big
+        with recorder.span('inner'):
+            small = np.ones(2**17)  # 1 MB
+            del small
+
+    inner, outer = events
+    assert inner['memory_peak'] - inner['memory_current'] < 2**23
+    assert outer['memory_peak'] - outer['memory_current'] > 2**24
+    # tracing started by the outermost span is stopped with it
+    assert not tracemalloc.is_tracing()
+
+
+def test_counters_in_span_events():
+    events = []
+    recorder = instrumentation(callbacks=[events.append])
+    recorder.count('rows', 5)
+    with recorder.span('outer'):
+        recorder.count('rows', 2)
+        with recorder.span('inner'):
+            recorder.count('features', 3)
+
+    inner, outer = events
+    assert inner['counters'] == {'features': 3}
+    assert outer['counters'] == {'rows': 2, 'features': 3}
+
+    recorder.reset()
+    assert recorder.counters == {}
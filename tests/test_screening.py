@@ -0,0 +1,66 @@
+# coding: utf-8
+# Copyright (c) pytmge Development Team.
+
+import numpy as np
+import pytest
+
+from pytmge.core import element_list
+from pytmge.core.crystal import composition_space, screen
+from pytmge.core.crystal.data_preparation import composition
+from pytmge.core.crystal.feature_design import feature_design
+
+
+@pytest.fixture(scope='module')
+def space():
+    return composition_space(
+        [(['Ba', 'Sr'], 1), (['Fe', 'Co'], 2), (['As'], 2)],
+        step=0.05,
+        number_of_elements=(4, 4)
+    )
+
+
+def test_space_size(space):
+    assert (len(space), space.count()) == (441, 76)
+
+
+def _model(X):
+    return X[:, 5] - 0.1 * X[:, 100]
+
+
+@pytest.mark.parametrize('largest', [True, False])
+def test_screen_top_k_equals_brute_force(space, largest):
+    df_top = screen(space, _model, k=10, largest=largest, chunk_size=50, verbose=False)
+
+    contents = np.concatenate(list(space.chunks()))
+    _, attribute_array = feature_design.elemental_attributes(None)
+    scores = _model(feature_design.get_feature_array(contents, attribute_array))
+    order = np.argsort(-scores if largest else scores, kind='stable')[:10]
+
+    np.testing.assert_allclose(df_top['score'].to_numpy(), scores[order])
+    assert list(df_top.index) == space.formulas(contents[order])
+
+
+def test_nan_scores_are_left_out(space):
+    def model(X):
+        scores = _model(X)
+        scores[3:] = np.nan
+        return scores
+
+    df_top = screen(space, model, k=10, chunk_size=1000, verbose=False)
+    assert len(df_top) == 3
+    assert np.isfinite(df_top['score']).all()
+
+
+def test_formulas_of_a_fine_grid():
+    space = composition_space([(['Nb', 'Ti'], 1, 0.00001), (['Sn'], 3)])
+    contents = np.concatenate(list(space.chunks()))[[0, 1, 2, 50000]]
+    formulas = space.formulas(contents)
+    assert formulas == ['Ti1Sn3', 'Ti0.99999Nb0.00001Sn3', 'Ti0.99998Nb0.00002Sn3', 'Ti0.5Nb0.5Sn3']
+
+    # in proper format, and parsed back to the same contents
+    df_composition = composition(formulas).df
+    assert list(df_composition.index) == formulas
+    np.testing.assert_allclose(
+        df_composition.loc[:, space.elements].fillna(0).to_numpy(),
+        contents[:, [element_list.index(e) for e in space.elements]]
+    )
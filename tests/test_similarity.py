@@ -0,0 +1,47 @@
+# coding: utf-8
+# Copyright (c) pytmge Development Team.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pytmge.core.crystal import data_set, similarity_index
+
+
+def _index():
+    df_dataset = pd.DataFrame({'Tc': [39.0, 92.0, 38.0]}, index=['Mg1B2', 'Y1Ba2Cu3O7', 'Ba0.6K0.4Fe2As2'])
+    composition = data_set(df_dataset, verbose=False).chemical_formulas.composition
+    return similarity_index.from_composition(composition, verbose=False)
+
+
+def test_query_formulas(capsys):
+    index = _index()
+    distances, labels = index.query(['Mg1B2', 'Ba0.5K0.5Fe2As2'], k=1, verbose=False)
+    assert list(labels[:, 0]) == ['Mg1B2', 'Ba0.6K0.4Fe2As2']
+    assert distances[0, 0] == 0
+    assert capsys.readouterr().out == ''
+
+
+def test_query_verbose(capsys):
+    index = _index()
+    index.query(['Mg1B2'], k=1, verbose=True)
+    assert 'extracting composition' in capsys.readouterr().out
+    index.query_radius(['Mg1B2'], 0.1, verbose=False)
+    assert capsys.readouterr().out == ''
+
+
+@pytest.mark.parametrize('metric', ['l1', 'l2', 'cosine'])
+def test_brute_force_equals_the_tree(metric, monkeypatch, peak_memory):
+    rng = np.random.default_rng(0)
+    df_features = pd.DataFrame(rng.normal(size=(3000, 12)), index=['e' + str(i) for i in range(3000)])
+    index = similarity_index.from_features(df_features, metric=metric, verbose=False)
+    queries = rng.normal(size=(300, 12))
+    d_tree, labels_tree = index.query(queries, k=7, verbose=False)
+
+    # without scipy, by blocks of queries within a small memory budget
+    monkeypatch.setattr(index, '_tree', None)
+    monkeypatch.setattr(similarity_index, '_block_memory', 2**20)
+    (d, labels), peak = peak_memory(index.query, queries, k=7, verbose=False)
+    np.testing.assert_allclose(d, d_tree, atol=1e-9)
+    assert (labels == labels_tree).all()
+    assert peak < 4 * 2**20